@@ -1,4 +1,248 @@
+import numpy as np
+
+
 def calculate_pv(fv, r, n):
     """Calculates the Present Value of a single future cash flow."""
     # Fix: Correct parentheses for order of operations
     return fv / (1 + r) ** n
+
+
+def _segment_ids(offsets):
+    """Map each element of a flat ragged array to the index of its schedule."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return np.repeat(np.arange(offsets.size - 1), np.diff(offsets))
+
+
+def npv_schedules(cash_flows, times, offsets, rates):
+    """
+    Net present value of many ragged cash-flow schedules in one call.
+
+    The schedules are stored back to back in flat arrays, CSR-style:
+    schedule ``i`` consists of ``cash_flows[offsets[i]:offsets[i + 1]]``
+    received at ``times[offsets[i]:offsets[i + 1]]``.
+
+    Parameters
+    ----------
+    cash_flows : np.ndarray
+        Flat array of cash flows for all schedules, shape (n_flows,).
+    times : np.ndarray
+        Time of each cash flow in compounding periods, shape (n_flows,).
+    offsets : np.ndarray
+        Start index of each schedule plus the total length,
+        shape (n_schedules + 1,). Empty schedules are allowed.
+    rates : float or np.ndarray
+        Per-period discount rate, scalar or one per schedule.
+
+    Returns
+    -------
+    np.ndarray
+        The NPV of each schedule, shape (n_schedules,).
+
+    Examples
+    --------
+    >>> npv_schedules([100, 110, 50], [1, 2, 1], [0, 2, 3], 0.1)
+    array([181.81818182,  45.45454545])
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    times = np.asarray(times, dtype=float)
+    seg = _segment_ids(offsets)
+    n_schedules = len(offsets) - 1
+    rates = np.broadcast_to(np.asarray(rates, dtype=float), (n_schedules,))
+    discounted = cash_flows * (1 + rates[seg]) ** (-times)
+    return np.bincount(seg, weights=discounted, minlength=n_schedules)
+
+
+def annuity_pv(payment, r, n, due=False):
+    """
+    Present value of a level annuity, vectorized over all arguments.
+
+    Parameters
+    ----------
+    payment : float or np.ndarray
+        Payment per period.
+    r : float or np.ndarray
+        Per-period discount rate. ``r = 0`` gives ``payment * n``.
+    n : float or np.ndarray
+        Number of payments.
+    due : bool, optional
+        If True, payments are made at the start of each period
+        (annuity due) instead of at the end.
+
+    Returns
+    -------
+    np.ndarray or float
+        The present value of the annuity.
+    """
+    payment, r, n = np.broadcast_arrays(
+        np.asarray(payment, dtype=float), np.asarray(r, dtype=float), np.asarray(n, dtype=float)
+    )
+    small = np.abs(r) < 1e-12
+    r_safe = np.where(small, 1.0, r)
+    factor = np.where(small, n, (1 - (1 + r_safe) ** (-n)) / r_safe)
+    if due:
+        factor = factor * (1 + r)
+    pv = payment * factor
+    return pv if pv.ndim else pv.item()
+
+
+def perpetuity_pv(payment, r, growth=0.0):
+    """
+    Present value of a (growing) perpetuity paying `payment` one period from now.
+
+    Parameters
+    ----------
+    payment : float or np.ndarray
+        First payment, received at the end of the first period.
+    r : float or np.ndarray
+        Per-period discount rate.
+    growth : float or np.ndarray, optional
+        Per-period growth rate of the payments (Gordon growth model).
+
+    Returns
+    -------
+    np.ndarray or float
+        The present value; ``inf`` where ``r <= growth``.
+    """
+    payment, r, growth = np.broadcast_arrays(
+        np.asarray(payment, dtype=float), np.asarray(r, dtype=float), np.asarray(growth, dtype=float)
+    )
+    spread = r - growth
+    with np.errstate(divide="ignore"):
+        pv = np.where(spread > 0, payment / np.where(spread > 0, spread, 1.0), np.inf)
+    return pv if pv.ndim else pv.item()
+
+
+def solve_schedule_rates(
+    cash_flows, times, offsets, targets=0.0, guess=0.05, tol=1e-10, max_iter=50, bracket=(-0.99, 10.0)
+):
+    """
+    Solve ``npv_schedules(...)[i] = targets[i]`` for the rate of every schedule.
+
+    All schedules are solved simultaneously with a vectorized Newton method.
+    Schedules whose Newton iteration fails (no convergence, or a step that
+    leaves `bracket`) fall back to a vectorized bisection on `bracket`.
+
+    Parameters
+    ----------
+    cash_flows, times, offsets : np.ndarray
+        Ragged schedules in the flat layout of `npv_schedules`.
+    targets : float or np.ndarray, optional
+        Target present value of each schedule (0 for an IRR, the price for
+        a yield to maturity).
+    guess : float or np.ndarray, optional
+        Starting rate for Newton's method.
+    tol : float, optional
+        Absolute tolerance on the rate.
+    max_iter : int, optional
+        Maximum number of Newton (and bisection) iterations.
+    bracket : tuple of float, optional
+        Rate interval searched by the bisection fallback.
+
+    Returns
+    -------
+    rates : np.ndarray
+        Solved rate per schedule, NaN where no root was found.
+    converged : np.ndarray
+        Boolean convergence flag per schedule.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    times = np.asarray(times, dtype=float)
+    seg = _segment_ids(offsets)
+    n_schedules = len(offsets) - 1
+    targets = np.broadcast_to(np.asarray(targets, dtype=float), (n_schedules,))
+    rates = np.array(np.broadcast_to(np.asarray(guess, dtype=float), (n_schedules,)))
+    lo, hi = bracket
+
+    def residual(r, active):
+        # Restrict work to the cash flows of the active schedules
+        elem = active[seg]
+        s, cf, t = seg[elem], cash_flows[elem], times[elem]
+        df = (1 + r[s]) ** (-t)
+        f = np.bincount(s, weights=cf * df, minlength=n_schedules) - targets
+        df_dr = np.bincount(s, weights=-t * cf * df / (1 + r[s]), minlength=n_schedules)
+        return f, df_dr
+
+    # --- Vectorized Newton ---
+    converged = np.zeros(n_schedules, dtype=bool)
+    failed = np.zeros(n_schedules, dtype=bool)
+    for _ in range(max_iter):
+        active = ~(converged | failed)
+        if not active.any():
+            break
+        f, df_dr = residual(rates, active)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(active, f / df_dr, 0.0)
+        new_rates = rates - step
+        bad = active & ~(np.isfinite(new_rates) & (new_rates > lo) & (new_rates < hi))
+        failed |= bad
+        ok = active & ~bad
+        rates[ok] = new_rates[ok]
+        converged |= ok & (np.abs(step) < tol)
+
+    # --- Masked bisection fallback ---
+    todo = ~converged
+    if todo.any():
+        a = np.full(n_schedules, float(lo))
+        b = np.full(n_schedules, float(hi))
+        f_a, _ = residual(a, todo)
+        f_b, _ = residual(b, todo)
+        todo &= np.sign(f_a) != np.sign(f_b)
+        n_bisect = int(np.ceil(np.log2((hi - lo) / tol)))
+        for _ in range(n_bisect):
+            if not todo.any():
+                break
+            mid = 0.5 * (a + b)
+            f_mid, _ = residual(mid, todo)
+            left = np.sign(f_mid) == np.sign(f_a)
+            a = np.where(todo & left, mid, a)
+            f_a = np.where(todo & left, f_mid, f_a)
+            b = np.where(todo & ~left, mid, b)
+        rates[todo] = 0.5 * (a + b)[todo]
+        converged |= todo
+
+    rates[~converged] = np.nan
+    return rates, converged
+
+
+def irr_schedules(cash_flows, times, offsets, **kwargs):
+    """
+    Internal rate of return of many ragged cash-flow schedules.
+
+    Parameters
+    ----------
+    cash_flows, times, offsets : np.ndarray
+        Ragged schedules in the flat layout of `npv_schedules`, including
+        the initial (negative) investment at time 0.
+    **kwargs
+        Solver options passed to `solve_schedule_rates`.
+
+    Returns
+    -------
+    np.ndarray
+        Per-period IRR of each schedule, NaN where no root was found.
+    """
+    rates, _ = solve_schedule_rates(cash_flows, times, offsets, targets=0.0, **kwargs)
+    return rates
+
+
+def ytm_schedules(prices, cash_flows, times, offsets, **kwargs):
+    """
+    Per-period yield to maturity of many bonds given their prices.
+
+    Parameters
+    ----------
+    prices : np.ndarray
+        Dirty price of each bond, shape (n_schedules,).
+    cash_flows, times, offsets : np.ndarray
+        Promised coupon and principal payments in the flat layout of
+        `npv_schedules`.
+    **kwargs
+        Solver options passed to `solve_schedule_rates`.
+
+    Returns
+    -------
+    np.ndarray
+        Yield per compounding period of each bond, NaN where no root was found.
+    """
+    rates, _ = solve_schedule_rates(cash_flows, times, offsets, targets=prices, **kwargs)
+    return rates
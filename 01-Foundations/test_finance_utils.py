@@ -2,12 +2,21 @@
 Comprehensive test suite for finance_utils module.
 
 Tests present value calculations with various inputs including
-edge cases, boundary conditions, and error handling.
+edge cases, boundary conditions, and error handling, as well as the
+vectorized cash-flow engine (ragged NPV, annuities, IRR and YTM).
 """
 
 import pytest
 import numpy as np
-from finance_utils import calculate_pv
+from finance_utils import (
+    annuity_pv,
+    calculate_pv,
+    irr_schedules,
+    npv_schedules,
+    perpetuity_pv,
+    solve_schedule_rates,
+    ytm_schedules,
+)
 
 
 class TestCalculatePV:
@@ -159,6 +168,89 @@ class TestReturnTypes:
         assert np.isfinite(result)
 
 
+class TestNPVSchedules:
+    """Test suite for NPV of ragged cash-flow schedules."""
+
+    def test_matches_calculate_pv(self):
+        """Each schedule's NPV equals the sum of single-flow PVs."""
+        cash_flows = np.array([100.0, 110.0, 50.0, 20.0, 30.0])
+        times = np.array([1, 2, 1, 0.5, 3])
+        offsets = np.array([0, 2, 5])
+        rates = np.array([0.1, 0.05])
+        expected = [
+            calculate_pv(100, 0.1, 1) + calculate_pv(110, 0.1, 2),
+            calculate_pv(50, 0.05, 1) + calculate_pv(20, 0.05, 0.5) + calculate_pv(30, 0.05, 3),
+        ]
+        result = npv_schedules(cash_flows, times, offsets, rates)
+        np.testing.assert_allclose(result, expected)
+
+    def test_empty_schedule(self):
+        """An empty schedule has zero NPV and does not shift its neighbours."""
+        result = npv_schedules([100.0, 50.0], [1, 1], [0, 1, 1, 2], 0.1)
+        np.testing.assert_allclose(result, [90.90909, 0.0, 45.45454], rtol=1e-5)
+
+
+class TestClosedForms:
+    """Test suite for annuity and perpetuity closed forms."""
+
+    def test_annuity_matches_schedule(self):
+        """Annuity closed form equals the explicit schedule NPV."""
+        times = np.arange(1, 11)
+        explicit = npv_schedules(np.full(10, 100.0), times, [0, 10], 0.05)[0]
+        assert annuity_pv(100, 0.05, 10) == pytest.approx(explicit)
+
+    def test_annuity_due_and_zero_rate(self):
+        """Annuity due is one period less discounted; r=0 sums payments."""
+        assert annuity_pv(100, 0.05, 10, due=True) == pytest.approx(annuity_pv(100, 0.05, 10) * 1.05)
+        np.testing.assert_allclose(annuity_pv(100, np.array([0.0, 0.1]), 5), [500.0, 379.0787], rtol=1e-6)
+
+    def test_growing_perpetuity(self):
+        """Gordon growth value, infinite when growth >= rate."""
+        assert perpetuity_pv(5, 0.10, 0.03) == pytest.approx(71.428571, rel=1e-6)
+        assert np.isinf(perpetuity_pv(5, 0.03, 0.03))
+
+
+class TestRateSolvers:
+    """Test suite for batched IRR and YTM solving."""
+
+    def test_irr_known_values(self):
+        """A par bond has IRR equal to its coupon rate."""
+        cash_flows = [-100, 10, 10, 110, -50, 10]
+        times = [0, 1, 2, 3, 0, 1]
+        result = irr_schedules(cash_flows, times, [0, 4, 6])
+        np.testing.assert_allclose(result, [0.1, -0.8], atol=1e-9)
+
+    def test_irr_zeroes_npv(self):
+        """NPV at the solved IRR is zero for many random schedules."""
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(2, 30, size=500)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        times = np.concatenate([np.arange(n) for n in lengths]).astype(float)
+        cash_flows = rng.uniform(5, 15, size=offsets[-1])
+        cash_flows[offsets[:-1]] = -rng.uniform(20, 100, size=500)
+        rates, converged = solve_schedule_rates(cash_flows, times, offsets)
+        assert converged.all()
+        np.testing.assert_allclose(npv_schedules(cash_flows, times, offsets, rates), 0.0, atol=1e-7)
+
+    def test_bisection_fallback(self):
+        """A bad Newton guess still converges through the bisection fallback."""
+        rates, converged = solve_schedule_rates([-100, 10, 10, 110], [0, 1, 2, 3], [0, 4], guess=9.5, max_iter=3)
+        assert converged.all()
+        assert rates[0] == pytest.approx(0.1, abs=1e-8)
+
+    def test_no_root(self):
+        """Schedules without a sign change return NaN."""
+        rates, converged = solve_schedule_rates([10, 10], [0, 1], [0, 2])
+        assert not converged[0]
+        assert np.isnan(rates[0])
+
+    def test_ytm(self):
+        """Price at par gives YTM equal to the coupon rate."""
+        result = ytm_schedules([100.0, 95.0], [5, 5, 105, 5, 105], [1, 2, 3, 1, 2], [0, 3, 5])
+        assert result[0] == pytest.approx(0.05)
+        assert result[1] > 0.05
+
+
 # Additional integration tests
 def test_compound_discounting():
     """Test that the function correctly applies compound discounting."""
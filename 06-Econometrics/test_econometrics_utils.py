@@ -0,0 +1,397 @@
+"""
+Regression tests for the samplers and GMM estimators in econometrics_utils.
+
+Posterior targets are Gaussians with known moments, and the GMM tests use
+simulated instrumental-variables data whose efficient estimates can be
+computed in closed form.
+"""
+
+import numpy as np
+import pytest
+from scipy.optimize import approx_fprime
+from econometrics_utils import GMMEstimator, HMCSampler, LinearGMM, MCMCSampler, MLEstimator, hac_covariance
+
+TARGET_MEAN = np.array([1.0, -2.0])
+TARGET_COV = np.array([[1.0, 2.7], [2.7, 9.0]])
+TARGET_PREC = np.linalg.inv(TARGET_COV)
+
+
+def gaussian_log_posterior(params, data):
+    """Log density of a strongly correlated bivariate normal, up to a constant."""
+    diff = params - TARGET_MEAN
+    return -0.5 * diff @ TARGET_PREC @ diff
+
+
+def gaussian_log_likelihood(params, data):
+    """The same density seen as a log-likelihood, so its MLE vcov is TARGET_COV."""
+    return gaussian_log_posterior(params, data)
+
+
+def gaussian_grad(params, data):
+    """Analytic gradient of `gaussian_log_posterior`."""
+    return -TARGET_PREC @ (params - TARGET_MEAN)
+
+
+def make_iv_data(n_obs=2000, seed=0):
+    """Heteroskedastic IV data: y = 1 + 0.5 x + e, x endogenous, three excluded instruments."""
+    rng = np.random.default_rng(seed)
+    instruments = rng.standard_normal((n_obs, 3))
+    v = rng.standard_normal(n_obs)
+    x = instruments @ np.array([0.8, 0.5, 0.3]) + v
+    e = (0.6 * v + 0.8 * rng.standard_normal(n_obs)) * (1 + 0.5 * np.abs(instruments[:, 0]))
+    y = 1.0 + 0.5 * x + e
+    X = np.column_stack([np.ones(n_obs), x])
+    Z = np.column_stack([np.ones(n_obs), instruments])
+    return y, X, Z
+
+
+def iv_moments(theta, data):
+    """Moment contributions z_i (y_i - x_i'theta); also accepts an (m, k) stack of thetas."""
+    y, X, Z = data
+    residuals = y - np.asarray(theta) @ X.T
+    return Z * residuals[..., None]
+
+
+def iv_jacobian(theta, data):
+    """Analytic Jacobian -Z'X / N of the mean IV moments."""
+    _, X, Z = data
+    return -Z.T @ X / X.shape[0]
+
+
+def closed_form_two_step(y, X, Z, W_first):
+    """Two-step efficient linear GMM computed directly from the data."""
+    def beta(W):
+        XZW = X.T @ Z @ W
+        return np.linalg.solve(XZW @ Z.T @ X, XZW @ Z.T @ y)
+
+    b1 = beta(W_first)
+    g = Z * (y - X @ b1)[:, None]
+    W = np.linalg.inv(g.T @ g / y.size)
+    return beta(W), W
+
+
+class TestAdaptiveMetropolis:
+    """Tests for proposal adaptation and preconditioning in MCMCSampler."""
+
+    def test_adapted_covariance_matches_target(self):
+        """Adaptive Metropolis learns the target covariance during burn-in."""
+        sampler = MCMCSampler(gaussian_log_posterior, None)
+        sampler.sample(np.zeros(2), num_samples=20000, burn_in=5000, adapt_cov=True, seed=0)
+        np.testing.assert_allclose(sampler.proposal_cov, TARGET_COV, rtol=0.25, atol=0.3)
+        np.testing.assert_allclose(sampler.samples.mean(axis=0), TARGET_MEAN, atol=0.25)
+
+    def test_step_size_adaptation_hits_target_rate(self):
+        """Dual averaging tunes the step size to the requested acceptance rate."""
+        sampler = MCMCSampler(gaussian_log_posterior, None)
+        sampler.sample(np.zeros(2), num_samples=5000, burn_in=3000, adapt_step=True, seed=1)
+        assert sampler.acceptance_rate == pytest.approx(0.234, abs=0.08)
+
+    def test_preconditioning_beats_isotropic_proposal(self):
+        """A proposal shaped by the MLE inverse Hessian mixes much faster."""
+        mle = MLEstimator(gaussian_log_likelihood, None).fit(np.zeros(2))
+        preconditioned = MCMCSampler(gaussian_log_posterior, None)
+        preconditioned.sample(np.zeros(2), num_samples=5000, burn_in=500, proposal_cov=mle, seed=2)
+        isotropic = MCMCSampler(gaussian_log_posterior, None)
+        isotropic.sample(np.zeros(2), num_samples=5000, burn_in=500, seed=2)
+        assert preconditioned.ess.min() > 5 * isotropic.ess.min()
+
+    def test_proposal_cov_shape_is_checked(self):
+        """A proposal covariance of the wrong size is rejected."""
+        with pytest.raises(ValueError):
+            MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), proposal_cov=np.identity(3))
+
+    def test_seed_and_global_state_reproducibility(self):
+        """An explicit seed, or np.random.seed when no seed is given, reproduces the chain."""
+        draws = []
+        for _ in range(2):
+            np.random.seed(123)
+            sampler = MCMCSampler(gaussian_log_posterior, None)
+            draws.append(sampler.sample(np.zeros(2), num_samples=200, burn_in=10).samples.copy())
+        np.testing.assert_array_equal(draws[0], draws[1])
+        first = MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), num_samples=200, seed=7)
+        second = MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), num_samples=200, seed=7)
+        np.testing.assert_array_equal(first.samples, second.samples)
+
+
+class TestHMCSampler:
+    """Tests for the NUTS and static HMC samplers."""
+
+    def test_nuts_recovers_target_moments(self):
+        """NUTS with a dense mass matrix reproduces the target mean and covariance."""
+        sampler = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+        sampler.sample(np.zeros(2), num_samples=2000, burn_in=1000, dense_mass=True, seed=0)
+        np.testing.assert_allclose(sampler.samples.mean(axis=0), TARGET_MEAN, atol=0.3)
+        np.testing.assert_allclose(np.cov(sampler.samples, rowvar=False), TARGET_COV, rtol=0.2, atol=0.2)
+        assert sampler.n_divergent == 0
+
+    def test_dense_mass_adapts_to_target_covariance(self):
+        """The adapted dense inverse mass matrix approximates the posterior covariance."""
+        sampler = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+        sampler.sample(np.zeros(2), num_samples=200, burn_in=1000, dense_mass=True, seed=0)
+        np.testing.assert_allclose(sampler.inv_mass, TARGET_COV, rtol=0.3, atol=0.3)
+
+    def test_static_hmc_recovers_target_mean(self):
+        """Static HMC with a fixed number of leapfrog steps is also correct."""
+        sampler = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+        sampler.sample(np.zeros(2), num_samples=2000, burn_in=1000, n_leapfrog=10, seed=0)
+        np.testing.assert_allclose(sampler.samples.mean(axis=0), TARGET_MEAN, atol=0.3)
+        assert sampler.n_divergent == 0
+
+    def test_numerical_gradient_matches_analytic(self):
+        """Without grad_func, finite differences give the same posterior at a higher cost."""
+        analytic = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+        analytic.sample(np.zeros(2), num_samples=1000, burn_in=500, dense_mass=True, seed=3)
+        numeric = HMCSampler(gaussian_log_posterior, None)
+        numeric.sample(np.zeros(2), num_samples=1000, burn_in=500, dense_mass=True, seed=3)
+        np.testing.assert_allclose(numeric.samples.mean(axis=0), TARGET_MEAN, atol=0.3)
+        np.testing.assert_allclose(numeric.samples.std(axis=0), np.sqrt(np.diag(TARGET_COV)), rtol=0.2)
+        assert numeric.n_evals > 4 * analytic.n_evals
+
+    def test_beats_random_walk_per_evaluation(self):
+        """NUTS delivers more effective samples per log-density evaluation than Metropolis."""
+        hmc = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+        hmc.sample(np.zeros(2), num_samples=1000, burn_in=500, dense_mass=True, seed=4)
+        metropolis = MCMCSampler(gaussian_log_posterior, None)
+        metropolis.sample(np.zeros(2), num_samples=1500, burn_in=0, seed=4)
+        assert hmc.ess.min() / hmc.n_evals > metropolis.ess.min() / 1500
+
+    def test_seed_and_global_state_reproducibility(self):
+        """Like MCMCSampler, an explicit seed or np.random.seed without one reproduces the chain."""
+        draws = []
+        for _ in range(2):
+            np.random.seed(123)
+            sampler = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+            sampler.sample(np.zeros(2), num_samples=100, burn_in=100)
+            draws.append(sampler.samples.copy())
+        np.testing.assert_array_equal(draws[0], draws[1])
+        seeded = []
+        for global_seed in (0, 1):
+            np.random.seed(global_seed)
+            sampler = HMCSampler(gaussian_log_posterior, None, grad_func=gaussian_grad)
+            sampler.sample(np.zeros(2), num_samples=100, burn_in=100, seed=7)
+            seeded.append(sampler.samples.copy())
+        np.testing.assert_array_equal(seeded[0], seeded[1])
+        assert not np.array_equal(seeded[0], draws[0])
+
+    def test_infinite_start_is_rejected(self):
+        """A start with zero posterior density raises."""
+        sampler = HMCSampler(lambda params, data: -np.inf, None, grad_func=gaussian_grad)
+        with pytest.raises(ValueError):
+            sampler.sample(np.zeros(2))
+
+
+class TestStreamingMCMC:
+    """Tests for thinning, ring buffers, file output and early stopping in MCMCSampler."""
+
+    def test_thin_keeps_every_kth_draw(self):
+        """Thinning keeps exactly the draws of the unthinned chain at the thinning stride."""
+        full = MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), num_samples=1000, burn_in=100, seed=5)
+        thinned = MCMCSampler(gaussian_log_posterior, None).sample(
+            np.zeros(2), num_samples=1000, burn_in=100, seed=5, thin=7
+        )
+        np.testing.assert_array_equal(thinned.samples, full.samples[::7])
+
+    def test_ring_buffer_keeps_latest_draws_in_order(self):
+        """A ring buffer holds the last draws chronologically and running stats cover the whole chain."""
+        full = MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), num_samples=1000, burn_in=100, seed=5)
+        ring = MCMCSampler(gaussian_log_posterior, None).sample(
+            np.zeros(2), num_samples=1000, burn_in=100, seed=5, buffer_size=64
+        )
+        np.testing.assert_array_equal(ring.samples, full.samples[-64:])
+        np.testing.assert_allclose(ring.running_mean, full.samples.mean(axis=0))
+        np.testing.assert_allclose(ring.running_var, full.samples.var(axis=0, ddof=1), rtol=1e-8)
+
+    def test_output_file_streams_draws(self, tmp_path):
+        """Draws written to a .npy file match the in-memory chain and are exposed as a memory map."""
+        path = tmp_path / "chain.npy"
+        full = MCMCSampler(gaussian_log_posterior, None).sample(np.zeros(2), num_samples=1000, burn_in=100, seed=5)
+        streamed = MCMCSampler(gaussian_log_posterior, None).sample(
+            np.zeros(2), num_samples=1000, burn_in=100, seed=5, output_file=path, check_every=300
+        )
+        assert isinstance(streamed.samples, np.memmap)
+        np.testing.assert_array_equal(np.load(path), full.samples)
+
+    def test_target_ess_stops_early_and_reports_progress(self):
+        """The chain stops at the first check where every ESS reaches the target."""
+        reports = []
+        sampler = MCMCSampler(gaussian_log_posterior, None)
+        sampler.sample(
+            np.zeros(2), num_samples=200000, burn_in=1000, proposal_cov=TARGET_COV,
+            seed=6, target_ess=500, check_every=1000, callback=reports.append,
+        )
+        assert sampler.n_iterations < 200000
+        assert sampler.n_iterations == reports[-1]["iteration"]
+        assert np.all(reports[-1]["ess"] >= 500)
+        assert all(np.any(report["ess"] < 500) for report in reports[:-1])
+        assert sampler.samples.shape == (sampler.n_iterations, 2)
+
+    def test_invalid_thin_and_buffer_size(self):
+        """Non-positive thinning and buffer sizes are rejected."""
+        sampler = MCMCSampler(gaussian_log_posterior, None)
+        with pytest.raises(ValueError):
+            sampler.sample(np.zeros(2), num_samples=10, thin=0)
+        with pytest.raises(ValueError):
+            sampler.sample(np.zeros(2), num_samples=10, buffer_size=0)
+
+    def test_file_is_finalized_when_log_posterior_raises(self, tmp_path):
+        """Draws taken before an exception are flushed to a valid .npy file."""
+        calls = {"n": 0}
+
+        def failing_log_posterior(params, data):
+            calls["n"] += 1
+            if calls["n"] > 250:
+                raise RuntimeError("model blew up")
+            return gaussian_log_posterior(params, data)
+
+        path = tmp_path / "partial.npy"
+        with pytest.raises(RuntimeError):
+            MCMCSampler(failing_log_posterior, None).sample(
+                np.zeros(2), num_samples=1000, burn_in=100, seed=5, output_file=path, check_every=1000
+            )
+        partial = np.load(path)
+        assert partial.shape == (149, 2)
+
+
+class TestGMMEstimator:
+    """Tests for the Jacobian, vectorized moments and CUE gradient of GMMEstimator."""
+
+    data = make_iv_data()
+
+    def test_two_step_matches_closed_form(self):
+        """Both the numerical optimizer and the linear fast path reproduce the closed form."""
+        y, X, Z = self.data
+        expected, W = closed_form_two_step(y, X, Z, np.identity(4))
+        optimized = GMMEstimator(iv_moments, self.data).fit(np.zeros(2))
+        fast = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2))
+        np.testing.assert_allclose(optimized.gmm_params, expected, rtol=1e-5)
+        np.testing.assert_allclose(fast.gmm_params, expected, rtol=1e-8)
+        np.testing.assert_allclose(fast.weight_matrix, W, rtol=1e-8)
+
+    def test_numerical_jacobian_matches_analytic(self):
+        """Central differences give the analytic Jacobian and the same standard errors."""
+        numeric = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2))
+        analytic = GMMEstimator(iv_moments, self.data, linear=True, jacobian=iv_jacobian).fit(np.zeros(2))
+        theta = numeric.gmm_params
+        np.testing.assert_allclose(numeric._jacobian(theta), iv_jacobian(theta, self.data), rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(numeric.gmm_vcov, analytic.gmm_vcov, rtol=1e-6)
+
+    def test_vectorized_moments_match_loop_with_fewer_calls(self):
+        """A vectorized moment function gives identical estimates in fewer calls."""
+        for method in ("two-step", "iterated", "cue"):
+            loop = GMMEstimator(iv_moments, self.data).fit(np.zeros(2), method=method)
+            batched = GMMEstimator(iv_moments, self.data, vectorized=True).fit(np.zeros(2), method=method)
+            np.testing.assert_allclose(batched.gmm_params, loop.gmm_params, rtol=1e-8)
+            assert batched.j_stat == pytest.approx(loop.j_stat, rel=1e-6)
+            assert batched.n_moment_evals < loop.n_moment_evals
+
+    def test_iterated_gmm_is_a_fixed_point(self):
+        """Iterated GMM stops where re-estimating S no longer moves theta, and J uses that W."""
+        est = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2), method="iterated", tol=1e-12)
+        g = iv_moments(est.gmm_params, self.data)
+        W = np.linalg.inv(g.T @ g / g.shape[0])
+        np.testing.assert_allclose(est.weight_matrix, W, rtol=1e-8)
+        g_bar = g.mean(axis=0)
+        assert est.j_stat == pytest.approx(g.shape[0] * g_bar @ W @ g_bar, rel=1e-8)
+        assert est.n_iterations < 100
+
+    @pytest.mark.parametrize("weighting, center", [("robust", False), ("hac", False), ("hac", True)])
+    def test_cue_gradient_matches_finite_differences(self, weighting, center):
+        """The exact CUE gradient agrees with finite differences of the CUE criterion."""
+        est = GMMEstimator(lambda theta, data: iv_moments(np.exp(theta), data), self.data)
+        est.fit(np.array([0.1, -0.5]), method="cue", weighting=weighting, hac_lags=4, center=center)
+        theta = est.gmm_params + np.array([0.05, -0.03])
+        numeric = approx_fprime(theta, est._cue_criterion, 1e-6)
+        np.testing.assert_allclose(est._cue_criterion_grad(theta), numeric, rtol=1e-4)
+
+    def test_cue_minimizes_its_criterion(self):
+        """CUE lands at a stationary point of its criterion, close to two-step GMM."""
+        two_step = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2))
+        cue = GMMEstimator(iv_moments, self.data).fit(np.zeros(2), method="cue")
+        np.testing.assert_allclose(cue._cue_criterion_grad(cue.gmm_params), 0, atol=1e-3)
+        np.testing.assert_allclose(cue.gmm_params, two_step.gmm_params, atol=0.05)
+
+    def test_hac_with_zero_lags_is_robust(self):
+        """Newey-West weighting with zero lags equals heteroskedasticity-robust weighting."""
+        g = iv_moments(np.array([1.0, 0.5]), self.data)
+        np.testing.assert_allclose(hac_covariance(g, lags=0), g.T @ g / g.shape[0])
+        robust = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2))
+        hac = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2), weighting="hac", hac_lags=0)
+        np.testing.assert_allclose(hac.gmm_params, robust.gmm_params)
+
+    def test_unknown_options_are_rejected(self):
+        """Unknown methods and weightings raise."""
+        with pytest.raises(ValueError):
+            GMMEstimator(iv_moments, self.data).fit(np.zeros(2), method="three-step")
+        with pytest.raises(ValueError):
+            GMMEstimator(iv_moments, self.data).fit(np.zeros(2), weighting="bartlett")
+
+
+class TestLinearGMM:
+    """Tests for the sufficient-statistics linear GMM estimator."""
+
+    data = make_iv_data()
+
+    def test_two_step_matches_closed_form(self):
+        """Two-step estimates from cross-products equal the direct computation started from 2SLS."""
+        y, X, Z = self.data
+        expected, W = closed_form_two_step(y, X, Z, np.linalg.inv(Z.T @ Z / y.size))
+        est = LinearGMM().fit(y, X, Z)
+        np.testing.assert_allclose(est.gmm_params, expected, rtol=1e-10)
+        np.testing.assert_allclose(est.weight_matrix, W, rtol=1e-8)
+        g_bar = Z.T @ (y - X @ expected) / y.size
+        assert est.j_stat == pytest.approx(y.size * g_bar @ W @ g_bar, rel=1e-8)
+
+    def test_2sls_matches_projection(self):
+        """'2sls' is the textbook projection estimator with a Sargan-Hansen J statistic."""
+        y, X, Z = self.data
+        X_hat = Z @ np.linalg.lstsq(Z, X, rcond=None)[0]
+        expected = np.linalg.solve(X_hat.T @ X, X_hat.T @ y)
+        est = LinearGMM().fit(y, X, Z, method="2sls")
+        np.testing.assert_allclose(est.gmm_params, expected, rtol=1e-10)
+        g = Z * (y - X @ expected)[:, None]
+        g_bar = g.mean(axis=0)
+        assert est.j_stat == pytest.approx(y.size * g_bar @ np.linalg.solve(g.T @ g / y.size, g_bar), rel=1e-8)
+
+    def test_iterated_agrees_with_gmm_estimator(self):
+        """Iterated estimates, weights, J and standard errors agree with the generic estimator."""
+        y, X, Z = self.data
+        linear = LinearGMM().fit(y, X, Z, method="iterated")
+        generic = GMMEstimator(iv_moments, self.data, linear=True).fit(np.zeros(2), method="iterated", tol=1e-12)
+        np.testing.assert_allclose(linear.gmm_params, generic.gmm_params, rtol=1e-8)
+        np.testing.assert_allclose(linear.weight_matrix, generic.weight_matrix, rtol=1e-6)
+        np.testing.assert_allclose(linear.gmm_vcov, generic.gmm_vcov, rtol=1e-6)
+        assert linear.j_stat == pytest.approx(generic.j_stat, rel=1e-6)
+
+    def test_partial_fit_chunks_equal_full_fit(self):
+        """Accumulating the data in uneven chunks gives the same estimates as one pass."""
+        y, X, Z = self.data
+        full = LinearGMM().fit(y, X, Z, method="iterated")
+        chunked = LinearGMM()
+        for chunk in np.array_split(np.arange(y.size), [300, 1100, 1150]):
+            chunked.partial_fit(y[chunk], X[chunk], Z[chunk])
+        chunked.fit(method="iterated")
+        np.testing.assert_allclose(chunked.gmm_params, full.gmm_params, rtol=1e-10)
+        np.testing.assert_allclose(chunked.gmm_vcov, full.gmm_vcov, rtol=1e-8)
+        assert chunked.j_stat == pytest.approx(full.j_stat, rel=1e-8)
+
+    def test_homoskedastic_weighting_is_2sls(self):
+        """With homoskedastic weighting the efficient estimator reduces to 2SLS."""
+        y, X, Z = self.data
+        tsls = LinearGMM().fit(y, X, Z, method="2sls")
+        homoskedastic = LinearGMM().fit(y, X, Z, weighting="homoskedastic")
+        np.testing.assert_allclose(homoskedastic.gmm_params, tsls.gmm_params, rtol=1e-10)
+
+    def test_invalid_inputs(self):
+        """Under-identification, mismatched chunks and fitting without data are rejected."""
+        y, X, Z = self.data
+        with pytest.raises(ValueError):
+            LinearGMM().partial_fit(y, X, Z[:, :1])
+        est = LinearGMM().partial_fit(y, X, Z)
+        with pytest.raises(ValueError):
+            est.partial_fit(y, X, Z[:, :3])
+        with pytest.raises(ValueError):
+            LinearGMM().fit()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,596 @@
+import numpy as np
+from numba import njit, prange
+from scipy import sparse
+from scipy.optimize import minimize
+from scipy.special import chdtri, ndtr, ndtri, stdtrit
+from typing import NamedTuple
+
+from option_pricing import _seeded_chunks
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(V, F, T, r, sigma):
+    vol_sqrt_T = sigma * np.sqrt(T)
+    d1 = (np.log(V / F) + (r + 0.5 * sigma**2) * T) / vol_sqrt_T
+    return d1, d1 - vol_sqrt_T
+
+
+def merton_model(V, F, T, r, sigma):
+    """
+    Equity value, debt value and default probability in the Merton (1974) model.
+
+    Equity is a European call on the firm's assets `V` struck at the face
+    value of debt `F`. All inputs broadcast against each other, so a whole
+    panel of firms or a parameter grid is evaluated in one call.
+
+    Returns
+    -------
+    dict
+        'Equity Value', 'Debt Value' and the risk-neutral 'Default
+        Probability' ``N(-d2)``, shaped like the broadcast inputs.
+    """
+    d1, d2 = _d1_d2(V, F, T, r, sigma)
+    # Value of equity (call option)
+    E = V * ndtr(d1) - np.exp(-r * T) * F * ndtr(d2)
+    # Value of debt
+    D = V - E
+    # Probability of default (prob that assets < debt at maturity)
+    prob_default = ndtr(-d2)
+    return {'Equity Value': E, 'Debt Value': D, 'Default Probability': prob_default}
+
+
+def reduced_form_model(F, T, r, lam, R):
+    """
+    Bond value, credit spread and default probability in a constant-intensity reduced-form model.
+
+    Default arrives at rate `lam` and recovers a fraction `R` of face value
+    at maturity. Inputs broadcast like `merton_model`.
+
+    Returns
+    -------
+    dict
+        'Debt Value', 'Credit Spread (bps)' and the 'Default Probability'
+        ``1 - exp(-lam T)`` over the life of the bond.
+    """
+    survival = np.exp(-lam * T)
+    # Value of the risky debt
+    D = F * np.exp(-r * T) * (R + (1 - R) * survival)
+    # Yield to maturity of the risky debt
+    y = - (1/T) * np.log(D/F)
+    # Credit spread
+    spread = y - r
+    return {'Debt Value': D, 'Credit Spread (bps)': spread * 10000, 'Default Probability': 1 - survival}
+
+
+class MertonCalibration(NamedTuple):
+    """
+    Implied asset values and volatilities of a panel of firms.
+
+    `distance_to_default` is ``(log(V / F) + (mu - sigma_A**2 / 2) T) / (sigma_A sqrt(T))``
+    and `default_probability` is ``N(-distance_to_default)``, with `mu` the
+    asset drift used in the calibration.
+    """
+    asset_value: np.ndarray
+    asset_vol: np.ndarray
+    distance_to_default: np.ndarray
+    default_probability: np.ndarray
+    converged: np.ndarray
+    n_iter: int
+
+
+def _distance_to_default(V, F, T, mu, sigma):
+    return (np.log(V / F) + (mu - 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+
+
+def _merton_residuals(V, sigma, E, sigma_E, F, F_disc, T, r):
+    """Residuals of the two Merton equations, plus N(d1), n(d1) and d2 for the Jacobian."""
+    d1, d2 = _d1_d2(V, F, T, r, sigma)
+    N1, n1 = ndtr(d1), _INV_SQRT_2PI * np.exp(-0.5 * d1**2)
+    return V * N1 - F_disc * ndtr(d2) - E, N1 * sigma * V - sigma_E * E, N1, n1, d2
+
+
+def calibrate_merton(E, sigma_E, F, T, r, mu=None, tol=1e-10, max_iter=500):
+    """
+    Solve for asset value and volatility from observed equity value and volatility.
+
+    For every firm the two Merton equations
+
+        E = V N(d1) - F exp(-rT) N(d2),    sigma_E E = N(d1) sigma_A V
+
+    are solved by Newton's method on all firms at once. Each firm has its
+    own 2x2 Jacobian, inverted in closed form, and firms drop out of the
+    active set as they converge, so the cost falls with every iteration.
+    Each step is halved until V and sigma_A stay positive and the scaled
+    residual norm decreases; a firm for which no halving is accepted has
+    stalled and is dropped.
+
+    Healthy firms converge in a few iterations. Deeply distressed firms,
+    with equity below about 1e-4 of the face value of debt (equity
+    volatilities of several hundred percent), take up to a few hundred
+    damped steps, hence the generous `max_iter`. Below about 1e-16 of the
+    debt the equity equation cannot be resolved in double precision, and
+    such firms stall unconverged.
+
+    Parameters
+    ----------
+    E, sigma_E : array-like
+        Market value of equity and equity volatility, one entry per firm.
+    F : array-like
+        Face value of debt (the default point).
+    T : float or array-like
+        Debt maturity / horizon in years.
+    r : float or array-like
+        Risk-free rate.
+    mu : float or array-like, optional
+        Asset drift for the physical distance to default; `r` by default,
+        which gives the risk-neutral default probability.
+    tol : float, optional
+        Convergence tolerance on both equations, relative to E.
+    max_iter : int, optional
+        Maximum number of Newton iterations. Only the firms still active
+        are iterated, so a large value costs little.
+
+    Returns
+    -------
+    MertonCalibration
+        Arrays shaped like the broadcast inputs. Entries for firms that did
+        not converge (or with infeasible inputs) hold the last iterate and
+        are flagged in `converged`.
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (E, sigma_E, F, T, r)))
+    shape = arrays[0].shape
+    E, sigma_E, F, T, r = (a.ravel() for a in arrays)
+    F_disc = F * np.exp(-r * T)
+    # Start from riskless debt: V = E + PV(F), sigma_A = sigma_E E / V
+    V = E + F_disc
+    sigma = sigma_E * E / V
+    converged = np.zeros(E.size, dtype=bool)
+    active = np.flatnonzero((E > 0) & (sigma_E > 0) & (F > 0))
+    n_iter = 0
+    while active.size and n_iter < max_iter:
+        n_iter += 1
+        Va, sa, Ea, sEa, Fa, Ta, ra = (x[active] for x in (V, sigma, E, sigma_E, F, T, r))
+        sqrt_T = np.sqrt(Ta)
+        f1, f2, N1, n1, d2 = _merton_residuals(Va, sa, Ea, sEa, Fa, F_disc[active], Ta, ra)
+        done = (np.abs(f1) < tol * Ea) & (np.abs(f2) < tol * sEa * Ea)
+        converged[active[done]] = True
+        keep = ~done
+        active = active[keep]
+        if not active.size:
+            break
+        Va, sa, Ea, sEa, Fa, Ta, ra, f1, f2, N1, n1, d2, sqrt_T = (
+            x[keep] for x in (Va, sa, Ea, sEa, Fa, Ta, ra, f1, f2, N1, n1, d2, sqrt_T))
+        # Jacobian of (f1, f2) with respect to (V, sigma_A)
+        j11, j12 = N1, Va * n1 * sqrt_T
+        j21, j22 = sa * N1 + n1 / sqrt_T, Va * (N1 - n1 * d2)
+        det = j11 * j22 - j12 * j21
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dV = (j22 * f1 - j12 * f2) / det
+            ds = (j11 * f2 - j21 * f1) / det
+        # Backtrack until the scaled residual norm decreases; deeply distressed
+        # firms (E a tiny fraction of F) otherwise overshoot from the start point
+        merit = (f1 / Ea)**2 + (f2 / (sEa * Ea))**2
+        step = np.ones_like(Va)
+        pending = np.arange(Va.size)
+        for _ in range(40):
+            V_try = Va[pending] - step[pending] * dV[pending]
+            s_try = sa[pending] - step[pending] * ds[pending]
+            ok = (V_try > 0) & (s_try > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                g1, g2 = _merton_residuals(V_try, s_try, *(x[pending] for x in (Ea, sEa, Fa)),
+                                           F_disc[active[pending]], Ta[pending], ra[pending])[:2]
+                ok &= (g1 / Ea[pending])**2 + (g2 / (sEa[pending] * Ea[pending]))**2 < merit[pending]
+            pending = pending[~ok]
+            if not pending.size:
+                break
+            step[pending] *= 0.5
+        # Firms without any acceptable step have stalled: keep their iterate and drop them
+        accepted = np.ones(Va.size, dtype=bool)
+        accepted[pending] = False
+        V[active] = np.where(accepted, Va - step * dV, Va)
+        sigma[active] = np.where(accepted, sa - step * ds, sa)
+        active = active[accepted]
+
+    mu = r if mu is None else np.broadcast_to(np.asarray(mu, dtype=float), shape).ravel()
+    dd = _distance_to_default(V, F, T, mu, sigma)
+    return MertonCalibration(V.reshape(shape), sigma.reshape(shape), dd.reshape(shape),
+                             ndtr(-dd).reshape(shape), converged.reshape(shape), n_iter)
+
+
+def _invert_equity(E, F, T, r, sigma, V=None, tol=1e-10, max_iter=100):
+    """
+    Asset values that reproduce equity values `E` for given asset volatilities.
+
+    Newton's method on ``V N(d1) - F exp(-rT) N(d2) = E``, started from `V`
+    (``E + PV(F)`` by default). Because ``max(V - PV(F), 0) <= E <= V``,
+    the root lies in ``[E, E + PV(F)]``. Equity is convex and increasing
+    in V, so from above the root the iterates decrease monotonically to it,
+    and a step from below lands above it; clamping every iterate to the
+    bracket therefore keeps Newton safe from any start, and a warm start
+    from a nearby solution converges in a few steps.
+    """
+    F_disc = F * np.exp(-r * T)
+    hi = E + F_disc
+    V = hi.copy() if V is None else np.clip(V, E, hi)
+    # d1 = (log V + shift) / vol_sqrt_T on compacted copies of the unconverged entries
+    vol_sqrt_T = sigma * np.sqrt(T)
+    shift = (r + 0.5 * sigma**2) * T - np.log(F)
+    index = np.arange(E.size)
+    Va, Ea, Fda, hia = V, E, F_disc, hi
+    for _ in range(max_iter):
+        d1 = (np.log(Va) + shift) / vol_sqrt_T
+        N1 = ndtr(d1)
+        f = Va * N1 - Fda * ndtr(d1 - vol_sqrt_T) - Ea
+        keep = np.abs(f) > tol * Ea
+        V[index[~keep]] = Va[~keep]
+        if not keep.any():
+            return V
+        with np.errstate(divide='ignore', invalid='ignore'):
+            V_new = np.minimum(Va - f / N1, hia)
+        index, Va = index[keep], V_new[keep]
+        Ea, Fda, hia, shift, vol_sqrt_T = (x[keep] for x in (Ea, Fda, hia, shift, vol_sqrt_T))
+    V[index] = Va
+    return V
+
+
+def kmv_iterative(equity, F, T, r, dt=1 / 252, tol=1e-6, max_iter=100):
+    """
+    Iterative KMV estimation of asset values and volatility from equity time series.
+
+    Starting from ``sigma_A = sigma_E``, each iteration inverts the Merton
+    equity equation on every (date, firm) pair to get an asset value series
+    (warm-started from the previous iteration), then re-estimates each
+    firm's asset volatility and drift from the log asset returns. Firms
+    iterate together and stop individually once their volatility changes
+    by less than `tol` (relative).
+
+    Parameters
+    ----------
+    equity : array-like
+        Equity market values, shape (n_dates, n_firms).
+    F : array-like
+        Default point, shape (n_firms,) or (n_dates, n_firms).
+    T : float
+        Horizon in years.
+    r : float or array-like
+        Risk-free rate, broadcastable to `equity`.
+    dt : float, optional
+        Time between observations in years.
+    tol : float, optional
+        Relative tolerance on the asset volatility.
+    max_iter : int, optional
+        Maximum number of iterations.
+
+    Returns
+    -------
+    MertonCalibration
+        Asset values of shape (n_dates, n_firms). `asset_vol`,
+        `distance_to_default` and `default_probability` are per firm and
+        measured at the last date, using the estimated asset drift.
+    """
+    equity = np.asarray(equity, dtype=float)
+    n_dates, n_firms = equity.shape
+    F, T, r = (np.broadcast_to(np.asarray(x, dtype=float), equity.shape) for x in (F, T, r))
+    log_returns = np.diff(np.log(equity), axis=0)
+    sigma = log_returns.std(axis=0, ddof=1) / np.sqrt(dt)
+    V = None
+    converged = np.zeros(n_firms, dtype=bool)
+    active = np.arange(n_firms)
+    n_iter = 0
+    while active.size and n_iter < max_iter:
+        n_iter += 1
+        cols = (slice(None), active)
+        V_active = _invert_equity(
+            equity[cols].ravel(), F[cols].ravel(), T[cols].ravel(), r[cols].ravel(),
+            np.broadcast_to(sigma[active], (n_dates, active.size)).ravel(),
+            None if V is None else V[cols].ravel(),
+        ).reshape(n_dates, active.size)
+        if V is None:
+            V = np.empty_like(equity)
+        V[cols] = V_active
+        new_sigma = np.diff(np.log(V_active), axis=0).std(axis=0, ddof=1) / np.sqrt(dt)
+        done = np.abs(new_sigma - sigma[active]) < tol * sigma[active]
+        sigma[active] = new_sigma
+        converged[active[done]] = True
+        active = active[~done]
+
+    asset_returns = np.diff(np.log(V), axis=0)
+    mu = asset_returns.mean(axis=0) / dt + 0.5 * sigma**2
+    dd = _distance_to_default(V[-1], F[-1], T[-1], mu, sigma)
+    return MertonCalibration(V, sigma, dd, ndtr(-dd), converged, n_iter)
+
+
+# Number of sections the sample is split into for tail-risk standard errors
+_N_SECTIONS = 20
+
+
+def vasicek_loss_quantile(pd, rho, alpha, lgd=1.0):
+    """
+    Loss quantile of an infinitely granular one-factor Gaussian portfolio.
+
+    In the Vasicek large homogeneous portfolio limit the loss fraction is
+    ``lgd * N((N^-1(pd) + sqrt(rho) N^-1(alpha)) / sqrt(1 - rho))`` at
+    level `alpha`, the formula behind the Basel IRB capital charge.
+    """
+    return lgd * ndtr((ndtri(pd) + np.sqrt(rho) * ndtri(alpha)) / np.sqrt(1 - rho))
+
+
+def sector_loadings(sector, global_loading, sector_loading, n_sectors=None):
+    """
+    Sparse factor loadings on one global factor and one factor per sector.
+
+    Obligor i loads `global_loading` on factor 0 and `sector_loading` on
+    factor ``1 + sector[i]``, so the matrix has two nonzeros per row
+    whatever the number of sectors.
+
+    Parameters
+    ----------
+    sector : array-like of int
+        Sector index of each obligor, in ``0 .. n_sectors - 1``.
+    global_loading, sector_loading : float or array-like
+        Loadings, scalars or one per obligor.
+    n_sectors : int, optional
+        Number of sectors; ``max(sector) + 1`` by default.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Shape (n_obligors, 1 + n_sectors).
+    """
+    sector = np.asarray(sector, dtype=np.int64)
+    n = sector.size
+    n_sectors = int(sector.max()) + 1 if n_sectors is None else n_sectors
+    rows = np.repeat(np.arange(n), 2)
+    cols = np.column_stack([np.zeros(n, dtype=np.int64), 1 + sector]).ravel()
+    values = np.column_stack([np.broadcast_to(global_loading, n), np.broadcast_to(sector_loading, n)]).ravel()
+    return sparse.csr_matrix((values, (rows, cols)), shape=(n, 1 + n_sectors))
+
+
+@njit(parallel=True)
+def _copula_loss_kernel(factors, scale, eps, indptr, indices, loadings, idio, threshold, severity, out):
+    """
+    Portfolio loss of every scenario from its systematic factors and idiosyncratic normals.
+
+    Obligor i defaults when ``sum_k B_ik Z_k + idio_i eps_i < threshold_i * scale``,
+    with B in CSR form, and then loses ``severity_i``.
+    """
+    for j in prange(eps.shape[0]):
+        total = 0.0
+        barrier = scale[j]
+        for i in range(eps.shape[1]):
+            x = idio[i] * eps[j, i]
+            for k in range(indptr[i], indptr[i + 1]):
+                x += loadings[k] * factors[j, indices[k]]
+            if x < threshold[i] * barrier:
+                total += severity[i]
+        out[j] = total
+
+
+class PortfolioTailRisk(NamedTuple):
+    """
+    Tail risk of a credit portfolio's loss distribution at level `alpha`.
+
+    `var_std_error` and `es_std_error` come from splitting the sample into
+    equal sections and re-estimating on each. `losses` and `weights` are
+    the simulated losses and their likelihood ratios (all one without
+    importance sampling), e.g. for plotting weighted exceedance curves.
+    """
+    alpha: float
+    var: float
+    es: float
+    var_std_error: float
+    es_std_error: float
+    expected_loss: float
+    n_sims: int
+    shift: np.ndarray
+    losses: np.ndarray
+    weights: np.ndarray
+
+
+def _weighted_tail_risk(losses, weights, alpha):
+    """VaR and expected shortfall at `alpha` of a weighted sample."""
+    order = np.argsort(losses)
+    sorted_losses, sorted_weights = losses[order], weights[order]
+    # Estimated P(L > sorted_losses[j]) for every j
+    exceedance = (np.cumsum(sorted_weights[::-1])[::-1] - sorted_weights) / losses.size
+    j = min(np.searchsorted(-exceedance, -(1 - alpha)), losses.size - 1)
+    var = sorted_losses[j]
+    es = var + np.mean(weights * np.maximum(losses - var, 0.0)) / (1 - alpha)
+    return var, es
+
+
+class CreditPortfolio:
+    """
+    Default-loss model of a loan portfolio with a factor copula.
+
+    Obligor i defaults when its latent credit variable
+
+        X_i = sum_k B_ik Z_k + sqrt(1 - sum_k B_ik^2) eps_i
+
+    falls below ``N^-1(pd_i)``, with independent standard normal systematic
+    factors Z and idiosyncratic eps (Gaussian copula). With
+    ``copula='t'`` the latent variables are divided by ``sqrt(W / dof)``
+    for a common ``W ~ chi2(dof)``, which makes joint defaults more likely
+    in bad states, and the thresholds are Student-t quantiles. A default
+    costs ``exposure * lgd``.
+
+    The loadings B are stored as a sparse CSR matrix, so sector models
+    with one global and many sector factors cost two multiply-adds per
+    obligor and scenario. Scenarios are simulated in chunks by a numba
+    kernel that never forms the (scenario, obligor) default matrix.
+
+    Importance sampling shifts the mean of the systematic vector (the
+    exponential twist of a Gaussian), with the t mixing variable written
+    as ``W = F_chi2^-1(N(U))`` for a standard normal U so that it is
+    shifted too. The shift is the point at distance ``N^-1(alpha)`` from
+    the origin with the largest conditional expected loss, which in the
+    one-factor model is exactly the stress scenario behind the Vasicek
+    quantile. For large portfolios most of the tail variance is
+    systematic (Glasserman and Li, 2005), so this shift alone brings the
+    99.9% VaR and expected shortfall within reach of a few hundred
+    thousand scenarios.
+
+    Parameters
+    ----------
+    exposure, lgd, pd : array-like
+        Exposure at default, loss given default and default probability
+        over the horizon, one entry per obligor (scalars broadcast).
+    loadings : array-like or sparse matrix
+        Factor loadings B of shape (n_obligors, n_factors), or shape
+        (n_obligors,) for a single factor. Every row needs
+        ``sum_k B_ik^2 < 1``.
+    copula : str, optional
+        'gaussian' or 't'.
+    dof : float, optional
+        Degrees of freedom of the t copula.
+
+    Examples
+    --------
+    >>> portfolio = CreditPortfolio.one_factor(np.ones(1000), 0.45, 0.01, rho=0.15)
+    >>> risk = portfolio.tail_risk(alpha=0.999, n_sims=100000)
+    """
+
+    def __init__(self, exposure, lgd, pd, loadings, copula='gaussian', dof=None):
+        if copula not in ('gaussian', 't'):
+            raise ValueError("copula must be 'gaussian' or 't'.")
+        if copula == 't' and (dof is None or dof <= 0):
+            raise ValueError("The t copula needs positive degrees of freedom.")
+        loadings = sparse.csr_matrix(np.asarray(loadings, dtype=float).reshape(-1, 1)
+                                     if not sparse.issparse(loadings) and np.ndim(loadings) == 1
+                                     else loadings, dtype=float)
+        n = loadings.shape[0]
+        self.exposure, self.lgd, self.pd = (np.broadcast_to(np.asarray(x, dtype=float), n).copy()
+                                            for x in (exposure, lgd, pd))
+        if np.any((self.pd <= 0) | (self.pd >= 1)):
+            raise ValueError("Default probabilities must lie strictly between 0 and 1.")
+        systematic_variance = np.asarray(loadings.multiply(loadings).sum(axis=1)).ravel()
+        if np.any(systematic_variance >= 1):
+            raise ValueError("Each obligor's squared loadings must sum to less than one.")
+        loadings.sort_indices()
+        self.loadings = loadings
+        self.copula, self.dof = copula, dof
+        self._idio = np.sqrt(1 - systematic_variance)
+        self._threshold = ndtri(self.pd) if copula == 'gaussian' else stdtrit(dof, self.pd)
+        self._severity = self.exposure * self.lgd
+
+    @classmethod
+    def one_factor(cls, exposure, lgd, pd, rho, copula='gaussian', dof=None):
+        """Vasicek one-factor portfolio with asset correlation `rho` between all obligors."""
+        n = np.broadcast_shapes(np.shape(exposure), np.shape(lgd), np.shape(pd), (1,))[0]
+        return cls(exposure, lgd, pd, np.full(n, np.sqrt(rho)), copula, dof)
+
+    @property
+    def n_obligors(self):
+        return self.loadings.shape[0]
+
+    @property
+    def n_factors(self):
+        """Dimension of the Gaussian systematic vector (plus one for the t mixing variable)."""
+        return self.loadings.shape[1] + (self.copula == 't')
+
+    @property
+    def expected_loss(self):
+        return float(self._severity @ self.pd)
+
+    def _barrier_scale(self, systematic):
+        """Multiplier ``sqrt(W / dof)`` of the default thresholds in each scenario."""
+        if self.copula == 'gaussian':
+            return np.ones(systematic.shape[0])
+        return np.sqrt(chdtri(self.dof, ndtr(-systematic[:, -1])) / self.dof)
+
+    def conditional_expected_loss(self, systematic):
+        """
+        Expected loss given the systematic vector.
+
+        Parameters
+        ----------
+        systematic : array-like
+            Shape (n_factors,) or (n_scenarios, n_factors); for the t
+            copula the last column is the normal U driving the mixing
+            variable.
+        """
+        systematic = np.atleast_2d(np.asarray(systematic, dtype=float))
+        factors = systematic[:, :self.loadings.shape[1]]
+        distance = (self._threshold[:, None] * self._barrier_scale(systematic)
+                    - self.loadings @ factors.T) / self._idio[:, None]
+        result = self._severity @ ndtr(distance)
+        return result if result.size > 1 else float(result[0])
+
+    def importance_shift(self, alpha=0.999):
+        """
+        Mean shift of the systematic vector for tail estimation at level `alpha`.
+
+        Maximizes the conditional expected loss over the sphere of radius
+        ``N^-1(alpha)``, starting from the direction in which each factor
+        is weighted by the exposure-weighted loadings.
+        """
+        radius = ndtri(alpha)
+        start = -np.asarray(self.loadings.T @ self._severity).ravel()
+        if self.copula == 't':
+            # Small values of the mixing variable raise every default probability
+            start = np.append(start, -np.linalg.norm(start))
+        start *= radius / np.linalg.norm(start)
+        result = minimize(lambda z: -self.conditional_expected_loss(z) / self.expected_loss, start,
+                          method='SLSQP', constraints={'type': 'eq', 'fun': lambda z: z @ z - radius**2})
+        return result.x if result.success else start
+
+    def stream_losses(self, n_sims, chunk_size=1000, seed=42, shift=None):
+        """
+        Simulate portfolio losses chunk by chunk.
+
+        Parameters
+        ----------
+        n_sims : int
+            Total number of scenarios.
+        chunk_size : int, optional
+            Scenarios per chunk. Each chunk holds a (chunk_size,
+            n_obligors) float32 array of idiosyncratic normals.
+        seed : int, optional
+            Root seed of the per-chunk seed sequence.
+        shift : array-like, optional
+            Mean of the systematic vector (see `importance_shift`).
+
+        Yields
+        ------
+        dict
+            'loss' of each scenario, plus its likelihood ratio 'weight'
+            when `shift` is given.
+        """
+        B = self.loadings
+        for size, rng in _seeded_chunks(n_sims, chunk_size, seed):
+            systematic = rng.standard_normal((size, self.n_factors))
+            if shift is not None:
+                systematic += shift
+            eps = rng.standard_normal((size, self.n_obligors), dtype=np.float32)
+            loss = np.empty(size)
+            _copula_loss_kernel(systematic[:, :B.shape[1]], self._barrier_scale(systematic), eps,
+                                B.indptr, B.indices, B.data, self._idio, self._threshold, self._severity, loss)
+            chunk = {'loss': loss}
+            if shift is not None:
+                chunk['weight'] = np.exp(0.5 * shift @ shift - systematic @ shift)
+            yield chunk
+
+    def tail_risk(self, alpha=0.999, n_sims=200000, chunk_size=1000, seed=42, importance_sampling=True):
+        """
+        Value-at-risk and expected shortfall of the portfolio loss.
+
+        VaR is the smallest simulated loss whose weighted exceedance
+        probability is at most ``1 - alpha``, and expected shortfall is
+        ``VaR + E[(L - VaR)^+] / (1 - alpha)``, both under the likelihood
+        ratio weights when `importance_sampling` is on.
+
+        Returns
+        -------
+        PortfolioTailRisk
+        """
+        shift = self.importance_shift(alpha) if importance_sampling else None
+        chunks = list(self.stream_losses(n_sims, chunk_size, seed, shift))
+        losses = np.concatenate([c['loss'] for c in chunks])
+        weights = np.concatenate([c['weight'] for c in chunks]) if shift is not None else np.ones(n_sims)
+        var, es = _weighted_tail_risk(losses, weights, alpha)
+        sections = np.array([_weighted_tail_risk(l, w, alpha) for l, w in
+                             zip(np.array_split(losses, _N_SECTIONS), np.array_split(weights, _N_SECTIONS))])
+        var_se, es_se = sections.std(axis=0, ddof=1) / np.sqrt(_N_SECTIONS)
+        return PortfolioTailRisk(alpha, var, es, var_se, es_se, self.expected_loss, n_sims,
+                                 np.zeros(self.n_factors) if shift is None else shift, losses, weights)
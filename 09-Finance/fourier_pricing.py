@@ -0,0 +1,314 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.optimize import least_squares
+from typing import Optional, Tuple
+
+from option_pricing import BSMPricer, implied_volatility
+
+
+class CharacteristicFunctionModel(ABC):
+    """
+    Base class for models priced through the characteristic function of
+    ``X_T = log(S_T / S_0)`` under the risk-neutral measure.
+
+    Subclasses implement `log_char_func` and keep their parameters in
+    public attributes. Evaluations of the characteristic function on a
+    frequency grid are cached per (parameters, grid, maturity, rate), so
+    pricing many strikes, or re-pricing with the same model, reuses them,
+    while changing a parameter in place never returns stale values. The
+    cache keeps the most recently used evaluations only.
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._cache_size = 32
+
+    @abstractmethod
+    def log_char_func(self, u: np.ndarray, T: float, r: float) -> np.ndarray:
+        """Return ``log E[exp(i u X_T)]`` for real or complex frequencies `u`."""
+
+    def _parameters(self) -> tuple:
+        """The public attributes, which hold the model parameters, as (name, value) pairs."""
+        return tuple((name, value) for name, value in sorted(vars(self).items()) if not name.startswith('_'))
+
+    def char_func(self, u: np.ndarray, T: float, r: float) -> np.ndarray:
+        """Return ``E[exp(i u X_T)]``, cached by the parameters, the frequency grid, `T` and `r`."""
+        u = np.asarray(u)
+        key = (self._parameters(), u.tobytes(), u.shape, float(T), float(r))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        value = np.exp(self.log_char_func(u, T, r))
+        self._cache[key] = value
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def cumulants(self, T: float, r: float, h: float = 0.05) -> Tuple[float, float, float]:
+        """
+        First, second and fourth cumulants of `X_T`, by finite differences of
+        the log characteristic function at zero.
+        """
+        f = self.log_char_func(np.array([h, -h, 2 * h, -2 * h]), T, r)
+        c1 = (f[0] - f[1]).imag / (2 * h)
+        even_h = 0.5 * (f[0] + f[1]).real
+        even_2h = 0.5 * (f[2] + f[3]).real
+        c4 = 2 * (even_2h - 4 * even_h) / h**4
+        c2 = -2 * even_h / h**2 + c4 * h**2 / 12
+        return c1, c2, c4
+
+
+class BlackScholesModel(CharacteristicFunctionModel):
+    """Geometric Brownian motion with volatility `sigma`."""
+
+    def __init__(self, sigma: float):
+        super().__init__()
+        self.sigma = sigma
+
+    def log_char_func(self, u, T, r):
+        return 1j * u * (r - 0.5 * self.sigma**2) * T - 0.5 * self.sigma**2 * u**2 * T
+
+
+class HestonModel(CharacteristicFunctionModel):
+    """
+    Heston (1993) stochastic volatility model.
+
+    The variance follows ``dv = kappa (theta - v) dt + sigma_v sqrt(v) dW``
+    with correlation `rho` to the price. The characteristic function uses
+    the "little Heston trap" form of Albrecher et al. (2007), which avoids
+    branch-cut discontinuities of the complex logarithm.
+    """
+
+    PARAM_NAMES = ("v0", "kappa", "theta", "sigma_v", "rho")
+
+    def __init__(self, v0: float, kappa: float, theta: float, sigma_v: float, rho: float):
+        super().__init__()
+        self.v0, self.kappa, self.theta, self.sigma_v, self.rho = v0, kappa, theta, sigma_v, rho
+
+    @property
+    def params(self) -> np.ndarray:
+        return np.array([self.v0, self.kappa, self.theta, self.sigma_v, self.rho])
+
+    def log_char_func(self, u, T, r):
+        kappa, theta, sigma_v, rho = self.kappa, self.theta, self.sigma_v, self.rho
+        beta = kappa - 1j * rho * sigma_v * u
+        d = np.sqrt(beta**2 + sigma_v**2 * (1j * u + u**2))
+        g = (beta - d) / (beta + d)
+        exp_dT = np.exp(-d * T)
+        C = kappa * theta / sigma_v**2 * ((beta - d) * T - 2 * np.log((1 - g * exp_dT) / (1 - g)))
+        D = (beta - d) / sigma_v**2 * (1 - exp_dT) / (1 - g * exp_dT)
+        return 1j * u * r * T + C + D * self.v0
+
+
+class MertonJumpModel(CharacteristicFunctionModel):
+    """
+    Merton (1976) jump-diffusion: GBM with volatility `sigma` plus Poisson
+    jumps at rate `lam` with normally distributed log sizes N(mu_j, sigma_j^2).
+    """
+
+    def __init__(self, sigma: float, lam: float, mu_j: float, sigma_j: float):
+        super().__init__()
+        self.sigma, self.lam, self.mu_j, self.sigma_j = sigma, lam, mu_j, sigma_j
+
+    def log_char_func(self, u, T, r):
+        kappa = np.exp(self.mu_j + 0.5 * self.sigma_j**2) - 1
+        drift = r - 0.5 * self.sigma**2 - self.lam * kappa
+        jumps = self.lam * (np.exp(1j * u * self.mu_j - 0.5 * self.sigma_j**2 * u**2) - 1)
+        return T * (1j * u * drift - 0.5 * self.sigma**2 * u**2 + jumps)
+
+
+class VarianceGammaModel(CharacteristicFunctionModel):
+    """
+    Variance Gamma model of Madan, Carr and Chang (1998): Brownian motion
+    with drift `theta` and volatility `sigma`, time-changed by a gamma
+    process with variance rate `nu`.
+    """
+
+    def __init__(self, sigma: float, nu: float, theta: float):
+        super().__init__()
+        self.sigma, self.nu, self.theta = sigma, nu, theta
+
+    def log_char_func(self, u, T, r):
+        sigma, nu, theta = self.sigma, self.nu, self.theta
+        omega = np.log(1 - theta * nu - 0.5 * sigma**2 * nu) / nu
+        return 1j * u * (r + omega) * T - T / nu * np.log(1 - 1j * theta * nu * u + 0.5 * sigma**2 * nu * u**2)
+
+
+def _by_maturity(K, T, option_type):
+    """Broadcast strikes, maturities and option types and group indices sharing one maturity."""
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    K, T, phi = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float), phi)
+    shape = K.shape
+    K, T, phi = K.ravel(), T.ravel(), phi.ravel()
+    maturities, inverse = np.unique(T, return_inverse=True)
+    groups = [(tau, np.flatnonzero(inverse == i)) for i, tau in enumerate(maturities)]
+    return K, phi, groups, shape
+
+
+def cos_price(model: CharacteristicFunctionModel, S: float, K, T, r: float, option_type='call',
+              n_terms: int = 256, L: float = 10.0):
+    """
+    Price European options with the COS method of Fang and Oosterlee (2008).
+
+    The characteristic function is evaluated once per maturity on
+    `n_terms` frequencies, and all strikes of that maturity are priced by
+    one matrix product. Puts are priced directly (their payoff is bounded)
+    and calls follow from put-call parity.
+
+    Parameters
+    ----------
+    model : CharacteristicFunctionModel
+        The pricing model.
+    S : float
+        Spot price.
+    K, T : float or np.ndarray
+        Strikes and maturities; they broadcast against each other.
+    r : float
+        Continuously-compounded risk-free rate.
+    option_type : str or array-like of str, optional
+        'call' or 'put'.
+    n_terms : int, optional
+        Number of cosine terms.
+    L : float, optional
+        Width of the truncation range in standard deviations.
+
+    Returns
+    -------
+    np.ndarray
+        Option prices, shaped like the broadcast `K` and `T`.
+    """
+    K, phi, groups, shape = _by_maturity(K, T, option_type)
+    prices = np.empty(K.size)
+    k = np.arange(n_terms)
+    for tau, idx in groups:
+        c1, c2, c4 = model.cumulants(tau, r)
+        width = L * np.sqrt(c2 + np.sqrt(abs(c4)))
+        a, b = c1 - width, c1 + width
+        u = k * np.pi / (b - a)
+        cf = model.char_func(u, tau, r).copy()
+        cf[0] *= 0.5
+
+        # Put payoff coefficients on [a, 0] in y = log(S_T / K)
+        chi = (np.cos(-u * a) - np.exp(a) + u * np.sin(-u * a)) / (1 + u**2)
+        psi = np.empty(n_terms)
+        psi[0] = -a
+        psi[1:] = np.sin(-u[1:] * a) / u[1:]
+        U = 2 / (b - a) * (psi - chi)
+
+        x = np.log(S / K[idx])
+        phase = np.exp(1j * np.outer(x - a, u))
+        puts = K[idx] * np.exp(-r * tau) * (phase @ (cf * U)).real
+        puts = np.maximum(puts, 0.0)
+        calls = puts + S - K[idx] * np.exp(-r * tau)
+        prices[idx] = np.where(phi[idx] > 0, calls, puts)
+    return prices.reshape(shape)[()]
+
+
+def carr_madan_price(model: CharacteristicFunctionModel, S: float, K, T, r: float, option_type='call',
+                     n_fft: int = 4096, eta: float = 0.25, alpha: float = 1.5):
+    """
+    Price European options with the Carr and Madan (1999) FFT method.
+
+    One FFT per maturity prices calls on a grid of `n_fft` log strikes
+    with spacing ``2 pi / (n_fft eta)``. The requested strikes are read off
+    that grid by cubic-spline interpolation in log strike, and puts follow
+    from put-call parity. Simpson weights are used on the frequency grid.
+
+    Parameters
+    ----------
+    model : CharacteristicFunctionModel
+        The pricing model.
+    S : float
+        Spot price.
+    K, T : float or np.ndarray
+        Strikes and maturities; they broadcast against each other.
+    r : float
+        Continuously-compounded risk-free rate.
+    option_type : str or array-like of str, optional
+        'call' or 'put'.
+    n_fft : int, optional
+        FFT size (a power of two).
+    eta : float, optional
+        Frequency spacing.
+    alpha : float, optional
+        Damping exponent of the call price in log strike.
+
+    Returns
+    -------
+    np.ndarray
+        Option prices, shaped like the broadcast `K` and `T`.
+    """
+    K, phi, groups, shape = _by_maturity(K, T, option_type)
+    prices = np.empty(K.size)
+    j = np.arange(n_fft)
+    v = eta * j
+    lam = 2 * np.pi / (n_fft * eta)
+    beta = np.log(S) - 0.5 * n_fft * lam  # lowest log strike on the grid
+    log_strikes = beta + lam * j
+    simpson = eta / 3 * (3 + (-1.0) ** (j + 1) - (j == 0))
+    for tau, idx in groups:
+        # Characteristic function of log S_T at the damped, shifted frequencies
+        cf = model.char_func(v - (alpha + 1) * 1j, tau, r) * np.exp(1j * (v - (alpha + 1) * 1j) * np.log(S))
+        psi = np.exp(-r * tau) * cf / (alpha**2 + alpha - v**2 + 1j * (2 * alpha + 1) * v)
+        calls_grid = np.exp(-alpha * log_strikes) / np.pi * np.fft.fft(np.exp(-1j * beta * v) * psi * simpson).real
+        calls = CubicSpline(log_strikes, calls_grid)(np.log(K[idx]))
+        calls = np.maximum(calls, np.maximum(S - K[idx] * np.exp(-r * tau), 0.0))
+        puts = calls - S + K[idx] * np.exp(-r * tau)
+        prices[idx] = np.where(phi[idx] > 0, calls, puts)
+    return prices.reshape(shape)[()]
+
+
+def calibrate_heston(S: float, K, T, r: float, market_prices, option_type='call',
+                     x0: Optional[np.ndarray] = None, n_terms: int = 128) -> Tuple[HestonModel, object]:
+    """
+    Calibrate the Heston model to a surface of option quotes.
+
+    Residuals are price errors divided by the Black-Scholes vega at each
+    quote's implied volatility, i.e. approximately implied-volatility
+    errors. Each evaluation prices the whole surface with `cos_price`,
+    evaluating the characteristic function once per maturity, and the
+    bounded problem is solved with ``scipy.optimize.least_squares``.
+
+    Parameters
+    ----------
+    S : float
+        Spot price.
+    K, T : np.ndarray
+        Strike and maturity of each quote.
+    r : float
+        Continuously-compounded risk-free rate.
+    market_prices : np.ndarray
+        Quoted option prices.
+    option_type : str or array-like of str, optional
+        'call' or 'put' per quote.
+    x0 : np.ndarray, optional
+        Starting values for (v0, kappa, theta, sigma_v, rho).
+    n_terms : int, optional
+        Number of COS terms.
+
+    Returns
+    -------
+    model : HestonModel
+        The calibrated model.
+    result : scipy.optimize.OptimizeResult
+        The optimizer output; ``result.fun`` holds the volatility errors.
+    """
+    market_prices = np.asarray(market_prices, dtype=float)
+    iv, ok = implied_volatility(market_prices, S, K, T, r, option_type)
+    vega = BSMPricer(S, K, T, r, np.where(ok, iv, 0.2), option_type).price_and_greeks()['vega'] * 100
+    vega = np.maximum(vega, 1e-4 * S)
+    if x0 is None:
+        atm_var = np.nanmedian(iv) ** 2 if np.any(ok) else 0.04
+        x0 = np.array([atm_var, 2.0, atm_var, 0.5, -0.5])
+    lower = np.array([1e-4, 1e-3, 1e-4, 1e-3, -0.999])
+    upper = np.array([2.0, 20.0, 2.0, 5.0, 0.999])
+
+    def residuals(params):
+        model = HestonModel(*params)
+        return (cos_price(model, S, K, T, r, option_type, n_terms) - market_prices) / vega
+
+    result = least_squares(residuals, np.clip(x0, lower, upper), bounds=(lower, upper), x_scale='jac')
+    return HestonModel(*result.x), result
@@ -0,0 +1,1554 @@
+import math
+import numpy as np
+from functools import lru_cache
+from numba import njit, prange
+from scipy.linalg import lapack, solve_banded
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
+from typing import NamedTuple
+
+# Field layout of the record returned by `BSMPricer.price_and_greeks`.
+GREEKS_DTYPE = np.dtype([
+    ("price", float),
+    ("delta", float),
+    ("gamma", float),
+    ("vega", float),
+    ("theta", float),
+    ("rho", float),
+])
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+class OptionPricer:
+    """
+    Base class for option pricing models.
+
+    Parameters
+    ----------
+    S : float or np.ndarray
+        Spot price of the underlying.
+    K : float or np.ndarray
+        Strike price.
+    T : float or np.ndarray
+        Time to maturity in years.
+    r : float or np.ndarray
+        Continuously-compounded risk-free rate.
+    sigma : float or np.ndarray
+        Volatility of the underlying.
+    option_type : str or array-like of str, optional
+        'call' or 'put'. Pricers that broadcast over contracts also accept an
+        array of option types.
+    """
+
+    def __init__(self, S, K, T, r, sigma, option_type='call'):
+        self.S, self.K, self.T, self.r, self.sigma = S, K, T, r, sigma
+        if not np.all(np.isin(option_type, ['call', 'put'])):
+            raise ValueError("Option type must be 'call' or 'put'.")
+        self.option_type = option_type
+
+
+_LATTICE_METHODS = {'crr': 0, 'leisen_reimer': 1, 'trinomial': 2}
+
+
+@njit
+def _peizer_pratt(z, n):
+    """Peizer-Pratt method-2 inversion used by the Leisen-Reimer tree."""
+    a = z / (n + 1.0 / 3.0 + 0.1 / (n + 1.0))
+    return 0.5 + math.copysign(0.5, z) * math.sqrt(1.0 - math.exp(-a * a * (n + 1.0 / 6.0)))
+
+
+@njit
+def _bs_value(S, K, tau, r, sigma, phi):
+    """Black-Scholes value used to smooth the last lattice step."""
+    v = sigma * math.sqrt(tau)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * tau) / v
+    d2 = d1 - v
+    return phi * (S * 0.5 * math.erfc(-phi * d1 / math.sqrt(2.0))
+                  - K * math.exp(-r * tau) * 0.5 * math.erfc(-phi * d2 / math.sqrt(2.0)))
+
+
+@njit
+def _lattice_price(S, K, T, r, sigma, phi, n, method, american, smooth, values):
+    """
+    Price one option on a recombining lattice, rolling back in place in `values`.
+
+    `values` must hold at least 2 * n + 1 entries; only that one buffer is
+    used, and node spot prices are generated by repeated multiplication
+    rather than fresh power arrays. With `smooth`, the last step is replaced
+    by Black-Scholes values (Broadie and Detemple, 1996).
+    """
+    if T <= 0.0:
+        return max(phi * (S - K), 0.0)
+    dt = T / n
+    disc = math.exp(-r * dt)
+    trinomial = method == 2
+
+    if trinomial:
+        # Boyle trinomial tree with log-spacing sigma * sqrt(2 dt)
+        u = math.exp(sigma * math.sqrt(2.0 * dt))
+        a = math.exp(0.5 * r * dt)
+        b = math.exp(sigma * math.sqrt(0.5 * dt))
+        pu = ((a - 1.0 / b) / (b - 1.0 / b)) ** 2
+        pd = ((b - a) / (b - 1.0 / b)) ** 2
+        pm = 1.0 - pu - pd
+        ratio = 1.0 / u
+    else:
+        if method == 1:
+            # Leisen-Reimer tree (n odd), centred on the strike
+            d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * math.sqrt(T))
+            d2 = d1 - sigma * math.sqrt(T)
+            pu = _peizer_pratt(d2, n)
+            growth = math.exp(r * dt)
+            u = growth * _peizer_pratt(d1, n) / pu
+            d = (growth - pu * u) / (1.0 - pu)
+        else:
+            # Cox-Ross-Rubinstein tree
+            u = math.exp(sigma * math.sqrt(dt))
+            d = 1.0 / u
+            pu = (math.exp(r * dt) - d) / (u - d)
+        pd = 1.0 - pu
+        pm = 0.0
+        ratio = d / u
+
+    # Values at the last level: payoffs, or one-step Black-Scholes values
+    last = n - 1 if smooth else n
+    spot = S * u ** last
+    for i in range(2 * last + 1 if trinomial else last + 1):
+        exercise = max(phi * (spot - K), 0.0)
+        if smooth:
+            values[i] = _bs_value(spot, K, dt, r, sigma, phi)
+            if american:
+                values[i] = max(values[i], exercise)
+        else:
+            values[i] = exercise
+        spot *= ratio
+
+    for j in range(last - 1, -1, -1):
+        spot = S * u ** j
+        for i in range(2 * j + 1 if trinomial else j + 1):
+            if trinomial:
+                cont = disc * (pu * values[i] + pm * values[i + 1] + pd * values[i + 2])
+            else:
+                cont = disc * (pu * values[i] + pd * values[i + 1])
+            if american:
+                cont = max(cont, phi * (spot - K))
+                spot *= ratio
+            values[i] = cont
+    return values[0]
+
+
+@njit(parallel=True)
+def _lattice_batch(S, K, T, r, sigma, phi, n, method, american, smooth):
+    """Price a batch of options in parallel, one O(n) buffer per contract."""
+    out = np.empty(S.size)
+    for k in prange(S.size):
+        values = np.empty(2 * n + 1)
+        out[k] = _lattice_price(S[k], K[k], T[k], r[k], sigma[k], phi[k], n, method, american, smooth, values)
+    return out
+
+
+class BinomialPricer(OptionPricer):
+    """
+    Prices European and American options on recombining lattices.
+
+    Three lattices are available: the Cox-Ross-Rubinstein ('crr') tree,
+    the Leisen-Reimer ('leisen_reimer') tree, which is centred on the strike
+    and converges smoothly (roughly 1/n^2 for Europeans, 1/n for
+    Americans), and a Boyle ('trinomial') tree. Backward induction runs in a
+    numba kernel that rolls back in place in a single O(n) buffer. Like
+    `BSMPricer`, all inputs broadcast, so many strikes and maturities are
+    priced in one parallel call.
+
+    CRR and trinomial prices oscillate with the step count. Smoothing the
+    last step with Black-Scholes values removes most of the oscillation and
+    makes Richardson extrapolation reliable for them as well.
+    """
+
+    def _lattice(self, n_steps, method, american, smooth):
+        if method not in _LATTICE_METHODS:
+            raise ValueError(f"method must be one of {tuple(_LATTICE_METHODS)}, got '{method}'.")
+        if method == 'leisen_reimer' and n_steps % 2 == 0:
+            n_steps += 1
+        if smooth and n_steps < 2:
+            raise ValueError("Smoothing needs at least 2 steps.")
+        phi = np.where(np.asarray(self.option_type) == 'call', 1.0, -1.0)
+        inputs = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (self.S, self.K, self.T, self.r, self.sigma)), phi)
+        flat = [np.ascontiguousarray(a).ravel() for a in inputs]
+        prices = _lattice_batch(*flat, int(n_steps), _LATTICE_METHODS[method], american, smooth)
+        return prices.reshape(inputs[0].shape), n_steps
+
+    def price(self, n_steps, exercise_type='european', method='crr', smoothing=False, richardson=False):
+        """
+        Price the option(s) by backward induction on a lattice.
+
+        Parameters
+        ----------
+        n_steps : int
+            Number of time steps (rounded up to an odd number for
+            'leisen_reimer').
+        exercise_type : str, optional
+            'european' or 'american'.
+        method : str, optional
+            'crr', 'leisen_reimer' or 'trinomial'.
+        smoothing : bool, optional
+            Replace the last step by Black-Scholes values.
+        richardson : bool, optional
+            Combine the prices on `n_steps` and about `n_steps / 2` steps by
+            Richardson extrapolation. The assumed error order is 2 for
+            European Leisen-Reimer prices and 1 otherwise.
+
+        Returns
+        -------
+        float or np.ndarray
+            Price(s), shaped like the broadcast inputs.
+        """
+        if exercise_type not in ('european', 'american'):
+            raise ValueError("exercise_type must be 'european' or 'american'.")
+        american = exercise_type == 'american'
+        value, n_fine = self._lattice(n_steps, method, american, smoothing)
+        if richardson:
+            order = 2 if method == 'leisen_reimer' and not american else 1
+            coarse, n_coarse = self._lattice(max(n_steps // 2, 2), method, american, smoothing)
+            w_fine, w_coarse = float(n_fine) ** order, float(n_coarse) ** order
+            value = (w_fine * value - w_coarse * coarse) / (w_fine - w_coarse)
+        return value[()]
+
+
+class BSMPricer(OptionPricer):
+    """
+    Prices European options using the Black-Scholes-Merton formula.
+
+    All inputs, including `option_type`, broadcast against each other under
+    the usual NumPy rules, so a single pricer can hold a whole option chain or
+    book. `price_and_greeks` evaluates `d1`, `d2`, the normal density and the
+    normal CDFs once and reuses them for the price and every Greek. Contracts
+    with ``T <= 1e-9`` are treated as expired: they are worth their intrinsic
+    value and all of their Greeks are zero.
+
+    Vega and rho are reported per 1% move in volatility and rates; theta is
+    reported per calendar day.
+
+    Examples
+    --------
+    >>> strikes = np.linspace(80, 120, 5)
+    >>> book = BSMPricer(100.0, strikes, 1.0, 0.05, 0.2, 'call').price_and_greeks()
+    >>> book['delta'].shape
+    (5,)
+    """
+
+    def _broadcast(self):
+        """Return the inputs as float arrays of one common shape, plus a +1/-1 call/put sign."""
+        phi = np.where(np.asarray(self.option_type) == 'call', 1.0, -1.0)
+        return np.broadcast_arrays(
+            np.asarray(self.S, dtype=float), np.asarray(self.K, dtype=float),
+            np.asarray(self.T, dtype=float), np.asarray(self.r, dtype=float),
+            np.asarray(self.sigma, dtype=float), phi,
+        )
+
+    def _get_d1_d2(self):
+        S, K, T, r, sigma, _ = self._broadcast()
+        expired = T <= 1e-9
+        sqrt_T = np.sqrt(np.where(expired, 1.0, T))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_T)
+        d1 = np.where(expired, np.inf, d1)
+        d2 = d1 - sigma * sqrt_T
+        return d1, d2
+
+    def price(self):
+        """Return the option price(s), shaped like the broadcast inputs."""
+        S, K, T, r, _, phi = self._broadcast()
+        d1, d2 = self._get_d1_d2()
+        value = phi * (S * ndtr(phi * d1) - K * np.exp(-r * T) * ndtr(phi * d2))
+        value = np.where(T <= 1e-9, np.maximum(phi * (S - K), 0.0), value)
+        return value[()]
+
+    def price_and_greeks(self):
+        """
+        Compute prices and Greeks in a single vectorized pass.
+
+        Returns
+        -------
+        np.ndarray
+            A structured array with dtype `GREEKS_DTYPE` (fields 'price',
+            'delta', 'gamma', 'vega', 'theta' and 'rho'), shaped like the
+            broadcast inputs.
+        """
+        S, K, T, r, sigma, phi = self._broadcast()
+        expired = T <= 1e-9
+        T_live = np.where(expired, 1.0, T)
+        sqrt_T = np.sqrt(T_live)
+
+        # Shared intermediates
+        vol_sqrt_T = sigma * sqrt_T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T_live) / vol_sqrt_T
+        d2 = d1 - vol_sqrt_T
+        pdf_d1 = _INV_SQRT_2PI * np.exp(-0.5 * d1**2)
+        cdf_d1 = ndtr(phi * d1)
+        cdf_d2 = ndtr(phi * d2)
+        K_disc = K * np.exp(-r * T_live)
+        S_pdf = S * pdf_d1
+
+        out = np.empty(S.shape, dtype=GREEKS_DTYPE)
+        out['price'] = phi * (S * cdf_d1 - K_disc * cdf_d2)
+        out['delta'] = phi * cdf_d1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['gamma'] = pdf_d1 / (S * vol_sqrt_T)
+        out['vega'] = S_pdf * sqrt_T / 100
+        out['theta'] = (-S_pdf * sigma / (2 * sqrt_T) - phi * r * K_disc * cdf_d2) / 365
+        out['rho'] = phi * K_disc * T_live * cdf_d2 / 100
+
+        if np.any(expired):
+            out[expired] = 0.0
+            out['price'][expired] = np.maximum(phi * (S - K), 0.0)[expired]
+        return out
+
+    def get_greeks(self):
+        """Return the Greeks as a dict of arrays (or floats for scalar inputs)."""
+        out = self.price_and_greeks()
+        return {k: out[k][()] for k in ['delta', 'gamma', 'vega', 'theta', 'rho']}
+
+
+def _bsm_price_vega(S, K_disc, sqrt_T, sigma, phi):
+    """BSM price, vega (per unit vol), d1 and d2 with the discounted strike precomputed."""
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / K_disc) + 0.5 * vol_sqrt_T**2) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    value = phi * (S * ndtr(phi * d1) - K_disc * ndtr(phi * d2))
+    vega = S * sqrt_T * _INV_SQRT_2PI * np.exp(-0.5 * d1**2)
+    return value, vega, d1, d2
+
+
+def implied_volatility(market_price, S, K, T, r, option_type='call', tol=1e-10, max_iter=50, bracket=(1e-6, 10.0)):
+    """
+    Solve for the Black-Scholes implied volatility of many contracts at once.
+
+    All inputs broadcast against each other, so a whole multi-expiry surface
+    is solved in one call. Each contract starts from the Corrado-Miller
+    (1996) rational approximation, a refinement of the Brenner-Subrahmanyam
+    at-the-money formula, and is refined with vectorized Halley steps.
+    Contracts whose Halley step leaves `bracket`, or whose vega is too small
+    to trust, fall back to a masked bisection on `bracket`.
+
+    Parameters
+    ----------
+    market_price : float or np.ndarray
+        Observed option prices.
+    S, K, T, r : float or np.ndarray
+        Spot, strike, maturity in years and continuously-compounded rate.
+    option_type : str or array-like of str, optional
+        'call' or 'put', per contract or for all contracts.
+    tol : float, optional
+        Relative tolerance on the price residual and absolute tolerance on
+        the volatility.
+    max_iter : int, optional
+        Maximum number of Halley iterations.
+    bracket : tuple of float, optional
+        Volatility interval searched by the bisection fallback.
+
+    Returns
+    -------
+    iv : np.ndarray
+        Implied volatility per contract, NaN where no solution was found
+        (including prices outside the no-arbitrage bounds).
+    converged : np.ndarray
+        Boolean convergence flag per contract.
+    """
+    if not np.all(np.isin(option_type, ['call', 'put'])):
+        raise ValueError("Option type must be 'call' or 'put'.")
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    inputs = np.broadcast_arrays(
+        np.asarray(market_price, dtype=float), np.asarray(S, dtype=float), np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float), np.asarray(r, dtype=float), phi,
+    )
+    shape = inputs[0].shape
+    price, S, K, T, r, phi = (a.ravel() for a in inputs)
+    n = price.size
+    lo, hi = bracket
+
+    K_disc = K * np.exp(-r * T)
+    sqrt_T = np.sqrt(np.where(T > 0, T, np.nan))
+
+    # Prices must lie strictly between intrinsic value and the upper bound
+    lower = np.maximum(phi * (S - K_disc), 0.0)
+    upper = np.where(phi > 0, S, K_disc)
+    valid = (T > 0) & (price > lower) & (price < upper)
+
+    # --- Corrado-Miller initial guess (on the equivalent call price) ---
+    call = np.where(phi > 0, price, price + S - K_disc)
+    m = call - 0.5 * (S - K_disc)
+    disc = np.maximum(m**2 - (S - K_disc)**2 / np.pi, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(2 * np.pi) / (sqrt_T * (S + K_disc)) * (m + np.sqrt(disc))
+    sigma = np.where(np.isfinite(sigma), np.clip(sigma, 0.05, 1.0), 0.2)
+    sigma = np.clip(sigma, lo, hi)
+
+    # --- Vectorized Halley iteration ---
+    converged = np.zeros(n, dtype=bool)
+    failed = ~valid
+    for _ in range(max_iter):
+        active = np.flatnonzero(~(converged | failed))
+        if active.size == 0:
+            break
+        s = sigma[active]
+        value, vega, d1, d2 = _bsm_price_vega(S[active], K_disc[active], sqrt_T[active], s, phi[active])
+        f = value - price[active]
+        volga = vega * d1 * d2 / s
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = f / vega
+            step = newton / (1.0 - 0.5 * newton * volga / vega)
+        new_sigma = s - step
+        bad = ~(np.isfinite(new_sigma) & (new_sigma > lo) & (new_sigma < hi)) | (vega < 1e-12 * S[active])
+        failed[active[bad]] = True
+        ok = active[~bad]
+        sigma[ok] = new_sigma[~bad]
+        converged[ok] = (np.abs(f[~bad]) < tol * price[ok]) | (np.abs(step[~bad]) < tol)
+
+    # --- Masked bisection fallback ---
+    todo = np.flatnonzero(~converged & valid)
+    if todo.size:
+        a = np.full(todo.size, float(lo))
+        b = np.full(todo.size, float(hi))
+        args = (S[todo], K_disc[todo], sqrt_T[todo])
+        f_b = _bsm_price_vega(*args, b, phi[todo])[0] - price[todo]
+        # Price is increasing in sigma, so a root exists only if f(hi) > 0
+        bracketed = f_b > 0
+        n_bisect = int(np.ceil(np.log2((hi - lo) / tol)))
+        for _ in range(n_bisect):
+            mid = 0.5 * (a + b)
+            f_mid = _bsm_price_vega(*args, mid, phi[todo])[0] - price[todo]
+            a = np.where(f_mid < 0, mid, a)
+            b = np.where(f_mid < 0, b, mid)
+        sigma[todo] = 0.5 * (a + b)
+        converged[todo[bracketed]] = True
+
+    sigma[~converged] = np.nan
+    return sigma.reshape(shape)[()], converged.reshape(shape)[()]
+
+
+# Field layout of the spot-grid record returned by `FiniteDifferencePricer.price_grid`.
+GRID_DTYPE = np.dtype([
+    ("spot", float),
+    ("price", float),
+    ("delta", float),
+    ("gamma", float),
+])
+
+
+@njit
+def _psor_solve(dl, d, du, b, g, x, omega, tol, max_iter):
+    """Projected SOR for the tridiagonal complementarity problem A x >= b, x >= g."""
+    m = d.size
+    for it in range(max_iter):
+        err = 0.0
+        for i in range(m):
+            y = b[i]
+            if i > 0:
+                y -= dl[i - 1] * x[i - 1]
+            if i < m - 1:
+                y -= du[i] * x[i + 1]
+            new = max(g[i], x[i] + omega * (y / d[i] - x[i]))
+            err = max(err, abs(new - x[i]))
+            x[i] = new
+        if err < tol:
+            return x, it + 1
+    return x, max_iter
+
+
+class FiniteDifferencePricer(OptionPricer):
+    """
+    Prices European and American options by finite differences on the BSM PDE.
+
+    The PDE is solved in time to maturity on a uniform grid in log price,
+    with the Crank-Nicolson scheme. The first `rannacher_steps` steps are
+    replaced by pairs of implicit Euler half-steps (Rannacher smoothing),
+    which damps the oscillations that the kinked payoff otherwise causes
+    in delta and gamma. The system matrix is the same at every step, so its
+    tridiagonal LU factorization (LAPACK ``gttrf``) is computed once and
+    reused. Early exercise is handled by either a penalty method (a few
+    ``scipy.linalg.solve_banded`` solves per step) or projected SOR.
+
+    One solve returns the price, delta and gamma on the whole spot grid;
+    `price` and `get_greeks` read off the values at the current spot,
+    which always lies on a grid node.
+    """
+
+    def price_grid(self, n_space=401, n_time=200, exercise_type='european', early_exercise='penalty',
+                   rannacher_steps=2, n_sd=5.0, tol=1e-8):
+        """
+        Solve the pricing PDE once and return values over the spot grid.
+
+        Parameters
+        ----------
+        n_space : int, optional
+            Number of log-price nodes (rounded up to an odd number so the
+            current spot is the middle node).
+        n_time : int, optional
+            Number of time steps.
+        exercise_type : str, optional
+            'european' or 'american'.
+        early_exercise : str, optional
+            'penalty' or 'psor'.
+        rannacher_steps : int, optional
+            Number of initial Crank-Nicolson steps replaced by two implicit
+            Euler half-steps each.
+        n_sd : float, optional
+            Half-width of the log-price grid in standard deviations
+            ``sigma * sqrt(T)``.
+        tol : float, optional
+            Convergence tolerance of the early-exercise iterations.
+
+        Returns
+        -------
+        np.ndarray
+            A structured array with dtype `GRID_DTYPE` (fields 'spot',
+            'price', 'delta' and 'gamma'), one record per grid node.
+        """
+        if exercise_type not in ('european', 'american'):
+            raise ValueError("exercise_type must be 'european' or 'american'.")
+        if early_exercise not in ('penalty', 'psor'):
+            raise ValueError("early_exercise must be 'penalty' or 'psor'.")
+        if self.option_type not in ('call', 'put'):
+            raise ValueError("FiniteDifferencePricer prices a single 'call' or 'put'.")
+        american = exercise_type == 'american'
+        phi = 1.0 if self.option_type == 'call' else -1.0
+        S, K, T, r, sigma = (float(a) for a in (self.S, self.K, self.T, self.r, self.sigma))
+
+        n_space += 1 - n_space % 2
+        half_width = n_sd * sigma * np.sqrt(T)
+        x = np.log(S) + np.linspace(-half_width, half_width, n_space)
+        dx = x[1] - x[0]
+        spot = np.exp(x)
+        payoff = np.maximum(phi * (spot - K), 0.0)
+        g = payoff[1:-1]
+        m = n_space - 2
+
+        # Constant-coefficient operator L V = a V[i-1] + b V[i] + c V[i+1]
+        nu = r - 0.5 * sigma**2
+        a = sigma**2 / (2 * dx**2) - nu / (2 * dx)
+        b = -sigma**2 / dx**2 - r
+        c = sigma**2 / (2 * dx**2) + nu / (2 * dx)
+
+        def boundary(tau):
+            far = phi * (spot[[0, -1]] - K * np.exp(-r * tau))
+            if american:
+                far = np.maximum(far, payoff[[0, -1]])
+            return np.maximum(far, 0.0)
+
+        factorizations = {}
+
+        def system(theta, dt):
+            """Tridiagonal (I - theta dt L) on the interior nodes, factorized once per (theta, dt)."""
+            key = (theta, dt)
+            if key not in factorizations:
+                dl = np.full(m - 1, -theta * dt * a)
+                d = np.full(m, 1.0 - theta * dt * b)
+                du = np.full(m - 1, -theta * dt * c)
+                factorizations[key] = (dl, d, du, lapack.dgttrf(dl, d, du))
+            return factorizations[key]
+
+        def step(V, tau, theta, dt):
+            V_int = V[1:-1]
+            rhs = V_int + (1 - theta) * dt * (a * V[:-2] + b * V_int + c * V[2:])
+            lo, hi = boundary(tau + dt)
+            rhs[0] += theta * dt * a * lo
+            rhs[-1] += theta * dt * c * hi
+            dl, d, du, (l_fac, d_fac, u_fac, u2_fac, ipiv, _) = system(theta, dt)
+            new = lapack.dgttrs(l_fac, d_fac, u_fac, u2_fac, ipiv, rhs)[0]
+            if american:
+                if early_exercise == 'psor':
+                    new, _ = _psor_solve(dl, d, du, rhs, g, np.maximum(new, g), 1.2, tol, 10000)
+                else:
+                    new = self._penalty_solve(dl, d, du, rhs, g, new)
+            V = np.empty_like(V)
+            V[0], V[-1] = lo, hi
+            V[1:-1] = new
+            return V
+
+        dt = T / n_time
+        V = payoff.copy()
+        tau = 0.0
+        for k in range(n_time):
+            if k < rannacher_steps:
+                V = step(V, tau, 1.0, 0.5 * dt)
+                V = step(V, tau + 0.5 * dt, 1.0, 0.5 * dt)
+            else:
+                V = step(V, tau, 0.5, dt)
+            tau += dt
+
+        V_x = np.gradient(V, dx)
+        V_xx = np.gradient(V_x, dx)
+        out = np.empty(n_space, dtype=GRID_DTYPE)
+        out['spot'] = spot
+        out['price'] = V
+        out['delta'] = V_x / spot
+        out['gamma'] = (V_xx - V_x) / spot**2
+        return out
+
+    @staticmethod
+    def _penalty_solve(dl, d, du, rhs, g, x, penalty=1e8, max_iter=50):
+        """Penalty iteration (Forsyth and Vetzal, 2002) for one American time step."""
+        ab = np.zeros((3, d.size))
+        ab[0, 1:], ab[2, :-1] = du, dl
+        active = x < g
+        for _ in range(max_iter):
+            P = penalty * active
+            ab[1] = d + P
+            x = solve_banded((1, 1), ab, rhs + P * g)
+            new_active = x < g
+            if np.array_equal(new_active, active):
+                break
+            active = new_active
+        return x
+
+    def _at_spot(self, field, **kwargs):
+        grid = self.price_grid(**kwargs)
+        return float(grid[field][grid.size // 2])
+
+    def price(self, **kwargs):
+        """Return the price at the current spot; keyword arguments go to `price_grid`."""
+        return self._at_spot('price', **kwargs)
+
+    def get_greeks(self, **kwargs):
+        """Return delta and gamma at the current spot from a single PDE solve."""
+        grid = self.price_grid(**kwargs)
+        mid = grid[grid.size // 2]
+        return {'delta': float(mid['delta']), 'gamma': float(mid['gamma'])}
+
+
+class MCEstimate(NamedTuple):
+    """
+    A Monte Carlo price estimate.
+
+    `variance_reduction` is the variance of a plain Monte Carlo estimator
+    with the same number of paths, estimated from the same simulation,
+    divided by the variance of this estimator.
+    """
+    price: float
+    std_error: float
+    n_paths: int
+    variance_reduction: float = 1.0
+
+
+def vanilla_payoff(K, option_type='call'):
+    """European payoff on the terminal price, for `MonteCarloPricer.price_payoffs`."""
+    phi = 1.0 if option_type == 'call' else -1.0
+    return lambda stats: np.maximum(phi * (stats['terminal'] - K), 0.0)
+
+
+def asian_payoff(K, option_type='call'):
+    """Arithmetic average-price payoff, for `MonteCarloPricer.price_payoffs`."""
+    phi = 1.0 if option_type == 'call' else -1.0
+    return lambda stats: np.maximum(phi * (stats['average'] - K), 0.0)
+
+
+def geometric_asian_payoff(K, option_type='call'):
+    """Geometric average-price payoff, for `MonteCarloPricer.price_payoffs`."""
+    phi = 1.0 if option_type == 'call' else -1.0
+    return lambda stats: np.maximum(phi * (stats['geometric_average'] - K), 0.0)
+
+
+def barrier_payoff(K, barrier_level, barrier_type='up-and-out', option_type='call'):
+    """
+    Knock-in or knock-out payoff, for `MonteCarloPricer.price_payoffs`.
+
+    `barrier_type` is one of 'up-and-out', 'up-and-in', 'down-and-out' or
+    'down-and-in'. The barrier is monitored at every simulation date,
+    including the start date.
+    """
+    if barrier_type not in ('up-and-out', 'up-and-in', 'down-and-out', 'down-and-in'):
+        raise ValueError("Unsupported barrier type")
+    phi = 1.0 if option_type == 'call' else -1.0
+    up = barrier_type.startswith('up')
+    knock_in = barrier_type.endswith('in')
+
+    def payoff(stats):
+        hit = stats['maximum'] > barrier_level if up else stats['minimum'] < barrier_level
+        alive = hit if knock_in else ~hit
+        return np.where(alive, np.maximum(phi * (stats['terminal'] - K), 0.0), 0.0)
+    return payoff
+
+
+def geometric_asian_price(S, K, T, r, sigma, n_steps, option_type='call'):
+    """
+    Closed-form price of a discretely monitored geometric average-price option.
+
+    The average is taken over the `n_steps` equally spaced dates
+    ``T/n_steps, ..., T``, matching `geometric_asian_payoff`. This is the
+    usual control variate for arithmetic Asian options.
+    """
+    dt = T / n_steps
+    phi = np.where(np.asarray(option_type) == 'call', 1.0, -1.0)
+    # log G is normal with this mean and variance
+    mu = np.log(S) + (r - 0.5 * sigma**2) * dt * (n_steps + 1) / 2
+    sd = sigma * np.sqrt(dt * (n_steps + 1) * (2 * n_steps + 1) / (6 * n_steps))
+    d2 = (mu - np.log(K)) / sd
+    d1 = d2 + sd
+    value = phi * (np.exp(mu + 0.5 * sd**2) * ndtr(phi * d1) - K * ndtr(phi * d2))
+    return (np.exp(-r * T) * value)[()]
+
+
+class _RunningMoments:
+    """Pairwise (Chan et al.) accumulation of the mean and co-moment matrix of a few columns."""
+
+    def __init__(self, k):
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, X):
+        n = X.shape[0]
+        x_mean = X.mean(axis=0)
+        centered = X - x_mean
+        delta = x_mean - self.mean
+        total = self.count + n
+        self.comoment += centered.T @ centered + np.outer(delta, delta) * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    @property
+    def cov(self):
+        return self.comoment / (self.count - 1)
+
+
+@lru_cache(maxsize=None)
+def _brownian_bridge_plan(n_steps):
+    """
+    Construction order and weights of a Brownian bridge on dates 1..n_steps (unit spacing).
+
+    Follows Jaeckel (2002): the first normal sets the terminal value, and each
+    later normal fills the midpoint of the widest remaining gap.
+    """
+    filled = np.zeros(n_steps, dtype=bool)
+    point, left, right = (np.zeros(n_steps, dtype=int) for _ in range(3))
+    left_w, right_w, std = (np.zeros(n_steps) for _ in range(3))
+    filled[-1] = True
+    point[0], std[0] = n_steps - 1, np.sqrt(n_steps)
+    j = 0
+    for i in range(1, n_steps):
+        while filled[j]:
+            j += 1
+        k = j
+        while not filled[k]:
+            k += 1
+        l = j + ((k - 1 - j) >> 1)
+        filled[l] = True
+        point[i], left[i], right[i] = l, j, k
+        left_w[i] = (k - l) / (k + 1 - j)
+        right_w[i] = (l + 1 - j) / (k + 1 - j)
+        std[i] = np.sqrt((l + 1 - j) * (k - l) / (k + 1 - j))
+        j = k + 1
+        if j >= n_steps:
+            j = 0
+    return point, left, right, left_w, right_w, std
+
+
+@lru_cache(maxsize=None)
+def _pca_factor(n_steps):
+    """Matrix A with A @ A.T = min(i, j), columns ordered by decreasing eigenvalue."""
+    t = np.arange(1, n_steps + 1)
+    eigval, eigvec = np.linalg.eigh(np.minimum.outer(t, t).astype(float))
+    return (eigvec * np.sqrt(np.maximum(eigval, 0.0)))[:, ::-1]
+
+
+def _construct_increments(Z, construction):
+    """
+    Map a block of independent normals to standard normal path increments.
+
+    With 'brownian_bridge' or 'pca' the leading columns of `Z` drive the
+    large-scale shape of each path, which is where low-discrepancy points
+    are most uniform.
+    """
+    if construction == 'standard':
+        return Z
+    if construction == 'pca':
+        W = Z @ _pca_factor(Z.shape[1]).T
+    elif construction == 'brownian_bridge':
+        point, left, right, left_w, right_w, std = _brownian_bridge_plan(Z.shape[1])
+        W = np.empty_like(Z)
+        W[:, point[0]] = std[0] * Z[:, 0]
+        for i in range(1, Z.shape[1]):
+            l, j, k = point[i], left[i], right[i]
+            W[:, l] = right_w[i] * W[:, k] + std[i] * Z[:, i]
+            if j > 0:
+                W[:, l] += left_w[i] * W[:, j - 1]
+    else:
+        raise ValueError("construction must be 'standard', 'brownian_bridge' or 'pca'.")
+    W[:, 1:] -= W[:, :-1].copy()
+    return W
+
+
+def _seeded_chunks(n_sims, chunk_size, seed):
+    """Yield (size, generator) for each chunk, with an independent child seed per chunk."""
+    n_chunks = -(-n_sims // chunk_size)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    children = seed.spawn(n_chunks)
+    for i, child in enumerate(children):
+        yield min(chunk_size, n_sims - i * chunk_size), np.random.default_rng(child)
+
+
+def _regression_basis(x, degree, basis):
+    """
+    Regression design matrix with `degree` + 1 columns.
+
+    'laguerre' uses a constant plus exponentially weighted Laguerre
+    polynomials exp(-x/2) L_k(x), as in Longstaff and Schwartz (2001);
+    'polynomial' uses the monomials 1, x, ..., x**degree.
+    """
+    X = np.empty((len(x), degree + 1))
+    X[:, 0] = 1.0
+    if basis == 'polynomial':
+        for k in range(1, degree + 1):
+            X[:, k] = X[:, k - 1] * x
+    elif basis == 'laguerre':
+        weight = np.exp(-0.5 * x)
+        prev, curr = np.zeros_like(x), np.ones_like(x)
+        for k in range(degree):
+            X[:, k + 1] = weight * curr
+            prev, curr = curr, ((2 * k + 1 - x) * curr - k * prev) / (k + 1)
+    else:
+        raise ValueError("basis must be 'laguerre' or 'polynomial'.")
+    return X
+
+
+class MonteCarloPricer(OptionPricer):
+    """
+    Prices options using Monte Carlo simulation of geometric Brownian motion.
+
+    Paths are simulated in chunks of `chunk_size` paths. Each chunk draws its
+    normals from its own child of ``np.random.SeedSequence(seed)``, is reduced
+    to a few per-path statistics ('terminal', 'average', 'geometric_average',
+    'maximum', 'minimum'), and is then discarded, so memory is bounded by one
+    chunk rather than by the full ``(n_sims, n_steps + 1)`` path matrix.
+    Results are reproducible for a given `seed` and `chunk_size`.
+
+    `price_payoffs` supports the standard variance reduction techniques:
+
+    - antithetic variates (each normal block is reused with its sign flipped),
+    - moment matching (each chunk's normals are standardized per time step),
+    - control variates with a known price, such as `geometric_asian_price`
+      for arithmetic Asians or `BSMPricer` for payoffs close to a European,
+    - importance sampling by shifting the mean of the normals, which moves
+      paths towards a distant strike or barrier (see `drift_shift_to`).
+
+    Each estimate reports its variance reduction factor against plain
+    Monte Carlo with the same number of paths.
+
+    `price_greeks` estimates delta, gamma, vega and rho alongside the price
+    from the same paths, by pathwise differentiation, likelihood ratios or
+    bumping with common random numbers.
+
+    `price_american` prices Bermudan/American exercise with the
+    Longstaff-Schwartz least-squares method.
+
+    Attributes
+    ----------
+    exercise_coefficients : np.ndarray
+        Continuation-value regression coefficients per exercise date, shape
+        (n_steps, degree + 1), set by `price_american` (row 0 is unused).
+    exercise_boundary : np.ndarray
+        Critical spot price at each exercise date, NaN where exercise is
+        never optimal, set by `price_american`.
+    in_sample_price : float
+        The (high-biased) estimate from the regression paths.
+    """
+
+    def _chunks(self, n_sims, chunk_size, seed):
+        return _seeded_chunks(n_sims, chunk_size, seed)
+
+    def _normal_blocks(self, n_draws, n_steps, chunk_size, seed, sampler, n_replications):
+        """
+        Yield (batch, Z) blocks of standard normals, `n_draws` rows in total.
+
+        For 'pseudo' sampling each chunk is its own batch. For 'sobol' the
+        draws are split across `n_replications` independently scrambled
+        Sobol sequences, and the batch is the replication index.
+        """
+        if sampler == 'pseudo':
+            for batch, (size, rng) in enumerate(self._chunks(n_draws, chunk_size, seed)):
+                yield batch, rng.standard_normal((size, n_steps))
+        elif sampler == 'sobol':
+            if n_draws % n_replications:
+                raise ValueError("The number of draws must be divisible by n_replications.")
+            per_replication = n_draws // n_replications
+            for batch, child in enumerate(np.random.SeedSequence(seed).spawn(n_replications)):
+                engine = qmc.Sobol(d=n_steps, scramble=True, seed=np.random.default_rng(child))
+                for start in range(0, per_replication, chunk_size):
+                    U = engine.random(min(chunk_size, per_replication - start))
+                    yield batch, ndtri(np.clip(U, 1e-16, 1 - 1e-16))
+        else:
+            raise ValueError("sampler must be 'pseudo' or 'sobol'.")
+
+    def _path_statistics(self, Z, dt, tangents=False):
+        """
+        Reduce a (size, n_steps) block of normals to per-path statistics, reusing the block in place.
+
+        With `tangents`, the statistics also include 'd_sigma' and 'd_r':
+        dicts holding the derivative of each statistic with respect to sigma
+        and r along the same path.
+        """
+        Z *= self.sigma * np.sqrt(dt)
+        Z += (self.r - 0.5 * self.sigma**2) * dt
+        log_paths = np.cumsum(Z, axis=1, out=Z)
+        if tangents:
+            t = dt * np.arange(1, Z.shape[1] + 1)
+            # d log S_t / d sigma = W_t - sigma * t, with W_t recovered from the log path
+            d_log_sigma = (log_paths - (self.r - 0.5 * self.sigma**2) * t) / self.sigma - self.sigma * t
+        geometric_average = self.S * np.exp(log_paths.mean(axis=1))
+        paths = np.exp(log_paths, out=log_paths)
+        paths *= self.S
+        stats = {
+            'terminal': paths[:, -1].copy(),
+            'average': paths.mean(axis=1),
+            'geometric_average': geometric_average,
+            'maximum': np.maximum(paths.max(axis=1), self.S),
+            'minimum': np.minimum(paths.min(axis=1), self.S),
+        }
+        if tangents:
+            stats['d_sigma'] = self._tangent_statistics(paths, d_log_sigma, stats)
+            stats['d_r'] = self._tangent_statistics(paths, np.broadcast_to(t, paths.shape), stats)
+        return stats
+
+    def _tangent_statistics(self, paths, d_log, stats):
+        """Derivatives of the path statistics given d log S_t along each path."""
+        d_paths = paths * d_log
+        rows = np.arange(len(paths))
+        i_max, i_min = paths.argmax(axis=1), paths.argmin(axis=1)
+        # The running extremes do not move with sigma or r while S0 attains them
+        return {
+            'terminal': d_paths[:, -1],
+            'average': d_paths.mean(axis=1),
+            'geometric_average': stats['geometric_average'] * d_log.mean(axis=1),
+            'maximum': np.where(paths[rows, i_max] > self.S, d_paths[rows, i_max], 0.0),
+            'minimum': np.where(paths[rows, i_min] < self.S, d_paths[rows, i_min], 0.0),
+        }
+
+    def drift_shift_to(self, target, n_steps):
+        """
+        Return the per-step normal mean shift that centres the terminal price on `target`.
+
+        Passing this as `drift_shift` importance-samples paths towards a
+        deep out-of-the-money strike or barrier.
+        """
+        drift = np.log(target / self.S) - (self.r - 0.5 * self.sigma**2) * self.T
+        return drift / (self.sigma * np.sqrt(self.T) * np.sqrt(n_steps))
+
+    def stream_path_statistics(self, n_sims, n_steps, chunk_size=10000, seed=42,
+                               antithetic=False, moment_matching=False, drift_shift=0.0,
+                               sampler='pseudo', construction='standard', n_replications=16):
+        """
+        Simulate paths chunk by chunk and yield per-path statistics.
+
+        With `antithetic`, the second half of every chunk reuses the first
+        half's normals with their signs flipped. With a nonzero
+        `drift_shift`, the normals are drawn with that mean and each path
+        carries its likelihood ratio in 'weight'.
+
+        With ``sampler='sobol'`` the normals come from scrambled Sobol points
+        (``scipy.stats.qmc``), split into `n_replications` independent
+        randomizations; keep the paths per replication and `chunk_size` powers
+        of two. `construction` chooses how normals become paths: 'standard'
+        (sequential increments), 'brownian_bridge' or 'pca'. The latter two
+        let the first Sobol dimensions determine the overall path shape.
+
+        Yields
+        ------
+        dict
+            Arrays of length `chunk_size` (shorter for the last chunk) keyed
+            by 'terminal', 'average' and 'geometric_average' (over dates
+            1..n_steps), 'maximum' and 'minimum' (over dates 0..n_steps), and
+            'weight' when `drift_shift` is nonzero. The integer 'batch' labels
+            the chunk (pseudo-random) or replication (Sobol) the paths belong
+            to.
+        """
+        if antithetic and (n_sims % 2 or chunk_size % 2):
+            raise ValueError("n_sims and chunk_size must be even for antithetic sampling.")
+        dt = self.T / n_steps
+        n_draws = n_sims // 2 if antithetic else n_sims
+        draw_chunk = chunk_size // 2 if antithetic else chunk_size
+        for batch, Z in self._normal_blocks(n_draws, n_steps, draw_chunk, seed, sampler, n_replications):
+            if moment_matching:
+                Z -= Z.mean(axis=0)
+                Z /= Z.std(axis=0)
+            if antithetic:
+                Z = np.concatenate([Z, -Z])
+            Z = _construct_increments(Z, construction)
+            log_weight = None
+            if drift_shift:
+                Z += drift_shift
+                log_weight = -drift_shift * Z.sum(axis=1) + 0.5 * n_steps * drift_shift**2
+            stats = self._path_statistics(Z, dt)
+            if log_weight is not None:
+                stats['weight'] = np.exp(log_weight)
+            stats['batch'] = batch
+            yield stats
+
+    def price_payoffs(self, payoffs, n_sims=100000, n_steps=100, chunk_size=10000, seed=42,
+                      antithetic=False, moment_matching=False, drift_shift=0.0, controls=None,
+                      sampler='pseudo', construction='standard', n_replications=16):
+        """
+        Price several payoffs off one stream of simulated paths.
+
+        Parameters
+        ----------
+        payoffs : dict
+            Maps a name to a callable that takes the per-path statistics of a
+            chunk (see `stream_path_statistics`) and returns undiscounted
+            payoffs, e.g. `vanilla_payoff`, `asian_payoff` or `barrier_payoff`.
+        n_sims : int, optional
+            Total number of simulated paths.
+        n_steps : int, optional
+            Number of time steps per path.
+        chunk_size : int, optional
+            Number of paths simulated at once.
+        seed : int, optional
+            Root seed of the per-chunk seed sequence.
+        antithetic : bool, optional
+            Use antithetic variates.
+        moment_matching : bool, optional
+            Standardize each chunk's normals per time step. The standard
+            error is then computed from the spread of the chunk estimates,
+            so several chunks are needed.
+        drift_shift : float, optional
+            Mean of the sampled normals for importance sampling.
+        controls : dict, optional
+            Maps a payoff name to a ``(control_payoff, control_price)`` pair:
+            a payoff callable and its known discounted price. The control
+            coefficient is estimated by regression over all paths.
+        sampler : str, optional
+            'pseudo' for pseudo-random normals or 'sobol' for randomized
+            quasi-Monte Carlo. With 'sobol' the standard error is computed
+            from the spread of the `n_replications` replication estimates.
+        construction : str, optional
+            Path construction: 'standard', 'brownian_bridge' or 'pca'.
+        n_replications : int, optional
+            Number of independently scrambled Sobol sequences.
+
+        Returns
+        -------
+        dict
+            Maps each payoff name to an `MCEstimate` of the discounted price.
+        """
+        controls = controls or {}
+        unknown = set(controls) - set(payoffs)
+        if unknown:
+            raise ValueError(f"Controls given for unknown payoffs: {sorted(unknown)}")
+        disc = np.exp(-self.r * self.T)
+        moments = {name: _RunningMoments(2 if name in controls else 1) for name in payoffs}
+        plain = {name: np.zeros(2) for name in payoffs}  # sums of w*Y and w*Y**2 over paths
+        batch_sums = {name: {} for name in payoffs}  # batch -> [column sums, count]
+        n_paths = 0
+
+        stream = self.stream_path_statistics(n_sims, n_steps, chunk_size, seed, antithetic, moment_matching,
+                                             drift_shift, sampler, construction, n_replications)
+        for stats in stream:
+            weight = stats.get('weight', 1.0)
+            n_paths += len(stats['terminal'])
+            for name, payoff in payoffs.items():
+                raw = payoff(stats)
+                y = raw * weight
+                plain[name] += (y.sum(), (y * raw).sum())
+                columns = [y]
+                if name in controls:
+                    columns.append(controls[name][0](stats) * weight)
+                X = np.column_stack(columns)
+                if antithetic:
+                    half = len(X) // 2
+                    X = 0.5 * (X[:half] + X[half:])
+                moments[name].update(X)
+                sums = batch_sums[name].setdefault(stats['batch'], [0.0, 0])
+                sums[0] += X.sum(axis=0)
+                sums[1] += len(X)
+
+        estimates = {}
+        for name in payoffs:
+            acc = moments[name]
+            cov = acc.cov
+            batch_means = np.array([total / count for total, count in batch_sums[name].values()])
+            if name in controls:
+                # Regression-adjusted estimator and its residual variance
+                beta = cov[0, 1] / cov[1, 1]
+                target = controls[name][1] / disc
+                price = acc.mean[0] - beta * (acc.mean[1] - target)
+                sample_var = cov[0, 0] - beta * cov[0, 1]
+                batch = batch_means @ np.array([1.0, -beta])
+            else:
+                price = acc.mean[0]
+                sample_var = cov[0, 0]
+                batch = batch_means[:, 0]
+            if moment_matching or sampler == 'sobol':
+                var = batch.var(ddof=1) / len(batch) if len(batch) > 1 else np.nan
+            else:
+                var = sample_var / acc.count
+            plain_var = (plain[name][1] / n_paths - (plain[name][0] / n_paths)**2) / n_paths
+            estimates[name] = MCEstimate(
+                float(disc * price), float(disc * np.sqrt(var)), n_paths, float(plain_var / var),
+            )
+        return estimates
+
+    def price_greeks(self, payoffs, n_sims=100000, n_steps=100, chunk_size=10000, seed=42,
+                     method='pathwise', antithetic=False, bump=0.01):
+        """
+        Estimate prices and greeks of several payoffs from a single simulation.
+
+        Parameters
+        ----------
+        payoffs : dict
+            Maps a name to a payoff callable, as in `price_payoffs`.
+        n_sims, n_steps, chunk_size, seed, antithetic
+            As in `price_payoffs`.
+        method : str, optional
+            How the greeks are estimated:
+
+            - 'pathwise' differentiates every simulated payoff along its own
+              path (delta, vega, rho), with gamma from the mixed
+              pathwise/likelihood-ratio estimator. It has the lowest variance
+              but needs payoffs that are continuous in the path, such as
+              vanilla and Asian payoffs; it is biased for barriers and
+              digitals.
+            - 'likelihood_ratio' weights each payoff by the derivative of the
+              log density of the path's normals. It works for any payoff,
+              including barriers, at the cost of a higher variance.
+            - 'crn' (common random numbers) draws each chunk's normal block
+              once and revalues it with the spot and volatility bumped by a
+              relative `bump` and the rate by ``bump / 100``, using central
+              differences.
+        bump : float, optional
+            Bump size for ``method='crn'``.
+
+        Returns
+        -------
+        dict
+            Maps each payoff name to a dict of `MCEstimate` objects keyed by
+            'price', 'delta', 'gamma', 'vega' and 'rho'. As in
+            `BSMPricer.price_and_greeks`, vega and rho are per 1% move.
+        """
+        if method not in ('pathwise', 'likelihood_ratio', 'crn'):
+            raise ValueError("method must be 'pathwise', 'likelihood_ratio' or 'crn'.")
+        if antithetic and (n_sims % 2 or chunk_size % 2):
+            raise ValueError("n_sims and chunk_size must be even for antithetic sampling.")
+        greek_names = ('price', 'delta', 'gamma', 'vega', 'rho')
+        dt = self.T / n_steps
+        sd = self.sigma * np.sqrt(dt)
+        disc = np.exp(-self.r * self.T)
+        if method == 'crn':
+            h_S, h_sigma, h_r = bump * self.S, bump * self.sigma, bump / 100
+            scenarios = {
+                'S_up': (self.S + h_S, self.sigma, self.r), 'S_down': (self.S - h_S, self.sigma, self.r),
+                'sigma_up': (self.S, self.sigma + h_sigma, self.r),
+                'sigma_down': (self.S, self.sigma - h_sigma, self.r),
+                'r_up': (self.S, self.sigma, self.r + h_r), 'r_down': (self.S, self.sigma, self.r - h_r),
+            }
+            bumped = {key: type(self)(S, self.K, self.T, r, sigma, self.option_type)
+                      for key, (S, sigma, r) in scenarios.items()}
+
+        def directional(payoff, stats, tangent, base, h=1e-6):
+            # Pathwise derivative as a one-sided difference along the path's tangent
+            shifted = dict(stats, **{key: stats[key] + h * tangent[key] for key in tangent})
+            return (payoff(shifted) - base) / h
+
+        moments = {name: _RunningMoments(len(greek_names)) for name in payoffs}
+        n_draws = n_sims // 2 if antithetic else n_sims
+        draw_chunk = chunk_size // 2 if antithetic else chunk_size
+        for _, Z in self._normal_blocks(n_draws, n_steps, draw_chunk, seed, 'pseudo', None):
+            if antithetic:
+                Z = np.concatenate([Z, -Z])
+            z1 = Z[:, 0].copy()
+            if method == 'likelihood_ratio':
+                z_sum, z_sq = Z.sum(axis=1), np.einsum('ij,ij->i', Z, Z)
+                score_delta = z1 / (self.S * sd)
+                score_gamma = (z1**2 - 1) / (self.S * sd)**2 - z1 / (self.S**2 * sd)
+                score_vega = (z_sq - n_steps) / self.sigma - np.sqrt(dt) * z_sum
+                score_rho = np.sqrt(dt) * z_sum / self.sigma - self.T
+            elif method == 'crn':
+                bumped_stats = {key: pricer._path_statistics(Z.copy(), dt) for key, pricer in bumped.items()}
+            stats = self._path_statistics(Z, dt, tangents=method == 'pathwise')
+
+            for name, payoff in payoffs.items():
+                y = payoff(stats)
+                if method == 'likelihood_ratio':
+                    delta, gamma = y * score_delta, y * score_gamma
+                    vega, rho = y * score_vega, y * score_rho
+                elif method == 'pathwise':
+                    spot_tangent = {key: stats[key] / self.S for key in stats['d_r']}
+                    delta = directional(payoff, stats, spot_tangent, y)
+                    gamma = delta * (z1 / (self.S * sd) - 1 / self.S)
+                    vega = directional(payoff, stats, stats['d_sigma'], y)
+                    rho = directional(payoff, stats, stats['d_r'], y) - self.T * y
+                else:
+                    up, down = payoff(bumped_stats['S_up']), payoff(bumped_stats['S_down'])
+                    delta = (up - down) / (2 * h_S)
+                    gamma = (up - 2 * y + down) / h_S**2
+                    vega = (payoff(bumped_stats['sigma_up']) - payoff(bumped_stats['sigma_down'])) / (2 * h_sigma)
+                    rho = (np.exp(-h_r * self.T) * payoff(bumped_stats['r_up'])
+                           - np.exp(h_r * self.T) * payoff(bumped_stats['r_down'])) / (2 * h_r)
+                X = disc * np.column_stack([y, delta, gamma, vega / 100, rho / 100])
+                if antithetic:
+                    half = len(X) // 2
+                    X = 0.5 * (X[:half] + X[half:])
+                moments[name].update(X)
+
+        estimates = {}
+        for name, acc in moments.items():
+            std_error = np.sqrt(np.diag(acc.cov) / acc.count)
+            estimates[name] = {
+                greek: MCEstimate(float(acc.mean[i]), float(std_error[i]), n_sims)
+                for i, greek in enumerate(greek_names)
+            }
+        return estimates
+
+    def price(self, n_sims=100000, n_steps=1, seed=42, chunk_size=10000):
+        payoff = vanilla_payoff(self.K, self.option_type)
+        return self.price_payoffs({'european': payoff}, n_sims, n_steps, chunk_size, seed)['european'].price
+
+    def price_asian(self, n_sims=20000, n_steps=100, seed=42, chunk_size=10000, control_variate=False):
+        """Price an arithmetic Asian option, optionally with the geometric Asian as control variate."""
+        payoffs = {'asian': asian_payoff(self.K, self.option_type)}
+        controls = None
+        if control_variate:
+            controls = {'asian': (
+                geometric_asian_payoff(self.K, self.option_type),
+                geometric_asian_price(self.S, self.K, self.T, self.r, self.sigma, n_steps, self.option_type),
+            )}
+        return self.price_payoffs(payoffs, n_sims, n_steps, chunk_size, seed, controls=controls)['asian'].price
+
+    def price_barrier(self, barrier_level, barrier_type='up-and-out', n_sims=20000, n_steps=100, seed=42, chunk_size=10000):
+        payoff = barrier_payoff(self.K, barrier_level, barrier_type, self.option_type)
+        return self.price_payoffs({'barrier': payoff}, n_sims, n_steps, chunk_size, seed)['barrier'].price
+
+    def price_american(self, n_sims=100000, n_steps=50, degree=3, basis='laguerre', chunk_size=50000,
+                       seed=42, n_sims_pricing=None):
+        """
+        Price an American option by Longstaff-Schwartz least-squares Monte Carlo.
+
+        Exercise is allowed at the `n_steps` equally spaced dates and at time
+        zero. The backward regression pass never stores whole paths: every
+        chunk holds only its current Brownian motion value and realized
+        cash flow, and steps backward in time by sampling the Brownian
+        bridge. At each date the continuation value is regressed on
+        `_regression_basis` of the moneyness ``S/K`` over in-the-money paths
+        only, with the normal equations accumulated chunk by chunk. Only
+        the regression coefficients (the exercise boundary) are kept. A
+        second, independent forward pass then applies that exercise rule,
+        which gives a low-biased price with a valid standard error.
+
+        Parameters
+        ----------
+        n_sims : int, optional
+            Number of paths in the regression pass.
+        n_steps : int, optional
+            Number of exercise dates.
+        degree : int, optional
+            Number of non-constant basis functions.
+        basis : str, optional
+            'laguerre' or 'polynomial'.
+        chunk_size : int, optional
+            Number of paths processed at once.
+        seed : int, optional
+            Root seed; the regression and pricing passes use independent
+            child seeds.
+        n_sims_pricing : int, optional
+            Number of paths in the pricing pass, `n_sims` by default.
+
+        Returns
+        -------
+        MCEstimate
+            The out-of-sample price estimate.
+        """
+        if self.option_type not in ('call', 'put'):
+            raise ValueError("price_american prices a single 'call' or 'put'.")
+        n_sims_pricing = n_sims_pricing or n_sims
+        phi = 1.0 if self.option_type == 'call' else -1.0
+        dt = self.T / n_steps
+        drift = self.r - 0.5 * self.sigma**2
+        step_disc = np.exp(-self.r * dt)
+        regression_seed, pricing_seed = np.random.SeedSequence(seed).spawn(2)
+
+        def spot(w, t):
+            return self.S * np.exp(drift * t + self.sigma * w)
+
+        # --- Backward regression pass on Brownian-bridge paths ---
+        chunks = list(self._chunks(n_sims, chunk_size, regression_seed))
+        W = [np.sqrt(self.T) * rng.standard_normal(size) for size, rng in chunks]
+        V = [np.maximum(phi * (spot(w, self.T) - self.K), 0.0) for w in W]
+        coef = np.zeros((n_steps, degree + 1))
+        for j in range(n_steps - 1, 0, -1):
+            XtX = np.zeros((degree + 1, degree + 1))
+            Xty = np.zeros(degree + 1)
+            spots = []
+            for c, (size, rng) in enumerate(chunks):
+                # W(t_j) given W(t_{j+1}) and W(0) = 0
+                W[c] = j / (j + 1) * W[c] + np.sqrt(dt * j / (j + 1)) * rng.standard_normal(size)
+                V[c] *= step_disc
+                S_t = spot(W[c], j * dt)
+                itm = phi * (S_t - self.K) > 0
+                X = _regression_basis(S_t[itm] / self.K, degree, basis)
+                XtX += X.T @ X
+                Xty += X.T @ V[c][itm]
+                spots.append(S_t)
+            coef[j] = np.linalg.lstsq(XtX, Xty, rcond=None)[0]
+            for c, S_t in enumerate(spots):
+                exercise_value = phi * (S_t - self.K)
+                itm = np.flatnonzero(exercise_value > 0)
+                continuation = _regression_basis(S_t[itm] / self.K, degree, basis) @ coef[j]
+                stop = itm[exercise_value[itm] >= continuation]
+                V[c][stop] = exercise_value[stop]
+        immediate = max(phi * (self.S - self.K), 0.0)
+        self.in_sample_price = float(max(immediate, step_disc * np.concatenate(V).mean()))
+        self.exercise_coefficients = coef
+        self.exercise_boundary = self._exercise_boundary(coef, degree, basis)
+        del W, V, chunks
+
+        # --- Forward pricing pass with the stored exercise rule ---
+        moments = _RunningMoments(1)
+        for size, rng in self._chunks(n_sims_pricing, chunk_size, pricing_seed):
+            S_t = np.full(size, float(self.S))
+            cash = np.zeros(size)
+            alive = np.ones(size, dtype=bool)
+            for j in range(1, n_steps + 1):
+                S_t *= np.exp(drift * dt + self.sigma * np.sqrt(dt) * rng.standard_normal(size))
+                exercise_value = phi * (S_t - self.K)
+                candidates = np.flatnonzero(alive & (exercise_value > 0))
+                if j < n_steps:
+                    continuation = _regression_basis(S_t[candidates] / self.K, degree, basis) @ coef[j]
+                    candidates = candidates[exercise_value[candidates] >= continuation]
+                cash[candidates] = exercise_value[candidates] * np.exp(-self.r * j * dt)
+                alive[candidates] = False
+            moments.update(cash[:, None])
+
+        price, var = moments.mean[0], moments.cov[0, 0] / moments.count
+        if immediate >= price:
+            return MCEstimate(float(immediate), 0.0, moments.count)
+        return MCEstimate(float(price), float(np.sqrt(var)), moments.count)
+
+    def _exercise_boundary(self, coef, degree, basis, n_grid=2000):
+        """Critical spot price per exercise date implied by the regression coefficients."""
+        phi = 1.0 if self.option_type == 'call' else -1.0
+        grid = self.K * np.linspace(0.2, 3.0, n_grid)
+        exercise_value = phi * (grid - self.K)
+        continuation = _regression_basis(grid / self.K, degree, basis) @ coef[1:].T
+        exercise = (exercise_value[:, None] > 0) & (exercise_value[:, None] >= continuation)
+        # Puts are exercised below the boundary, calls above it
+        if phi < 0:
+            boundary = np.where(exercise, grid[:, None], -np.inf).max(axis=0)
+        else:
+            boundary = np.where(exercise, grid[:, None], np.inf).min(axis=0)
+        boundary = np.where(np.isfinite(boundary), boundary, np.nan)
+        return np.concatenate([[np.nan], boundary])
+
+
+def nearest_correlation(corr, eps=1e-10):
+    """
+    Repair a symmetric matrix into a positive definite correlation matrix.
+
+    Eigenvalues below `eps` are clipped and the result is rescaled to unit
+    diagonal. This one-step projection is enough for estimated or stressed
+    correlation matrices that are only slightly indefinite.
+    """
+    corr = 0.5 * (np.asarray(corr, dtype=float) + np.asarray(corr, dtype=float).T)
+    eigval, eigvec = np.linalg.eigh(corr)
+    repaired = (eigvec * np.maximum(eigval, eps)) @ eigvec.T
+    scale = 1.0 / np.sqrt(np.diag(repaired))
+    repaired *= np.outer(scale, scale)
+    np.fill_diagonal(repaired, 1.0)
+    return repaired
+
+
+@lru_cache(maxsize=32)
+def _correlation_factor(corr_bytes, n_assets):
+    """
+    Cholesky factor of a correlation matrix (repaired if needed) and whether it was repaired.
+
+    The cached factor is shared by every pricer built with the same
+    correlation, so it is returned read-only.
+    """
+    corr = np.frombuffer(corr_bytes).reshape(n_assets, n_assets)
+    try:
+        factor, repaired = np.linalg.cholesky(corr), False
+    except np.linalg.LinAlgError:
+        factor, repaired = np.linalg.cholesky(nearest_correlation(corr)), True
+    factor.setflags(write=False)
+    return factor, repaired
+
+
+def basket_payoff(weights, K, option_type='call', statistic='terminal'):
+    """
+    Payoff on a weighted basket, for `MultiAssetMonteCarloPricer.price_payoffs`.
+
+    With ``statistic='average'`` the basket is formed from each asset's
+    average price, which gives an Asian basket option.
+    """
+    phi = 1.0 if option_type == 'call' else -1.0
+    weights = np.asarray(weights, dtype=float)
+    return lambda stats: np.maximum(phi * (stats[statistic] @ weights - K), 0.0)
+
+
+def spread_payoff(K=0.0, option_type='call', assets=(0, 1)):
+    """Payoff on the spread ``S_i - S_j`` of two assets; ``K=0`` is Margrabe's exchange option."""
+    phi = 1.0 if option_type == 'call' else -1.0
+    i, j = assets
+    return lambda stats: np.maximum(phi * (stats['terminal'][:, i] - stats['terminal'][:, j] - K), 0.0)
+
+
+def rainbow_payoff(K, kind='best_of', option_type='call', reference=None):
+    """
+    Payoff on the best or worst of several assets, for `MultiAssetMonteCarloPricer.price_payoffs`.
+
+    `kind` is 'best_of' or 'worst_of'. If `reference` prices are given
+    (usually the initial spots), assets are compared on their performance
+    ``S_T / reference`` and `K` is a fraction of the reference, as in
+    worst-of notes.
+    """
+    if kind not in ('best_of', 'worst_of'):
+        raise ValueError("kind must be 'best_of' or 'worst_of'.")
+    phi = 1.0 if option_type == 'call' else -1.0
+    reduce = np.max if kind == 'best_of' else np.min
+    scale = None if reference is None else 1.0 / np.asarray(reference, dtype=float)
+
+    def payoff(stats):
+        level = stats['terminal'] if scale is None else stats['terminal'] * scale
+        return np.maximum(phi * (reduce(level, axis=1) - K), 0.0)
+    return payoff
+
+
+class MultiAssetMonteCarloPricer:
+    """
+    Prices options on several correlated geometric Brownian motions by Monte Carlo.
+
+    The correlation matrix is factored once (and shared between pricers
+    with the same matrix); if it is not positive definite it is repaired
+    with `nearest_correlation` and `psd_repaired` is set. Paths are
+    simulated in chunks, one time step at a time, keeping only each path's
+    current price and running average, maximum and minimum per asset in
+    `dtype` (float32 by default). Memory is therefore a few
+    ``(chunk_size, n_assets)`` arrays whatever the number of paths or time
+    steps: a 50-asset, one-million-path run needs only a few MB of path
+    state.
+
+    Parameters
+    ----------
+    S : array-like
+        Initial prices, shape (n_assets,).
+    sigma : float or array-like
+        Volatilities.
+    corr : array-like
+        Correlation matrix, shape (n_assets, n_assets).
+    T : float
+        Time to maturity in years.
+    r : float
+        Risk-free interest rate.
+    q : float or array-like, optional
+        Continuous dividend yields.
+    dtype : data-type, optional
+        Floating point type of the simulated paths.
+    """
+
+    def __init__(self, S, sigma, corr, T, r, q=0.0, dtype=np.float32):
+        self.S = np.atleast_1d(np.asarray(S, dtype=float))
+        n_assets = self.S.size
+        self.sigma = np.broadcast_to(np.asarray(sigma, dtype=float), (n_assets,)).copy()
+        self.q = np.broadcast_to(np.asarray(q, dtype=float), (n_assets,)).copy()
+        corr = np.ascontiguousarray(corr, dtype=float)
+        if corr.shape != (n_assets, n_assets):
+            raise ValueError(f"corr must have shape ({n_assets}, {n_assets}), got {corr.shape}.")
+        if not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0):
+            raise ValueError("corr must be symmetric with unit diagonal.")
+        self.cholesky, self.psd_repaired = _correlation_factor(corr.tobytes(), n_assets)
+        self.correlation = self.cholesky @ self.cholesky.T
+        self.T = T
+        self.r = r
+        self.dtype = np.dtype(dtype)
+
+    def stream_path_statistics(self, n_sims, n_steps=1, chunk_size=10000, seed=42, antithetic=False):
+        """
+        Simulate correlated paths chunk by chunk and yield per-path statistics.
+
+        Yields
+        ------
+        dict
+            Arrays of shape (chunk_size, n_assets) keyed by 'terminal',
+            'average' (over dates 1..n_steps), 'maximum' and 'minimum' (over
+            dates 0..n_steps). With `antithetic`, the second half of each
+            chunk uses the first half's normals with their signs flipped.
+        """
+        if antithetic and (n_sims % 2 or chunk_size % 2):
+            raise ValueError("n_sims and chunk_size must be even for antithetic sampling.")
+        dt = self.T / n_steps
+        n_assets = self.S.size
+        drift = ((self.r - self.q - 0.5 * self.sigma**2) * dt).astype(self.dtype)
+        # Row vector of normals times this matrix gives correlated log increments
+        loading = (self.cholesky * (self.sigma * np.sqrt(dt))[:, None]).T.astype(self.dtype)
+        S0 = self.S.astype(self.dtype)
+        n_draws = n_sims // 2 if antithetic else n_sims
+        draw_chunk = chunk_size // 2 if antithetic else chunk_size
+        for size, rng in _seeded_chunks(n_draws, draw_chunk, seed):
+            n_paths = 2 * size if antithetic else size
+            log_return = np.zeros((n_paths, n_assets), dtype=self.dtype)
+            total = np.zeros_like(log_return)
+            maximum = np.tile(S0, (n_paths, 1))
+            minimum = maximum.copy()
+            for _ in range(n_steps):
+                Z = rng.standard_normal((size, n_assets), dtype=self.dtype)
+                if antithetic:
+                    Z = np.concatenate([Z, -Z])
+                log_return += Z @ loading
+                log_return += drift
+                spot = np.exp(log_return)
+                spot *= S0
+                total += spot
+                np.maximum(maximum, spot, out=maximum)
+                np.minimum(minimum, spot, out=minimum)
+            total /= n_steps
+            yield {'terminal': spot, 'average': total, 'maximum': maximum, 'minimum': minimum}
+
+    def price_payoffs(self, payoffs, n_sims=100000, n_steps=1, chunk_size=10000, seed=42, antithetic=False):
+        """
+        Price several multi-asset payoffs off one stream of simulated paths.
+
+        Parameters
+        ----------
+        payoffs : dict
+            Maps a name to a callable that takes the per-path statistics of a
+            chunk (see `stream_path_statistics`) and returns undiscounted
+            payoffs, e.g. `basket_payoff`, `spread_payoff` or
+            `rainbow_payoff`.
+        n_sims : int, optional
+            Total number of simulated paths.
+        n_steps : int, optional
+            Number of time steps per path; 1 suffices for payoffs on the
+            terminal prices only.
+        chunk_size : int, optional
+            Number of paths simulated at once.
+        seed : int, optional
+            Root seed of the per-chunk seed sequence.
+        antithetic : bool, optional
+            Use antithetic variates.
+
+        Returns
+        -------
+        dict
+            Maps each payoff name to an `MCEstimate` of the discounted price.
+        """
+        disc = np.exp(-self.r * self.T)
+        moments = {name: _RunningMoments(1) for name in payoffs}
+        plain = {name: np.zeros(2) for name in payoffs}
+        for stats in self.stream_path_statistics(n_sims, n_steps, chunk_size, seed, antithetic):
+            for name, payoff in payoffs.items():
+                y = np.asarray(payoff(stats), dtype=float)
+                plain[name] += (y.sum(), (y * y).sum())
+                if antithetic:
+                    half = len(y) // 2
+                    y = 0.5 * (y[:half] + y[half:])
+                moments[name].update(y[:, None])
+
+        estimates = {}
+        for name, acc in moments.items():
+            var = acc.cov[0, 0] / acc.count
+            plain_var = (plain[name][1] / n_sims - (plain[name][0] / n_sims)**2) / n_sims
+            estimates[name] = MCEstimate(
+                float(disc * acc.mean[0]), float(disc * np.sqrt(var)), n_sims, float(plain_var / var),
+            )
+        return estimates
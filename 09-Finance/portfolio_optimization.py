@@ -0,0 +1,345 @@
+import numpy as np
+from scipy.linalg import blas, cho_factor, cho_solve
+from typing import NamedTuple
+
+# Active-set iterations between fresh factorizations of the free covariance block
+_REFACTOR_EVERY = 64
+
+
+def _square_view(buffer, size, max_size):
+    """A C-contiguous size x size matrix at the start of a flat buffer, reallocated with room to grow if needed."""
+    if buffer.size < size * size:
+        buffer = np.empty(min(4 * size * size, max_size * max_size))
+    return buffer, buffer[:size * size].reshape(size, size)
+
+
+def _symmetric_rank_one_update(matrix, alpha, x):
+    """``matrix += alpha * outer(x, x)`` in place for a C-contiguous symmetric matrix."""
+    # The transpose of a symmetric C-contiguous matrix is the same matrix in Fortran order
+    blas.dger(alpha, x, x, a=matrix.T, overwrite_a=True)
+
+
+class EfficientFrontier(NamedTuple):
+    """
+    Portfolios along a mean-variance efficient frontier.
+
+    `turning_points` holds the weights at which the set of assets at their
+    bounds changes (one row per point, from the maximum-return portfolio
+    down to the minimum-variance one); between consecutive turning points
+    the efficient weights are linear in the target return. It is empty for
+    the unconstrained frontier.
+    """
+    returns: np.ndarray
+    volatilities: np.ndarray
+    weights: np.ndarray
+    turning_points: np.ndarray
+
+
+class MeanVarianceOptimizer:
+    """
+    Markowitz mean-variance optimizer for fully invested portfolios.
+
+    Without bounds, every efficient portfolio with expected return m is
+    ``w = g + h m`` for two vectors g and h built from ``Sigma^-1 1`` and
+    ``Sigma^-1 mu``, so the whole frontier follows from one Cholesky
+    factorization of the covariance matrix.
+
+    With bounds ``lower <= w <= upper`` (``lower=0`` for long-only), the
+    frontier is traced by a parametric active-set method, Markowitz's
+    critical line algorithm. The problem ``min w'Sigma w / 2 - t mu'w``
+    subject to ``sum(w) = 1`` and the bounds is solved for all risk
+    tolerances t at once: starting from the maximum-return portfolio
+    (t = infinity), t is lowered and each solve is warm-started from the
+    active set of the previous turning point, at which exactly one asset
+    leaves or reaches a bound. Only the KKT system of the free assets is
+    solved, through an inverse of their covariance block that is bordered
+    or downdated in place in O(k^2) operations per turning point for k
+    free assets; the bound multipliers of the other assets take O(nk) more
+    for a dense covariance matrix of n assets. The cost therefore grows
+    with the number of assets held: long-only frontiers of a thousand
+    assets, of which a few dozen are held, take a few hundredths of a
+    second, but one along which all thousand enter passes a thousand
+    turning points and takes seconds. Frontier portfolios are interpolated
+    exactly between turning points.
+
+    Parameters
+    ----------
+    mu : array-like
+        Expected returns, shape (n_assets,).
+    cov : array-like or covariance.FactorCovariance
+        Covariance matrix, shape (n_assets, n_assets), positive definite. A
+        low-rank plus diagonal `FactorCovariance` is used as is: the closed
+        form goes through its Woodbury solve and the active-set method only
+        extracts the blocks of the free assets.
+    lower, upper : float or array-like, optional
+        Bounds on the weights. Both None (the default) allows any long or
+        short position. With bounds, `lower` must be finite; a missing
+        `upper` only caps weights at what the budget allows.
+
+    Examples
+    --------
+    >>> optimizer = MeanVarianceOptimizer(mu, cov, lower=0.0)
+    >>> frontier = optimizer.frontier(n_points=200)
+    >>> w_tangency = optimizer.tangency_portfolio(risk_free=0.02)
+    """
+
+    def __init__(self, mu, cov, lower=None, upper=None):
+        self.mu = np.asarray(mu, dtype=float)
+        # Structured covariances provide products, blocks and solves without a dense matrix
+        self._structured = hasattr(cov, 'solve') and hasattr(cov, 'block')
+        self.cov = cov if self._structured else np.asarray(cov, dtype=float)
+        n = self.mu.size
+        if self.cov.shape != (n, n):
+            raise ValueError(f"cov must have shape ({n}, {n}), got {self.cov.shape}.")
+        self.constrained = lower is not None or upper is not None
+        if self.constrained:
+            if lower is None:
+                raise ValueError("Box constraints need finite lower bounds.")
+            self.lower = np.broadcast_to(np.asarray(lower, dtype=float), n).copy()
+            upper = np.inf if upper is None else upper
+            self.upper = np.broadcast_to(np.asarray(upper, dtype=float), n).copy()
+            if not np.all(np.isfinite(self.lower)):
+                raise ValueError("Box constraints need finite lower bounds.")
+            # No weight can exceed what remains of the budget after the other lower bounds
+            self.upper = np.minimum(self.upper, 1 - (self.lower.sum() - self.lower))
+            if np.any(self.lower > self.upper) or self.lower.sum() > 1 or self.upper.sum() < 1:
+                raise ValueError("The bounds admit no fully invested portfolio.")
+            self._turning_points = None
+        else:
+            rhs = np.column_stack([np.ones(n), self.mu])
+            inv_one, inv_mu = (self.cov.solve(rhs) if self._structured else cho_solve(cho_factor(self.cov), rhs)).T
+            self._inv_one, self._inv_mu = inv_one, inv_mu
+            # The scalars A = 1'S^-1 1, B = 1'S^-1 mu, C = mu'S^-1 mu of the two-fund theorem
+            self._A, self._B, self._C = inv_one.sum(), inv_mu.sum(), self.mu @ inv_mu
+
+    @property
+    def n_assets(self):
+        return self.mu.size
+
+    def min_variance_portfolio(self):
+        """Weights of the (constrained) global minimum-variance portfolio."""
+        if self.constrained:
+            return self.turning_points()[-1].copy()
+        return self._inv_one / self._A
+
+    def max_return(self):
+        """Highest attainable expected return (infinite without bounds)."""
+        return self.mu @ self.turning_points()[0] if self.constrained else np.inf
+
+    def turning_points(self):
+        """
+        Weights at the corners of the constrained frontier, from maximum return to minimum variance.
+
+        Returns
+        -------
+        np.ndarray
+            Shape (n_turning_points, n_assets).
+        """
+        if not self.constrained:
+            raise ValueError("The unconstrained frontier has no turning points.")
+        if self._turning_points is None:
+            self._turning_points = self._critical_line()
+        return self._turning_points
+
+    def _cov_block(self, rows, cols):
+        return self.cov.block(rows, cols) if self._structured else self.cov[np.ix_(rows, cols)]
+
+    def _cov_column(self, i):
+        return self.cov.block(np.arange(self.n_assets), [i])[:, 0] if self._structured else self.cov[i]
+
+    def _cov_rows_combination(self, rows, coefficients):
+        """``coefficients.T @ S[rows]``, gathering rows of a dense S only while they are few."""
+        # Copying k of n rows costs as much as one product with all of S once k nears n / 2
+        if not self._structured and 2 * len(rows) < self.n_assets:
+            return coefficients.T @ self.cov[rows]
+        padded = np.zeros((coefficients.shape[1], self.n_assets))
+        padded[:, rows] = coefficients.T
+        return padded @ self.cov
+
+    def _max_return_corner(self):
+        """Fill the budget greedily by expected return; the last asset filled stays free."""
+        w = self.lower.copy()
+        at_upper = np.zeros(self.n_assets, dtype=bool)
+        budget = 1 - w.sum()
+        for i in np.argsort(-self.mu, kind='stable'):
+            room = self.upper[i] - self.lower[i]
+            if room >= budget:
+                w[i] += budget
+                return w, i, at_upper
+            w[i] = self.upper[i]
+            at_upper[i] = True
+            budget -= room
+        raise ValueError("The bounds admit no fully invested portfolio.")
+
+    def _critical_line(self, max_iter=None):
+        mu, cov, lower, upper = self.mu, self.cov, self.lower, self.upper
+        n = self.n_assets
+        w, first_free, at_upper = self._max_return_corner()
+        free = np.zeros(n, dtype=bool)
+        free[first_free] = True
+        # Inverse of the covariance block of the free assets, in the order of `order`. It lies
+        # contiguously at the start of one of two flat buffers, and each bordering or downdate
+        # writes its successor into the other instead of allocating a new matrix.
+        order = [first_free]
+        store, spare = 1 / self._cov_block([first_free], [first_free]).ravel(), np.empty(0)
+        inverse = store.reshape(1, 1)
+        points = [w.copy()]
+        t, last_changed = np.inf, -1
+        scale = np.abs(mu).max() + np.abs(cov.diagonal()).max()
+        for iteration in range(max_iter or 20 * n + 20):
+            F = np.array(order)
+            k = F.size
+            fixed = np.where(at_upper, upper, lower)
+            fixed[F] = 0.0
+            if iteration % _REFACTOR_EVERY == 0:
+                inverse[:] = cho_solve(cho_factor(self._cov_block(F, F)), np.eye(k))
+                cov_fixed = cov @ fixed
+            # KKT system of the free assets, affine in t, solved through the Schur complement of 1:
+            # S_FF w_F - nu 1 = -S_FB w_B + t mu_F,  1'w_F = 1 - sum(w_B)
+            # Row products with the symmetric inverse, which BLAS runs faster than column products
+            solved = np.vstack([np.ones(k), -cov_fixed[F], mu[F]]) @ inverse
+            inv_one, inv_rhs = solved[0], solved[1:].T
+            nu = (np.array([1 - fixed.sum(), 0.0]) - inv_rhs.sum(axis=0)) / inv_one.sum()
+            w_free = inv_rhs + np.outer(inv_one, nu)
+            w_const, w_slope = fixed.copy(), np.zeros(n)
+            w_const[F], w_slope[F] = w_free.T
+            # Bound multipliers z = S w - t mu - nu 1: >= 0 at lower bounds, <= 0 at upper bounds
+            cov_free = self._cov_rows_combination(F, w_free)
+            z_const = cov_fixed + cov_free[0] - nu[0]
+            z_slope = cov_free[1] - mu - nu[1]
+
+            # Largest t below the current one at which the active set changes
+            candidates = np.full(n, -np.inf)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = w_slope[F]
+                bound = np.where(slope > 0, lower[F], upper[F])
+                candidates[F] = np.where(slope != 0, (bound - w_const[F]) / slope, -np.inf)
+                leaving = ~free & np.where(at_upper, z_slope < 0, z_slope > 0)
+                candidates[leaving] = -z_const[leaving] / z_slope[leaving]
+            if last_changed >= 0:
+                candidates[last_changed] = -np.inf
+            tol = 1e-12 * (1 + (abs(t) if np.isfinite(t) else 0)) * scale
+            candidates[candidates > t + tol] = -np.inf
+            i = int(np.argmax(candidates))
+            t_next = candidates[i]
+            if t_next <= 0:
+                # No further change before t = 0, the global minimum-variance portfolio
+                points.append(w_const)
+                break
+            w = w_const + t_next * w_slope
+            if free[i]:
+                free[i] = False
+                at_upper[i] = w_slope[i] < 0
+                w[i] = upper[i] if at_upper[i] else lower[i]
+                cov_fixed += self._cov_column(i) * w[i]
+                # Swap asset i into the last position and drop it (Schur complement downdate)
+                p, last = order.index(i), k - 1
+                inverse[[p, last]] = inverse[[last, p]]
+                inverse[:, [p, last]] = inverse[:, [last, p]]
+                order[p] = order[last]
+                order.pop()
+                spare, reduced = _square_view(spare, last, n)
+                reduced[:] = inverse[:last, :last]
+                _symmetric_rank_one_update(reduced, -1 / inverse[last, last], inverse[:last, last])
+                store, spare, inverse = spare, store, reduced
+            else:
+                free[i] = True
+                cov_fixed -= self._cov_column(i) * fixed[i]
+                at_upper[i] = False
+                # Border the inverse with the new asset
+                column = self._cov_block(F, [i])[:, 0]
+                inv_column = inverse @ column
+                schur = self._cov_block([i], [i])[0, 0] - column @ inv_column
+                _symmetric_rank_one_update(inverse, 1 / schur, inv_column)
+                spare, bordered = _square_view(spare, k + 1, n)
+                bordered[:k, :k] = inverse
+                bordered[:k, k] = bordered[k, :k] = -inv_column / schur
+                bordered[k, k] = 1 / schur
+                store, spare, inverse = spare, store, bordered
+                order.append(i)
+            points.append(w)
+            t, last_changed = t_next, i
+        else:
+            raise RuntimeError("The critical line algorithm did not terminate.")
+        return np.array(points)
+
+    def _variances(self, weights):
+        return np.einsum('ij,ij->i', weights @ self.cov, weights)
+
+    def frontier(self, n_points=200, returns=None):
+        """
+        Efficient portfolios for a grid of target returns.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            Number of portfolios, evenly spaced in expected return from the
+            minimum-variance portfolio to the maximum-return portfolio (or,
+            without bounds, to the largest single-asset expected return).
+        returns : array-like, optional
+            Explicit target returns instead of the even grid.
+
+        Returns
+        -------
+        EfficientFrontier
+        """
+        if self.constrained:
+            corners = self.turning_points()
+            corner_returns = corners @ self.mu
+            m_low, m_high = corner_returns[-1], corner_returns[0]
+        else:
+            m_low, m_high = self._B / self._A, self.mu.max()
+        targets = np.linspace(m_low, m_high, n_points) if returns is None else np.asarray(returns, dtype=float)
+        if self.constrained:
+            if np.any((targets < m_low - 1e-12) | (targets > m_high + 1e-12)):
+                raise ValueError(f"Target returns must lie in [{m_low:.6g}, {m_high:.6g}].")
+            # Corners run from high to low return; the weights are linear in the return between them
+            ascending_returns, ascending = corner_returns[::-1], corners[::-1]
+            k = np.clip(np.searchsorted(ascending_returns, targets) - 1, 0, len(ascending) - 2)
+            span = ascending_returns[k + 1] - ascending_returns[k]
+            s = np.divide(targets - ascending_returns[k], span, out=np.zeros_like(targets), where=span > 0)
+            weights = ascending[k] + s[:, None] * (ascending[k + 1] - ascending[k])
+            variances = self._variances(weights)
+        else:
+            A, B, C = self._A, self._B, self._C
+            D = A * C - B**2
+            g = (C * self._inv_one - B * self._inv_mu) / D
+            h = (A * self._inv_mu - B * self._inv_one) / D
+            weights = g + targets[:, None] * h
+            corners = np.empty((0, self.n_assets))
+            variances = (A * targets**2 - 2 * B * targets + C) / D
+        return EfficientFrontier(targets, np.sqrt(np.maximum(variances, 0.0)), weights, corners)
+
+    def efficient_portfolio(self, target_return):
+        """Minimum-variance weights for one target expected return."""
+        return self.frontier(returns=[target_return]).weights[0]
+
+    def tangency_portfolio(self, risk_free=0.0):
+        """
+        Weights of the maximum Sharpe ratio portfolio.
+
+        Without bounds this is ``S^-1 (mu - rf) / 1'S^-1 (mu - rf)``. With
+        bounds the Sharpe ratio is maximized exactly on each segment between
+        turning points, where it is a ratio of a linear function to the
+        square root of a quadratic.
+        """
+        if not self.constrained:
+            excess = self._inv_mu - risk_free * self._inv_one
+            if excess.sum() <= 0:
+                raise ValueError("The risk-free rate must lie below the minimum-variance return.")
+            return excess / excess.sum()
+        corners = self.turning_points()
+        start, step = corners[1:], corners[:-1] - corners[1:]
+        m0, dm = start @ self.mu - risk_free, step @ self.mu
+        start_cov = start @ self.cov
+        a = np.einsum('ij,ij->i', start_cov, start)
+        b = np.einsum('ij,ij->i', start_cov, step)
+        c = np.einsum('ij,ij->i', step @ self.cov, step)
+        # d/ds of (m0 + s dm) / sqrt(a + 2 b s + c s^2) vanishes where s (dm b - m0 c) = m0 b - dm a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s_star = np.clip(np.nan_to_num((m0 * b - dm * a) / (dm * b - m0 * c)), 0.0, 1.0)
+        s = np.column_stack([np.zeros_like(m0), s_star, np.ones_like(m0)])
+        sharpe = (m0[:, None] + s * dm[:, None]) / np.sqrt(np.maximum(
+            a[:, None] + 2 * b[:, None] * s + c[:, None] * s**2, 1e-300))
+        k, j = np.unravel_index(np.argmax(sharpe), sharpe.shape)
+        return start[k] + s[k, j] * step[k]
@@ -0,0 +1,277 @@
+"""
+Chunked simulation of one-dimensional stochastic differential equations.
+
+A process ``dX = a(X, t) dt + b(X, t) dW`` is simulated with its exact
+transition law where one is known (geometric Brownian motion,
+Ornstein-Uhlenbeck and Cox-Ingersoll-Ross) and with the Euler or Milstein
+scheme otherwise; processes with an exact scheme derive from
+`ExactSDEProcess`. `simulate` is a generator: paths are produced in chunks
+of `chunk_size`, each drawing from its own child of
+``np.random.SeedSequence(seed)``, and the time loop runs in numba kernels
+that update the state of every path in place. Only one chunk's output and
+a small block of normals are held in memory, so the number of paths is
+bounded only by time, not by RAM.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+from numba import njit, prange
+from numba.extending import is_jitted
+
+# Number of time steps whose normals are drawn at once within a chunk
+_STEP_BLOCK = 32
+
+
+@njit(parallel=True)
+def _scheme_kernel(x, t0, dt, Z, drift, diffusion, diffusion_dx, params, milstein, out, col0, record):
+    """Advance every path in `x` by ``Z.shape[1]`` Euler or Milstein steps."""
+    sqrt_dt = np.sqrt(dt)
+    for i in prange(Z.shape[0]):
+        xi = x[i]
+        for j in range(Z.shape[1]):
+            t = t0 + j * dt
+            z = Z[i, j]
+            b = diffusion(xi, t, params)
+            step = drift(xi, t, params) * dt + b * sqrt_dt * z
+            if milstein:
+                step += 0.5 * b * diffusion_dx(xi, t, params) * dt * (z * z - 1.0)
+            xi += step
+            if record:
+                out[i, col0 + j + 1] = xi
+        x[i] = xi
+
+
+@njit(parallel=True)
+def _gaussian_kernel(x, a, b, c, Z, log_space, out, col0, record):
+    """
+    Advance every path by the exact Gaussian transition ``y' = a + b y + c z``.
+
+    With `log_space` the recursion applies to ``y = log x``, which is the
+    exact step of geometric Brownian motion.
+    """
+    for i in prange(Z.shape[0]):
+        xi = x[i]
+        for j in range(Z.shape[1]):
+            if log_space:
+                xi *= np.exp(a + c * Z[i, j])
+            else:
+                xi = a + b * xi + c * Z[i, j]
+            if record:
+                out[i, col0 + j + 1] = xi
+        x[i] = xi
+
+
+class SDEProcess:
+    """
+    A one-dimensional diffusion ``dX = drift(X, t) dt + diffusion(X, t) dW``.
+
+    Parameters
+    ----------
+    drift, diffusion : callable
+        Functions ``f(x, t, params) -> float`` of a scalar state, the time
+        and the parameter array. Plain Python functions are compiled with
+        ``numba.njit``, so they must be numba-compatible.
+    diffusion_dx : callable, optional
+        Derivative of `diffusion` with respect to x, with the same
+        signature. Required for the Milstein scheme.
+    params : sequence of float, optional
+        Passed as the third argument of the coefficient functions.
+
+    Examples
+    --------
+    A CEV process ``dX = mu X dt + sigma X**beta dW``:
+
+    >>> cev = SDEProcess(lambda x, t, p: p[0] * x,
+    ...                  lambda x, t, p: p[1] * abs(x)**p[2],
+    ...                  params=(0.05, 0.3, 0.7))
+    >>> terminal = np.concatenate(list(cev.simulate(1.0, 1.0, 50, 100000, terminal_only=True)))
+    """
+
+    def __init__(self, drift, diffusion, diffusion_dx=None, params=()):
+        self.drift = drift if is_jitted(drift) else njit(drift)
+        self.diffusion = diffusion if is_jitted(diffusion) else njit(diffusion)
+        self.diffusion_dx = None
+        if diffusion_dx is not None:
+            self.diffusion_dx = diffusion_dx if is_jitted(diffusion_dx) else njit(diffusion_dx)
+        self.params = np.asarray(params, dtype=float)
+
+    def simulate(self, x0, T, n_steps, n_paths, scheme=None, chunk_size=10000, seed=42,
+                 dtype=np.float64, terminal_only=False):
+        """
+        Simulate paths chunk by chunk.
+
+        Parameters
+        ----------
+        x0 : float
+            Initial value.
+        T : float
+            Horizon.
+        n_steps : int
+            Number of equally spaced time steps.
+        n_paths : int
+            Total number of paths.
+        scheme : str, optional
+            'exact', 'euler' or 'milstein'. Defaults to 'exact' for an
+            `ExactSDEProcess` and 'euler' otherwise.
+        chunk_size : int, optional
+            Number of paths per yielded chunk.
+        seed : int, optional
+            Root seed of the per-chunk seed sequence.
+        dtype : data-type, optional
+            Floating point type of the normals and the output, e.g.
+            ``np.float32`` to halve memory and bandwidth. The state itself
+            is always propagated in float64.
+        terminal_only : bool, optional
+            Yield only the values at `T` instead of whole paths. With the
+            exact scheme each path then takes a single transition from 0
+            to `T`.
+
+        Yields
+        ------
+        np.ndarray
+            Paths of shape (chunk, n_steps + 1) on the grid
+            ``np.linspace(0, T, n_steps + 1)``, or terminal values of shape
+            (chunk,) with `terminal_only`.
+        """
+        exact = isinstance(self, ExactSDEProcess)
+        scheme = scheme or ('exact' if exact else 'euler')
+        if scheme not in ('exact', 'euler', 'milstein'):
+            raise ValueError("scheme must be 'exact', 'euler' or 'milstein'.")
+        if scheme == 'exact' and not exact:
+            raise ValueError(f"{type(self).__name__} has no exact scheme; use 'euler' or 'milstein'.")
+        if scheme == 'milstein' and self.diffusion_dx is None:
+            raise ValueError("The Milstein scheme needs diffusion_dx.")
+        if scheme == 'exact' and terminal_only:
+            # The exact transition law holds over any horizon, so skip the intermediate dates
+            n_steps = 1
+        dt = T / n_steps
+        dtype = np.dtype(dtype)
+        n_chunks = -(-n_paths // chunk_size)
+        for c, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+            rng = np.random.default_rng(child)
+            size = min(chunk_size, n_paths - c * chunk_size)
+            x = np.full(size, float(x0))
+            if terminal_only:
+                out = np.empty((0, 0), dtype=dtype)
+            else:
+                out = np.empty((size, n_steps + 1), dtype=dtype)
+                out[:, 0] = x0
+            for start in range(0, n_steps, _STEP_BLOCK):
+                n = min(_STEP_BLOCK, n_steps - start)
+                if scheme == 'exact':
+                    self._exact_steps(x, dt, n, rng, dtype, out, start, not terminal_only)
+                else:
+                    Z = rng.standard_normal((size, n), dtype=dtype)
+                    _scheme_kernel(x, start * dt, dt, Z, self.drift, self.diffusion,
+                                   self.diffusion_dx or self.diffusion, self.params,
+                                   scheme == 'milstein', out, start, not terminal_only)
+            yield x.astype(dtype) if terminal_only else out
+
+
+class ExactSDEProcess(SDEProcess, ABC):
+    """
+    A diffusion whose transition law can be sampled exactly.
+
+    Subclasses implement `_exact_steps`, which `simulate` uses by default;
+    the Euler and Milstein schemes remain available for comparison.
+    """
+
+    @abstractmethod
+    def _exact_steps(self, x, dt, n, rng, dtype, out, col0, record):
+        """Advance `x` in place by `n` exact transitions, writing columns from `col0` + 1 of `out`."""
+
+
+@njit
+def _gbm_drift(x, t, p):
+    return p[0] * x
+
+
+@njit
+def _proportional_diffusion(x, t, p):
+    return p[1] * x
+
+
+@njit
+def _constant_diffusion_dx(x, t, p):
+    return p[1]
+
+
+@njit
+def _ou_drift(x, t, p):
+    return p[0] * (p[1] - x)
+
+
+@njit
+def _cir_drift(x, t, p):
+    return p[0] * (p[1] - max(x, 0.0))
+
+
+@njit
+def _ou_diffusion(x, t, p):
+    return p[2]
+
+
+@njit
+def _zero(x, t, p):
+    return 0.0
+
+
+@njit
+def _cir_diffusion(x, t, p):
+    return p[2] * np.sqrt(max(x, 0.0))
+
+
+@njit
+def _cir_diffusion_dx(x, t, p):
+    return 0.5 * p[2] / np.sqrt(x) if x > 0.0 else 0.0
+
+
+class GBMProcess(ExactSDEProcess):
+    """Geometric Brownian motion ``dS = mu S dt + sigma S dW``, sampled exactly in log space."""
+
+    def __init__(self, mu, sigma):
+        super().__init__(_gbm_drift, _proportional_diffusion, _constant_diffusion_dx, (mu, sigma))
+        self.mu, self.sigma = mu, sigma
+
+    def _exact_steps(self, x, dt, n, rng, dtype, out, col0, record):
+        Z = rng.standard_normal((len(x), n), dtype=dtype)
+        a = (self.mu - 0.5 * self.sigma**2) * dt
+        _gaussian_kernel(x, a, 1.0, self.sigma * np.sqrt(dt), Z, True, out, col0, record)
+
+
+class OUProcess(ExactSDEProcess):
+    """Ornstein-Uhlenbeck process ``dX = kappa (theta - X) dt + sigma dW``, sampled exactly."""
+
+    def __init__(self, kappa, theta, sigma):
+        super().__init__(_ou_drift, _ou_diffusion, _zero, (kappa, theta, sigma))
+        self.kappa, self.theta, self.sigma = kappa, theta, sigma
+
+    def _exact_steps(self, x, dt, n, rng, dtype, out, col0, record):
+        Z = rng.standard_normal((len(x), n), dtype=dtype)
+        decay = np.exp(-self.kappa * dt)
+        sd = self.sigma * np.sqrt((1 - decay**2) / (2 * self.kappa))
+        _gaussian_kernel(x, self.theta * (1 - decay), decay, sd, Z, False, out, col0, record)
+
+
+class CIRProcess(ExactSDEProcess):
+    """
+    Cox-Ingersoll-Ross process ``dX = kappa (theta - X) dt + sigma sqrt(X) dW``.
+
+    The exact scheme draws each transition from its scaled noncentral
+    chi-square law, so paths stay nonnegative for any step size. The
+    Euler and Milstein schemes use full truncation (the coefficients are
+    evaluated at ``max(X, 0)``).
+    """
+
+    def __init__(self, kappa, theta, sigma):
+        super().__init__(_cir_drift, _cir_diffusion, _cir_diffusion_dx, (kappa, theta, sigma))
+        self.kappa, self.theta, self.sigma = kappa, theta, sigma
+
+    def _exact_steps(self, x, dt, n, rng, dtype, out, col0, record):
+        decay = np.exp(-self.kappa * dt)
+        scale = self.sigma**2 * (1 - decay) / (4 * self.kappa)
+        df = 4 * self.kappa * self.theta / self.sigma**2
+        for j in range(n):
+            x[:] = scale * rng.noncentral_chisquare(df, x * (decay / scale))
+            if record:
+                out[:, col0 + j + 1] = x
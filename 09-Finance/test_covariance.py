@@ -0,0 +1,149 @@
+"""
+Regression tests for the shrinkage, EWMA and factor covariance estimators in covariance.
+
+Each estimator is checked against a brute-force implementation of its
+defining formula, and `FactorCovariance` against the dense matrix it
+represents, including inside the mean-variance optimizer.
+"""
+
+import numpy as np
+import pytest
+from covariance import FactorCovariance, ewma_covariance, ledoit_wolf, oas
+from portfolio_optimization import MeanVarianceOptimizer
+
+
+def make_factor_model(n_assets=40, n_factors=3, seed=0):
+    """A random factor covariance with a full-rank factor block."""
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal((n_factors, n_factors))
+    return FactorCovariance(rng.standard_normal((n_assets, n_factors)), A @ A.T / n_factors,
+                            rng.uniform(0.5, 2.0, n_assets))
+
+
+def brute_force_ledoit_wolf(X):
+    """Ledoit-Wolf shrinkage from the explicit outer products."""
+    X = X - X.mean(axis=0)
+    T, n = X.shape
+    S = X.T @ X / T
+    m = np.trace(S) / n
+    distance = np.sum((S - m * np.eye(n))**2) / n
+    dispersion = sum(np.sum((np.outer(x, x) - S)**2) for x in X) / (T**2 * n)
+    shrinkage = min(dispersion, distance) / distance
+    return (1 - shrinkage) * S + shrinkage * m * np.eye(n), shrinkage
+
+
+def brute_force_oas(X):
+    """Oracle approximating shrinkage from the dense sample covariance."""
+    X = X - X.mean(axis=0)
+    T, n = X.shape
+    S = X.T @ X / T
+    tr, tr_sq = np.trace(S), np.trace(S @ S)
+    shrinkage = min(((1 - 2 / n) * tr_sq + tr**2) / ((T + 1 - 2 / n) * (tr_sq - tr**2 / n)), 1.0)
+    return (1 - shrinkage) * S + shrinkage * tr / n * np.eye(n), shrinkage
+
+
+class TestCovarianceEstimators:
+    """Tests for shrinkage, EWMA and low-rank factor covariances."""
+
+    @pytest.mark.parametrize('estimator, reference', [(ledoit_wolf, brute_force_ledoit_wolf), (oas, brute_force_oas)])
+    @pytest.mark.parametrize('shape', [(200, 30), (20, 50)])
+    def test_shrinkage_matches_brute_force(self, estimator, reference, shape):
+        """Trace-based shrinkage equals the explicit formula whether there are more periods or more assets."""
+        rng = np.random.default_rng(1)
+        X = rng.standard_normal(shape) @ rng.standard_normal((shape[1], shape[1])) * 0.1 + 0.01
+        estimate = estimator(X)
+        covariance, shrinkage = reference(X)
+        assert estimate.shrinkage == pytest.approx(shrinkage, rel=1e-10)
+        np.testing.assert_allclose(estimate.covariance, covariance, rtol=1e-10, atol=1e-14)
+        assert np.all(np.linalg.eigvalsh(estimate.covariance) > 0)
+
+    def test_shrinkage_of_centered_data(self):
+        """With assume_centered the data are used as given."""
+        rng = np.random.default_rng(2)
+        X = rng.standard_normal((100, 10)) + 0.5
+        estimate = ledoit_wolf(X - X.mean(axis=0), assume_centered=True)
+        np.testing.assert_allclose(estimate.covariance, ledoit_wolf(X).covariance, rtol=1e-12)
+        with pytest.raises(ValueError):
+            oas(X[:, 0])
+
+    def test_ewma_matches_weighted_sum(self):
+        """EWMA equals the normalized weighted sum of outer products, and a half-life sets the decay."""
+        rng = np.random.default_rng(3)
+        X = rng.standard_normal((250, 6)) * 0.01
+        weights = 0.94**np.arange(249, -1, -1)
+        weights /= weights.sum()
+        expected = sum(w * np.outer(x, x) for w, x in zip(weights, X))
+        np.testing.assert_allclose(ewma_covariance(X), expected, rtol=1e-12)
+        halflife = np.log(0.5) / np.log(0.94)
+        np.testing.assert_allclose(ewma_covariance(X, halflife=halflife), expected, rtol=1e-10)
+        np.testing.assert_allclose(ewma_covariance(X, decay=1.0, demean=True), np.cov(X, rowvar=False, ddof=0),
+                                   rtol=1e-12)
+        with pytest.raises(ValueError):
+            ewma_covariance(X, decay=1.5)
+
+    def test_factor_covariance_products_and_blocks(self):
+        """Products, blocks, diagonal and scaling agree with the dense matrix."""
+        cov = make_factor_model()
+        dense = cov.to_dense()
+        x = np.random.default_rng(4).standard_normal((40, 3))
+        np.testing.assert_allclose(cov @ x[:, 0], dense @ x[:, 0], rtol=1e-12)
+        np.testing.assert_allclose(cov @ x, dense @ x, rtol=1e-12)
+        np.testing.assert_allclose(x.T @ cov, x.T @ dense, rtol=1e-12)
+        np.testing.assert_allclose(cov.diagonal(), np.diag(dense), rtol=1e-12)
+        np.testing.assert_allclose((12 * cov).to_dense(), 12 * dense, rtol=1e-12, atol=1e-12)
+        rows, cols = np.array([3, 7, 7, 20]), np.array([7, 0, 20])
+        np.testing.assert_allclose(cov.block(rows, cols), dense[np.ix_(rows, cols)], rtol=1e-12, atol=1e-12)
+        assert cov.shape == (40, 40) and cov.n_factors == 3
+
+    def test_woodbury_solve_and_logdet(self):
+        """The Woodbury solve and determinant lemma agree with dense linear algebra."""
+        cov = make_factor_model()
+        dense = cov.to_dense()
+        b = np.random.default_rng(5).standard_normal((40, 2))
+        np.testing.assert_allclose(cov.solve(b), np.linalg.solve(dense, b), rtol=1e-10)
+        np.testing.assert_allclose(cov.solve(b[:, 0]), np.linalg.solve(dense, b[:, 0]), rtol=1e-10)
+        assert cov.logdet() == pytest.approx(np.linalg.slogdet(dense)[1], rel=1e-12)
+
+    def test_singular_factor_covariance(self):
+        """A rank-deficient factor covariance still gives the exact inverse."""
+        rng = np.random.default_rng(6)
+        v = rng.standard_normal(3)
+        cov = FactorCovariance(rng.standard_normal((30, 3)), np.outer(v, v), rng.uniform(0.5, 2.0, 30))
+        b = rng.standard_normal(30)
+        np.testing.assert_allclose(cov.solve(b), np.linalg.solve(cov.to_dense(), b), rtol=1e-10)
+
+    def test_from_returns_matches_per_asset_regressions(self):
+        """Loadings and specific variances equal separate OLS regressions on the factors."""
+        rng = np.random.default_rng(7)
+        factors = 0.02 * rng.standard_normal((300, 3))
+        returns = 0.001 + factors @ rng.standard_normal((3, 15)) + 0.01 * rng.standard_normal((300, 15))
+        cov = FactorCovariance.from_returns(returns, factors)
+        design = np.column_stack([np.ones(300), factors])
+        for j in range(15):
+            coef, residual, *_ = np.linalg.lstsq(design, returns[:, j], rcond=None)
+            np.testing.assert_allclose(cov.loadings[j], coef[1:], rtol=1e-10)
+            assert cov.specific_var[j] == pytest.approx(residual[0] / (300 - 4), rel=1e-10)
+        np.testing.assert_allclose(cov.factor_cov, np.cov(factors, rowvar=False))
+
+    @pytest.mark.parametrize('lower, upper', [(None, None), (0.0, None), (0.0, 0.1)])
+    def test_optimizer_accepts_factor_covariance(self, lower, upper):
+        """The mean-variance optimizer gives the same frontier from the factor model as from its dense matrix."""
+        cov = make_factor_model()
+        mu = np.random.default_rng(8).uniform(0.02, 0.12, 40)
+        structured = MeanVarianceOptimizer(mu, cov, lower=lower, upper=upper).frontier(n_points=20)
+        dense = MeanVarianceOptimizer(mu, cov.to_dense(), lower=lower, upper=upper).frontier(n_points=20)
+        np.testing.assert_allclose(structured.weights, dense.weights, atol=1e-10)
+        np.testing.assert_allclose(structured.volatilities, dense.volatilities, rtol=1e-10)
+
+    def test_invalid_factor_models(self):
+        """Mismatched shapes and nonpositive specific variances are rejected."""
+        with pytest.raises(ValueError):
+            FactorCovariance(np.ones((5, 2)), np.eye(3), np.ones(5))
+        with pytest.raises(ValueError):
+            FactorCovariance(np.ones((5, 2)), np.eye(2), np.ones(4))
+        with pytest.raises(ValueError):
+            FactorCovariance(np.ones((5, 2)), np.eye(2), np.array([1.0, 1.0, 0.0, 1.0, 1.0]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,172 @@
+"""
+Regression tests for the credit models and copula portfolio simulator in credit_risk.
+
+Merton calibration and iterative KMV are checked to recover the asset
+values and volatilities behind synthetic equity panels, and the
+importance-sampled tail risk of a one-factor portfolio against its exact
+binomial-mixture loss distribution.
+"""
+
+import numpy as np
+import pytest
+from scipy.special import ndtr, ndtri
+from scipy.stats import binom
+from option_pricing import BSMPricer
+from credit_risk import (
+    CreditPortfolio, calibrate_merton, kmv_iterative, merton_model, reduced_form_model, sector_loadings,
+    vasicek_loss_quantile,
+)
+
+R = 0.03
+
+
+def equity_volatility(V, F, T, r, sigma):
+    """Equity volatility N(d1) sigma V / E implied by the Merton model."""
+    d1 = (np.log(V / F) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    return ndtr(d1) * sigma * V / merton_model(V, F, T, r, sigma)['Equity Value']
+
+
+def binomial_mixture_tail_risk(n, pd, rho, alpha, severity, n_nodes=200):
+    """Exact VaR and ES of a homogeneous one-factor Gaussian portfolio by Gauss-Hermite quadrature."""
+    z, w = np.polynomial.hermite_e.hermegauss(n_nodes)
+    p = ndtr((ndtri(pd) - np.sqrt(rho) * z) / np.sqrt(1 - rho))
+    k = np.arange(n + 1)
+    pmf = (w[:, None] / w.sum() * binom.pmf(k, n, p[:, None])).sum(axis=0)
+    exceedance = 1 - np.cumsum(pmf)
+    var = severity * k[np.argmax(exceedance <= 1 - alpha)]
+    es = var + pmf @ np.maximum(severity * k - var, 0.0) / (1 - alpha)
+    return var, es
+
+
+class TestMertonCalibration:
+    """Tests for the Merton model, its batched calibration and iterative KMV."""
+
+    def test_merton_model_is_a_call_on_assets(self):
+        """Equity is a Black-Scholes call on the assets and equity plus debt equals assets."""
+        V, sigma = np.linspace(60, 200, 8)[:, None], np.array([0.1, 0.3, 0.6])
+        result = merton_model(V, 100.0, 2.0, R, sigma)
+        np.testing.assert_allclose(result['Equity Value'], BSMPricer(V, 100.0, 2.0, R, sigma).price(), rtol=1e-12)
+        np.testing.assert_allclose(result['Equity Value'] + result['Debt Value'], np.broadcast_to(V, (8, 3)))
+        d2 = (np.log(V / 100.0) + (R - 0.5 * sigma**2) * 2.0) / (sigma * np.sqrt(2.0))
+        np.testing.assert_allclose(result['Default Probability'], ndtr(-d2), rtol=1e-12)
+
+    def test_reduced_form_spread_without_recovery(self):
+        """With zero recovery the credit spread equals the default intensity."""
+        lam = np.array([0.005, 0.02, 0.1])
+        result = reduced_form_model(100.0, 5.0, R, lam, 0.0)
+        np.testing.assert_allclose(result['Credit Spread (bps)'], lam * 1e4, rtol=1e-10)
+        np.testing.assert_allclose(result['Default Probability'], 1 - np.exp(-5 * lam))
+        assert np.all(reduced_form_model(100.0, 5.0, R, lam, 0.4)['Credit Spread (bps)'] < lam * 1e4)
+
+    def test_calibration_recovers_assets(self):
+        """Calibrating to model-generated equity recovers every firm's assets, including distressed ones."""
+        rng = np.random.default_rng(0)
+        V = rng.uniform(50, 200, (40, 50))
+        sigma = rng.uniform(0.1, 0.6, (40, 50))
+        E = merton_model(V, 100.0, 1.0, R, sigma)['Equity Value']
+        calibration = calibrate_merton(E, equity_volatility(V, 100.0, 1.0, R, sigma), 100.0, 1.0, R, mu=0.08)
+        assert calibration.converged.all()
+        assert calibration.asset_value.shape == (40, 50)
+        np.testing.assert_allclose(calibration.asset_value, V, rtol=1e-8)
+        np.testing.assert_allclose(calibration.asset_vol, sigma, rtol=1e-8)
+        dd = (np.log(V / 100.0) + (0.08 - 0.5 * sigma**2)) / sigma
+        np.testing.assert_allclose(calibration.distance_to_default, dd, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(calibration.default_probability, ndtr(-calibration.distance_to_default))
+
+    def test_calibration_flags_infeasible_firms(self):
+        """Firms without positive equity or volatility are left unconverged instead of raising."""
+        with np.errstate(divide='ignore'):
+            calibration = calibrate_merton([40.0, 0.0, 40.0], [0.5, 0.5, 0.0], 100.0, 1.0, R)
+        np.testing.assert_array_equal(calibration.converged, [True, False, False])
+
+    def test_kmv_recovers_asset_paths(self):
+        """Iterative KMV recovers asset paths whose realized volatility equals the generating one."""
+        rng = np.random.default_rng(1)
+        n_dates, n_firms, dt = 253, 50, 1 / 252
+        sigma = rng.uniform(0.15, 0.4, n_firms)
+        z = rng.standard_normal((n_dates - 1, n_firms))
+        # Standardized shocks make the generating volatility the KMV fixed point
+        z /= z.std(axis=0, ddof=1)
+        increments = (0.05 - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z
+        log_V = np.log(rng.uniform(120, 200, n_firms)) + np.vstack([np.zeros(n_firms), np.cumsum(increments, axis=0)])
+        equity = merton_model(np.exp(log_V), 100.0, 1.0, R, sigma)['Equity Value']
+        kmv = kmv_iterative(equity, 100.0, 1.0, R, dt=dt, tol=1e-10)
+        assert kmv.converged.all()
+        np.testing.assert_allclose(kmv.asset_vol, sigma, rtol=1e-8)
+        np.testing.assert_allclose(kmv.asset_value, np.exp(log_V), rtol=1e-8)
+        mu = increments.mean(axis=0) / dt + 0.5 * sigma**2
+        dd = (log_V[-1] - np.log(100.0) + mu - 0.5 * sigma**2) / sigma
+        np.testing.assert_allclose(kmv.distance_to_default, dd, rtol=1e-7)
+
+
+class TestCreditPortfolio:
+    """Tests for factor-copula loss simulation with importance sampling."""
+
+    N, PD, RHO, LGD, ALPHA = 500, 0.01, 0.15, 0.45, 0.999
+
+    def portfolio(self, **kwargs):
+        return CreditPortfolio.one_factor(np.ones(self.N), self.LGD, self.PD, self.RHO, **kwargs)
+
+    def test_importance_sampling_matches_exact_tail(self):
+        """Importance-sampled VaR and ES match the exact binomial mixture."""
+        var, es = binomial_mixture_tail_risk(self.N, self.PD, self.RHO, self.ALPHA, self.LGD)
+        risk = self.portfolio().tail_risk(self.ALPHA, n_sims=100000, seed=1)
+        assert risk.var == pytest.approx(var, abs=4 * risk.var_std_error + 1e-9)
+        assert risk.es == pytest.approx(es, abs=4 * risk.es_std_error)
+        assert risk.weights.mean() == pytest.approx(1.0, abs=0.05)
+
+    def test_importance_sampling_beats_plain_monte_carlo(self):
+        """On the same budget, importance sampling cuts the ES standard error at least tenfold."""
+        _, es = binomial_mixture_tail_risk(self.N, self.PD, self.RHO, self.ALPHA, self.LGD)
+        portfolio = self.portfolio()
+        shifted = portfolio.tail_risk(self.ALPHA, n_sims=100000, seed=1)
+        plain = portfolio.tail_risk(self.ALPHA, n_sims=100000, seed=1, importance_sampling=False)
+        assert plain.es == pytest.approx(es, abs=4 * plain.es_std_error)
+        assert shifted.es_std_error < plain.es_std_error / 10
+        np.testing.assert_array_equal(plain.weights, 1.0)
+
+    def test_one_factor_shift_is_the_vasicek_stress_scenario(self):
+        """In one factor the optimal shift is -N^-1(alpha), where the conditional loss is the Vasicek quantile."""
+        portfolio = self.portfolio()
+        z, w = np.polynomial.hermite_e.hermegauss(80)
+        conditional = portfolio.conditional_expected_loss(z[:, None])
+        assert conditional @ w / w.sum() == pytest.approx(portfolio.expected_loss, rel=1e-8)
+        shift = portfolio.importance_shift(self.ALPHA)
+        np.testing.assert_allclose(shift, [-ndtri(self.ALPHA)], rtol=1e-6)
+        assert portfolio.conditional_expected_loss(shift) == pytest.approx(
+            self.N * vasicek_loss_quantile(self.PD, self.RHO, self.ALPHA, self.LGD), rel=1e-6)
+
+    @pytest.mark.parametrize('copula, dof', [('gaussian', None), ('t', 4.0)])
+    def test_simulated_mean_loss_matches_expected_loss(self, copula, dof):
+        """Average simulated losses equal the expected loss under both copulas and sector loadings."""
+        rng = np.random.default_rng(2)
+        sector = rng.integers(0, 5, 300)
+        pd = rng.uniform(0.005, 0.05, 300)
+        portfolio = CreditPortfolio(rng.uniform(0.5, 2, 300), 0.6, pd, sector_loadings(sector, 0.3, 0.4),
+                                    copula=copula, dof=dof)
+        assert portfolio.n_factors == 6 + (copula == 't')
+        losses = np.concatenate([c['loss'] for c in portfolio.stream_losses(50000, chunk_size=7000, seed=3)])
+        assert losses.size == 50000
+        assert losses.mean() == pytest.approx(portfolio.expected_loss, abs=4 * losses.std() / np.sqrt(losses.size))
+
+    def test_sector_loadings_structure(self):
+        """Sector loadings have two nonzeros per row, on the global and the obligor's sector factor."""
+        B = sector_loadings(np.array([0, 2, 1, 2]), 0.3, np.array([0.1, 0.2, 0.3, 0.4]))
+        np.testing.assert_allclose(B.toarray(), [[0.3, 0.1, 0, 0], [0.3, 0, 0, 0.2],
+                                                 [0.3, 0, 0.3, 0], [0.3, 0, 0, 0.4]])
+        assert sector_loadings(np.array([0, 1]), 0.3, 0.4, n_sectors=4).shape == (2, 5)
+
+    def test_invalid_portfolios(self):
+        """Unknown copulas, missing degrees of freedom, degenerate PDs and excessive loadings are rejected."""
+        with pytest.raises(ValueError):
+            self.portfolio(copula='clayton')
+        with pytest.raises(ValueError):
+            self.portfolio(copula='t')
+        with pytest.raises(ValueError):
+            CreditPortfolio.one_factor(np.ones(3), 0.45, np.array([0.01, 0.0, 0.02]), 0.2)
+        with pytest.raises(ValueError):
+            CreditPortfolio(np.ones(2), 0.45, 0.01, np.array([[0.8, 0.7], [0.1, 0.1]]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,127 @@
+"""
+Regression tests for the characteristic-function models and Fourier pricers in fourier_pricing.
+
+The COS and Carr-Madan methods are checked against Black-Scholes, against
+Merton's Poisson series for jump-diffusions and against each other, and
+the Heston calibration is checked to recover the parameters behind a
+synthetic surface.
+"""
+
+import numpy as np
+import pytest
+from math import factorial
+from option_pricing import BSMPricer
+from fourier_pricing import (
+    BlackScholesModel, CharacteristicFunctionModel, HestonModel, MertonJumpModel, VarianceGammaModel,
+    calibrate_heston, carr_madan_price, cos_price,
+)
+
+S0, R = 100.0, 0.03
+STRIKES = np.linspace(70, 140, 15)
+MATURITIES = np.array([0.25, 1.0, 2.0])
+
+
+def merton_series_price(S, K, T, r, sigma, lam, mu_j, sigma_j, option_type='call', n_terms=60):
+    """Merton (1976) price as a Poisson mixture of Black-Scholes prices."""
+    kappa = np.exp(mu_j + 0.5 * sigma_j**2) - 1
+    lam_prime = lam * (1 + kappa)
+    total = 0.0
+    for n in range(n_terms):
+        sigma_n = np.sqrt(sigma**2 + n * sigma_j**2 / T)
+        r_n = r - lam * kappa + n * np.log(1 + kappa) / T
+        weight = np.exp(-lam_prime * T) * (lam_prime * T) ** n / factorial(n)
+        total = total + weight * BSMPricer(S, K, T, r_n, sigma_n, option_type).price()
+    return total
+
+
+class TestFourierPricing:
+    """Tests for the COS and Carr-Madan pricers and the Heston calibration."""
+
+    @pytest.mark.parametrize('option_type', ['call', 'put'])
+    def test_black_scholes_model_matches_bsm(self, option_type):
+        """Both Fourier methods reproduce Black-Scholes prices over a strike x maturity grid."""
+        K, T = STRIKES[:, None], MATURITIES
+        exact = BSMPricer(S0, K, T, R, 0.25, option_type).price()
+        model = BlackScholesModel(0.25)
+        np.testing.assert_allclose(cos_price(model, S0, K, T, R, option_type), exact, atol=1e-8)
+        np.testing.assert_allclose(carr_madan_price(model, S0, K, T, R, option_type), exact, atol=1e-4)
+
+    def test_merton_matches_poisson_series(self):
+        """The Merton jump-diffusion COS price matches Merton's series solution."""
+        params = dict(sigma=0.2, lam=0.8, mu_j=-0.1, sigma_j=0.15)
+        model = MertonJumpModel(**params)
+        for T in MATURITIES:
+            exact = merton_series_price(S0, STRIKES, T, R, **params)
+            np.testing.assert_allclose(cos_price(model, S0, STRIKES, T, R), exact, atol=1e-7)
+
+    @pytest.mark.parametrize('model', [
+        HestonModel(0.04, 1.5, 0.06, 0.6, -0.7),
+        VarianceGammaModel(0.2, 0.3, -0.15),
+    ])
+    def test_cos_and_carr_madan_agree(self, model):
+        """COS and Carr-Madan agree for stochastic-volatility and pure-jump models."""
+        K, T = STRIKES[:, None], MATURITIES
+        for option_type in ('call', 'put'):
+            cos = cos_price(model, S0, K, T, R, option_type)
+            fft = carr_madan_price(model, S0, K, T, R, option_type)
+            np.testing.assert_allclose(cos, fft, atol=2e-3)
+
+    def test_put_call_parity_and_mixed_types(self):
+        """Calls and puts priced in one call satisfy put-call parity."""
+        model = HestonModel(0.04, 1.5, 0.06, 0.6, -0.7)
+        prices = cos_price(model, S0, STRIKES, 1.0, R, np.array(['call', 'put'])[:, None])
+        np.testing.assert_allclose(prices[0] - prices[1], S0 - STRIKES * np.exp(-R), atol=1e-10)
+
+    def test_cumulants_of_black_scholes(self):
+        """Numerical cumulants of the log return match the Gaussian ones."""
+        c1, c2, c4 = BlackScholesModel(0.3).cumulants(2.0, R)
+        assert c1 == pytest.approx((R - 0.5 * 0.09) * 2.0, abs=1e-10)
+        assert c2 == pytest.approx(0.09 * 2.0, rel=1e-6)
+        assert c4 == pytest.approx(0.0, abs=1e-3)
+
+    def test_characteristic_function_is_cached_per_grid(self):
+        """Repeated evaluations on the same grid, maturity and rate reuse the cached values."""
+        model = HestonModel(0.04, 1.5, 0.06, 0.6, -0.7)
+        u = np.linspace(0, 50, 64)
+        first = model.char_func(u, 1.0, R)
+        assert model.char_func(u.copy(), 1.0, R) is first
+        assert model.char_func(u, 2.0, R) is not first
+        assert first[0] == pytest.approx(1.0)
+
+    def test_cache_follows_parameter_changes(self):
+        """Changing a parameter after pricing reprices with the new value, and the cache stays bounded."""
+        model = HestonModel(0.04, 1.5, 0.06, 0.6, -0.7)
+        before = carr_madan_price(model, S0, STRIKES, 1.0, R)
+        model.v0 = 0.09
+        after = carr_madan_price(model, S0, STRIKES, 1.0, R)
+        fresh = carr_madan_price(HestonModel(0.09, 1.5, 0.06, 0.6, -0.7), S0, STRIKES, 1.0, R)
+        np.testing.assert_allclose(after, fresh, rtol=1e-12)
+        assert np.all(after > before)
+        for T in np.linspace(0.1, 5.0, 100):
+            model.char_func(np.linspace(0, 50, 64), T, R)
+        assert len(model._cache) <= model._cache_size
+
+    def test_heston_calibration_recovers_parameters(self):
+        """Calibrating to a noiseless Heston surface recovers the generating parameters."""
+        truth = HestonModel(0.05, 2.0, 0.07, 0.5, -0.6)
+        K, T = (a.ravel() for a in np.meshgrid(np.linspace(80, 125, 10), np.array([0.25, 0.5, 1.0, 2.0])))
+        option_type = np.where(K < S0, 'put', 'call')
+        quotes = cos_price(truth, S0, K, T, R, option_type)
+        model, result = calibrate_heston(S0, K, T, R, quotes, option_type)
+        np.testing.assert_allclose(model.params, truth.params, rtol=0.02, atol=2e-3)
+        assert np.max(np.abs(result.fun)) < 1e-5
+
+    def test_base_class_is_abstract(self):
+        """Models must implement log_char_func."""
+        with pytest.raises(TypeError):
+            CharacteristicFunctionModel()
+
+        class Incomplete(CharacteristicFunctionModel):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
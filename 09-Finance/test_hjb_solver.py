@@ -0,0 +1,112 @@
+"""
+Regression tests for the upwind finite-difference HJB solver in hjb_solver.
+
+The frictionless problem is checked against Merton's closed-form
+consumption and portfolio rules, the constrained problem against its
+state constraints, and the comparative statics against fresh solves.
+"""
+
+import numpy as np
+import pytest
+from hjb_solver import MertonHJBSolver
+
+MU, R, SIGMA, GAMMA, RHO = 0.08, 0.03, 0.2, 3.0, 0.04
+
+
+class TestMertonHJBSolver:
+    """Tests for the constrained Merton consumption-portfolio solver."""
+
+    def test_frictionless_matches_merton_closed_form(self):
+        """Without income or borrowing, the risky share and C/W match Merton's rules away from the grid ends."""
+        sol = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO).solve()
+        assert sol.converged
+        share = (MU - R) / (GAMMA * SIGMA**2)
+        cw = (RHO - (1 - GAMMA) * (R + (MU - R)**2 / (2 * GAMMA * SIGMA**2))) / GAMMA
+        interior = (sol.wealth > 1) & (sol.wealth < 50)
+        np.testing.assert_allclose(sol.risky_share[interior], share, atol=5e-3)
+        np.testing.assert_allclose(sol.consumption[interior] / sol.wealth[interior], cw, rtol=1e-2)
+
+    def test_generator_is_a_monotone_transition_matrix(self):
+        """The generator has zero row sums, nonnegative off-diagonals and a stationary density."""
+        sol = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=5.0).solve()
+        A = sol.generator.toarray()
+        np.testing.assert_allclose(A.sum(axis=1), 0.0, atol=1e-10)
+        assert np.all(A - np.diag(np.diag(A)) >= 0)
+        system = A.T.copy()
+        system[0] = 1.0
+        rhs = np.zeros(len(A))
+        rhs[0] = 1.0
+        density = np.linalg.solve(system, rhs)
+        assert np.all(density > -1e-12)
+        np.testing.assert_allclose(A.T @ density, 0.0, atol=1e-10)
+
+    def test_constraints_hold(self):
+        """Risky holdings respect the borrowing limit and no-shorting, and wealth never drifts below the limit."""
+        b = 5.0
+        sol = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=b).solve()
+        assert sol.wealth[0] == pytest.approx(-b)
+        assert np.all(sol.risky_amount >= 0)
+        assert np.all(sol.risky_amount <= sol.wealth + b + 1e-12)
+        assert sol.drift[0] >= 0
+        assert np.all(np.diff(sol.value) > 0)
+        assert np.all(np.diff(sol.consumption) > 0)
+
+    def test_short_positions_when_excess_return_is_negative(self):
+        """With mu < r and shorting allowed, the agent shorts the risky asset within its bounds."""
+        sol = MertonHJBSolver(0.0, R, SIGMA, GAMMA, RHO, allow_short=True).solve()
+        interior = (sol.wealth > 1) & (sol.wealth < 50)
+        np.testing.assert_allclose(sol.risky_share[interior], -R / (GAMMA * SIGMA**2), atol=5e-3)
+        assert np.all(sol.risky_amount >= -sol.wealth - 1e-12)
+
+    def test_howard_steps_do_not_change_the_solution(self):
+        """Reusing each factorization for several steps converges to the same value function."""
+        solver = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=5.0)
+        reused = solver.solve(howard_steps=5)
+        fresh = solver.solve(howard_steps=1)
+        np.testing.assert_allclose(reused.value, fresh.value, rtol=1e-8)
+
+    def test_comparative_statics_match_fresh_solves(self):
+        """Warm-started solves match independent ones, need fewer iterations and restore the parameter."""
+        solver = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=5.0)
+        solutions = solver.comparative_statics('sigma', [0.15, 0.2, 0.25])
+        assert solver.sigma == SIGMA
+        fresh = MertonHJBSolver(MU, R, 0.25, GAMMA, RHO, income=1.0, borrowing_limit=5.0).solve()
+        np.testing.assert_allclose(solutions[-1].value, fresh.value, rtol=1e-8)
+        assert solutions[-1].n_iter < fresh.n_iter
+        shares = [np.nanmedian(s.risky_share) for s in solutions]
+        assert shares[0] > shares[1] > shares[2]
+
+    def test_borrowing_limit_statics_rebuild_the_grid(self):
+        """Tighter and looser borrowing limits move the grid's lower end and match fresh solves."""
+        solver = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=5.0)
+        limits = [4.0, 5.0, 6.0, 3.0]
+        solutions = solver.comparative_statics('borrowing_limit', limits)
+        for b, solution in zip(limits, solutions):
+            fresh = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, income=1.0, borrowing_limit=b).solve()
+            assert solution.converged
+            np.testing.assert_array_equal(solution.wealth, fresh.wealth)
+            np.testing.assert_allclose(solution.value, fresh.value, rtol=1e-8)
+            assert np.all(solution.risky_amount <= solution.wealth + b + 1e-12)
+        assert solutions[2].n_iter < solutions[0].n_iter
+        assert solver.borrowing_limit == 5.0 and solver.wealth[0] == pytest.approx(-5.0)
+
+    def test_invalid_parameters(self):
+        """Invalid parameters are rejected at construction and at every comparative-statics point."""
+        with pytest.raises(ValueError):
+            MertonHJBSolver(MU, R, SIGMA, 1.0, RHO)
+        with pytest.raises(ValueError):
+            MertonHJBSolver(MU, R, 0.0, GAMMA, RHO)
+        with pytest.raises(ValueError):
+            MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, borrowing_limit=-1.0)
+        with pytest.raises(ValueError):
+            MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO, borrowing_limit=1.0, w_min=-2.0)
+        solver = MertonHJBSolver(MU, R, SIGMA, GAMMA, RHO)
+        with pytest.raises(ValueError):
+            solver.comparative_statics('gamma', [2.0, 1.0])
+        assert solver.gamma == GAMMA
+        with pytest.raises(ValueError):
+            solver.comparative_statics('w_max', [50.0])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,476 @@
+"""
+Regression tests for the option pricing engines in option_pricing.
+
+Every engine is checked against an independent reference: the
+Black-Scholes-Merton formula, the closed-form geometric Asian and Margrabe
+prices, or a converged Leisen-Reimer lattice for American options.
+Monte Carlo estimates are compared within a few standard errors, with
+fixed seeds so the tests are deterministic.
+"""
+
+import numpy as np
+import pytest
+from scipy.special import ndtr
+from option_pricing import (
+    GREEKS_DTYPE, BSMPricer, BinomialPricer, FiniteDifferencePricer, MonteCarloPricer,
+    MultiAssetMonteCarloPricer, asian_payoff, barrier_payoff, basket_payoff, geometric_asian_payoff,
+    geometric_asian_price, implied_volatility, nearest_correlation, spread_payoff, vanilla_payoff,
+    _construct_increments,
+)
+
+S0, K, T, R, SIGMA = 100.0, 100.0, 1.0, 0.05, 0.2
+
+
+def bsm(S=S0, K=K, T=T, r=R, sigma=SIGMA, option_type='call'):
+    return BSMPricer(S, K, T, r, sigma, option_type)
+
+
+def american_put_reference(S=S0, K=K, T=T, r=R, sigma=SIGMA):
+    """Leisen-Reimer American put with Richardson extrapolation, accurate to about 1e-4."""
+    return BinomialPricer(S, K, T, r, sigma, 'put').price(801, 'american', 'leisen_reimer', richardson=True)
+
+
+class TestBSMPricer:
+    """Tests for the vectorized Black-Scholes-Merton pricer."""
+
+    def test_greeks_match_finite_differences(self):
+        """Analytic Greeks agree with central differences of the price, in the pricer's units."""
+        S = np.array([80.0, 100.0, 120.0])
+        for option_type in ('call', 'put'):
+            greeks = bsm(S, option_type=option_type).price_and_greeks()
+            h = 1e-3
+            delta = (bsm(S + h, option_type=option_type).price() - bsm(S - h, option_type=option_type).price()) / (2 * h)
+            gamma = (bsm(S + h, option_type=option_type).price() - 2 * bsm(S, option_type=option_type).price()
+                     + bsm(S - h, option_type=option_type).price()) / h**2
+            vega = (bsm(S, sigma=SIGMA + h, option_type=option_type).price()
+                    - bsm(S, sigma=SIGMA - h, option_type=option_type).price()) / (2 * h) / 100
+            rho = (bsm(S, r=R + h, option_type=option_type).price()
+                   - bsm(S, r=R - h, option_type=option_type).price()) / (2 * h) / 100
+            theta = -(bsm(S, T=T + h, option_type=option_type).price()
+                      - bsm(S, T=T - h, option_type=option_type).price()) / (2 * h) / 365
+            np.testing.assert_allclose(greeks['delta'], delta, atol=1e-7)
+            np.testing.assert_allclose(greeks['gamma'], gamma, atol=1e-5)
+            np.testing.assert_allclose(greeks['vega'], vega, rtol=1e-5)
+            np.testing.assert_allclose(greeks['rho'], rho, rtol=1e-5)
+            np.testing.assert_allclose(greeks['theta'], theta, rtol=1e-5)
+
+    def test_put_call_parity_over_a_broadcast_book(self):
+        """Calls and puts priced in one broadcast book satisfy put-call parity."""
+        strikes = np.linspace(60, 140, 9)[:, None]
+        maturities = np.array([0.1, 0.5, 2.0])
+        book = BSMPricer(S0, strikes, maturities, R, SIGMA, np.array(['call', 'put'])[:, None, None])
+        prices = book.price()
+        assert prices.shape == (2, 9, 3)
+        np.testing.assert_allclose(prices[0] - prices[1], S0 - strikes * np.exp(-R * maturities), atol=1e-10)
+        assert book.price_and_greeks().dtype == GREEKS_DTYPE
+
+    def test_expired_contracts_are_worth_intrinsic_value(self):
+        """Expired contracts return intrinsic value and zero Greeks."""
+        out = BSMPricer(np.array([90.0, 110.0]), K, 0.0, R, SIGMA, 'call').price_and_greeks()
+        np.testing.assert_allclose(out['price'], [0.0, 10.0])
+        for greek in ('delta', 'gamma', 'vega', 'theta', 'rho'):
+            np.testing.assert_array_equal(out[greek], 0.0)
+
+    def test_scalar_interface_is_unchanged(self):
+        """Scalar inputs give floats and get_greeks keeps its dict form."""
+        pricer = bsm()
+        assert pricer.price() == pytest.approx(10.450583572185565, rel=1e-12)
+        greeks = pricer.get_greeks()
+        assert set(greeks) == {'delta', 'gamma', 'vega', 'theta', 'rho'}
+        assert np.ndim(greeks['delta']) == 0
+
+    def test_invalid_option_type(self):
+        """Unknown option types are rejected."""
+        with pytest.raises(ValueError):
+            bsm(option_type='straddle')
+
+
+class TestImpliedVolatility:
+    """Tests for the vectorized implied-volatility solver."""
+
+    def test_roundtrip_over_a_surface(self):
+        """Prices generated by BSM invert back to their volatilities, deep in and out of the money."""
+        rng = np.random.default_rng(0)
+        n = 5000
+        S = 100.0
+        K_grid = S * np.exp(rng.uniform(-1.0, 1.0, n))
+        T_grid = rng.uniform(0.02, 3.0, n)
+        sigma = rng.uniform(0.05, 1.5, n)
+        option_type = np.where(rng.random(n) < 0.5, 'call', 'put')
+        prices = BSMPricer(S, K_grid, T_grid, R, sigma, option_type).price()
+        # Skip prices indistinguishable from their bounds in double precision
+        lower = np.maximum(np.where(option_type == 'call', 1, -1) * (S - K_grid * np.exp(-R * T_grid)), 0)
+        usable = prices - lower > 1e-8 * S
+        iv, converged = implied_volatility(prices, S, K_grid, T_grid, R, option_type)
+        assert converged[usable].all()
+        np.testing.assert_allclose(iv[usable], sigma[usable], rtol=1e-6)
+
+    def test_prices_outside_arbitrage_bounds_give_nan(self):
+        """Prices below intrinsic value or above the spot are flagged as unsolvable."""
+        iv, converged = implied_volatility(np.array([-1.0, 1e-3, 150.0]), S0, 90.0, T, R, 'call')
+        assert np.isnan(iv).all()
+        assert not converged.any()
+
+    def test_scalar_input_gives_scalar_output(self):
+        """A single contract returns scalars."""
+        iv, converged = implied_volatility(bsm().price(), S0, K, T, R)
+        assert np.ndim(iv) == 0 and converged
+        assert iv == pytest.approx(SIGMA, abs=1e-10)
+
+
+class TestChunkedMonteCarlo:
+    """Tests for chunked, memory-bounded path simulation."""
+
+    def test_european_matches_bsm(self):
+        """The European estimate lies within four standard errors of Black-Scholes."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        est = pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=100000, n_steps=1, seed=1)['call']
+        assert est.n_paths == 100000
+        assert abs(est.price - bsm().price()) < 4 * est.std_error
+
+    def test_results_are_reproducible_and_chunking_is_consistent(self):
+        """A seed reproduces the estimate exactly, and every chunk size gives a statistically equal price."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        payoffs = {'asian': asian_payoff(K), 'barrier': barrier_payoff(K, 130.0)}
+        first = pricer.price_payoffs(payoffs, n_sims=20000, n_steps=50, chunk_size=3000, seed=5)
+        second = pricer.price_payoffs(payoffs, n_sims=20000, n_steps=50, chunk_size=3000, seed=5)
+        assert first == second
+        other = pricer.price_payoffs(payoffs, n_sims=20000, n_steps=50, chunk_size=20000, seed=5)
+        for name in payoffs:
+            assert abs(other[name].price - first[name].price) < 4 * np.hypot(other[name].std_error, first[name].std_error)
+
+    def test_path_statistics_cover_every_path(self):
+        """The stream yields each path once, with consistent running statistics."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        chunks = list(pricer.stream_path_statistics(2500, 20, chunk_size=1000, seed=0))
+        assert [len(c['terminal']) for c in chunks] == [1000, 1000, 500]
+        for c in chunks:
+            assert np.all(c['maximum'] >= np.maximum(c['terminal'], S0))
+            assert np.all(c['minimum'] <= np.minimum(c['terminal'], S0))
+            assert np.all(c['geometric_average'] <= c['average'] + 1e-12)
+
+    def test_legacy_helpers_keep_their_signatures(self):
+        """price, price_asian and price_barrier still return floats."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        assert pricer.price(n_sims=50000) == pytest.approx(bsm().price(), abs=0.3)
+        assert isinstance(pricer.price_asian(n_sims=5000, n_steps=20), float)
+        assert 0.0 < pricer.price_barrier(130.0, n_sims=5000, n_steps=20) < bsm().price()
+
+
+class TestVarianceReduction:
+    """Tests for antithetic, moment matching, control variate and importance sampling estimates."""
+
+    def test_geometric_control_for_arithmetic_asian(self):
+        """The geometric Asian control cuts the variance of the arithmetic Asian by orders of magnitude."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        control = (geometric_asian_payoff(K), geometric_asian_price(S0, K, T, R, SIGMA, 50))
+        plain = pricer.price_payoffs({'asian': asian_payoff(K)}, n_sims=50000, n_steps=50, seed=2)['asian']
+        controlled = pricer.price_payoffs({'asian': asian_payoff(K)}, n_sims=50000, n_steps=50, seed=2,
+                                          controls={'asian': control})['asian']
+        assert controlled.variance_reduction > 100
+        assert abs(controlled.price - plain.price) < 4 * plain.std_error
+
+    def test_geometric_asian_closed_form(self):
+        """The closed-form geometric Asian price matches plain Monte Carlo."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'put')
+        est = pricer.price_payoffs({'geo': geometric_asian_payoff(K, 'put')}, n_sims=100000, n_steps=12, seed=3)['geo']
+        assert abs(est.price - geometric_asian_price(S0, K, T, R, SIGMA, 12, 'put')) < 4 * est.std_error
+
+    def test_antithetic_and_moment_matching_are_unbiased(self):
+        """Antithetic variates reduce variance and both options stay unbiased."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        payoff = {'call': vanilla_payoff(K)}
+        antithetic = pricer.price_payoffs(payoff, n_sims=50000, n_steps=1, seed=4, antithetic=True)['call']
+        matched = pricer.price_payoffs(payoff, n_sims=50000, n_steps=1, chunk_size=2500, seed=4,
+                                       moment_matching=True)['call']
+        assert antithetic.variance_reduction > 1.5
+        for est in (antithetic, matched):
+            assert abs(est.price - bsm().price()) < 4 * est.std_error
+
+    def test_importance_sampling_for_a_deep_out_of_the_money_call(self):
+        """Shifting the drift to a far strike is unbiased and far more precise than plain sampling."""
+        strike = 200.0
+        pricer = MonteCarloPricer(S0, strike, T, R, SIGMA, 'call')
+        shift = pricer.drift_shift_to(strike, 1)
+        est = pricer.price_payoffs({'call': vanilla_payoff(strike)}, n_sims=50000, n_steps=1, seed=5,
+                                   drift_shift=shift)['call']
+        assert est.variance_reduction > 20
+        assert abs(est.price - bsm(K=strike).price()) < 4 * est.std_error
+
+    def test_controls_for_unknown_payoffs_are_rejected(self):
+        """Controls must refer to a priced payoff."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        with pytest.raises(ValueError):
+            pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=100, controls={'other': (vanilla_payoff(K), 1.0)})
+
+
+class TestQuasiMonteCarlo:
+    """Tests for scrambled Sobol sampling and bridge/PCA path construction."""
+
+    @pytest.mark.parametrize('construction', ['brownian_bridge', 'pca'])
+    def test_constructions_give_brownian_increments(self, construction):
+        """Bridge and PCA constructions map independent normals to independent unit increments."""
+        Z = np.random.default_rng(0).standard_normal((200000, 16))
+        increments = _construct_increments(Z, construction)
+        np.testing.assert_allclose(np.cov(increments, rowvar=False), np.identity(16), atol=0.02)
+        # Both constructions load the first normal most heavily on the terminal value
+        terminal = increments.sum(axis=1)
+        assert np.corrcoef(terminal, Z[:, 0])[0, 1] > 0.9
+
+    def test_bridge_first_normal_sets_the_terminal_value(self):
+        """In the Brownian bridge the first normal alone determines W(T)."""
+        Z = np.random.default_rng(1).standard_normal((10, 16))
+        terminal = _construct_increments(Z, 'brownian_bridge').sum(axis=1)
+        np.testing.assert_allclose(terminal, 4.0 * Z[:, 0], rtol=1e-12)
+
+    def test_sobol_pca_beats_pseudo_random_for_asians(self):
+        """Sobol points with PCA construction price the Asian far more precisely, without bias."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        payoff = {'asian': asian_payoff(K)}
+        pseudo = pricer.price_payoffs(payoff, n_sims=2**14, n_steps=64, chunk_size=2**12, seed=6)['asian']
+        sobol = pricer.price_payoffs(payoff, n_sims=2**14, n_steps=64, chunk_size=2**10, seed=6,
+                                     sampler='sobol', construction='pca')['asian']
+        assert sobol.std_error < pseudo.std_error / 10
+        assert abs(sobol.price - pseudo.price) < 4 * pseudo.std_error
+
+    def test_sobol_european_matches_bsm(self):
+        """A Sobol estimate of the European price agrees with Black-Scholes."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        est = pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=2**14, n_steps=1, seed=7,
+                                   sampler='sobol')['call']
+        assert abs(est.price - bsm().price()) < max(4 * est.std_error, 1e-3)
+
+    def test_invalid_sampler_options(self):
+        """Replication counts must divide the paths, and unknown samplers are rejected."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        with pytest.raises(ValueError):
+            pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=1000, sampler='sobol', n_replications=16)
+        with pytest.raises(ValueError):
+            pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=1000, sampler='halton')
+        with pytest.raises(ValueError):
+            pricer.price_payoffs({'call': vanilla_payoff(K)}, n_sims=1000, construction='spiral')
+
+
+class TestLongstaffSchwartz:
+    """Tests for least-squares Monte Carlo American pricing."""
+
+    def test_american_put_matches_lattice(self):
+        """The out-of-sample LSM put is just below the lattice price, within its bias and noise."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'put')
+        est = pricer.price_american(n_sims=100000, n_steps=50, seed=8)
+        reference = american_put_reference()
+        assert est.price < reference + 3 * est.std_error
+        assert est.price > reference - 0.05
+        assert pricer.in_sample_price > est.price - 3 * est.std_error
+
+    def test_exercise_boundary_is_below_the_strike_and_rises_to_it(self):
+        """The put exercise boundary lies below K and increases towards maturity."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'put')
+        pricer.price_american(n_sims=50000, n_steps=25, seed=9)
+        boundary = pricer.exercise_boundary
+        assert np.isnan(boundary[0]) and boundary.shape == (25,)
+        assert np.all(boundary[1:] < K)
+        assert boundary[-1] > boundary[1]
+
+    def test_american_call_without_dividends_is_european(self):
+        """Early exercise of a call on a non-dividend stock is never optimal."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        est = pricer.price_american(n_sims=50000, n_steps=20, basis='polynomial', seed=10)
+        assert abs(est.price - bsm().price()) < 4 * est.std_error + 0.05
+
+    def test_deep_in_the_money_put_is_exercised_immediately(self):
+        """When continuation is worth less than exercise at time zero the intrinsic value is returned."""
+        est = MonteCarloPricer(40.0, K, T, R, SIGMA, 'put').price_american(n_sims=20000, n_steps=10, seed=11)
+        assert est.price == pytest.approx(K - 40.0)
+        assert est.std_error == 0.0
+
+
+class TestLatticePricer:
+    """Tests for the numba CRR, Leisen-Reimer and trinomial lattices."""
+
+    def test_leisen_reimer_converges_to_bsm(self):
+        """Leisen-Reimer European prices are accurate to about 1e-5 at a few hundred steps."""
+        strikes = np.array([80.0, 100.0, 120.0])
+        for option_type in ('call', 'put'):
+            lattice = BinomialPricer(S0, strikes, T, R, SIGMA, option_type).price(301, method='leisen_reimer')
+            np.testing.assert_allclose(lattice, bsm(K=strikes, option_type=option_type).price(), atol=2e-5)
+
+    @pytest.mark.parametrize('method', ['crr', 'trinomial'])
+    def test_smoothing_and_richardson_reduce_error(self, method):
+        """Black-Scholes smoothing with Richardson extrapolation beats the raw tree."""
+        pricer = BinomialPricer(S0, 105.0, T, R, SIGMA, 'call')
+        exact = bsm(K=105.0).price()
+        raw = pricer.price(200, method=method)
+        improved = pricer.price(200, method=method, smoothing=True, richardson=True)
+        assert abs(improved - exact) < abs(raw - exact) / 5
+        assert abs(improved - exact) < 1e-3
+
+    def test_american_put_agrees_across_lattices(self):
+        """CRR, trinomial and Leisen-Reimer agree on the American put, which exceeds the European."""
+        pricer = BinomialPricer(S0, K, T, R, SIGMA, 'put')
+        reference = american_put_reference()
+        for method in ('crr', 'trinomial', 'leisen_reimer'):
+            price = pricer.price(1000, 'american', method, smoothing=method != 'leisen_reimer')
+            assert price == pytest.approx(reference, abs=2e-3)
+        assert reference > bsm(option_type='put').price() + 0.3
+
+    def test_grid_broadcasting_matches_one_by_one(self):
+        """A strike x maturity grid priced in one call equals contract-by-contract prices."""
+        strikes = np.array([90.0, 100.0, 110.0])[:, None]
+        maturities = np.array([0.25, 1.0])
+        grid = BinomialPricer(S0, strikes, maturities, R, SIGMA, 'put').price(101, 'american')
+        assert grid.shape == (3, 2)
+        for i, k in enumerate(strikes[:, 0]):
+            for j, t in enumerate(maturities):
+                assert grid[i, j] == BinomialPricer(S0, k, t, R, SIGMA, 'put').price(101, 'american')
+
+    def test_invalid_lattice_options(self):
+        """Unknown methods, exercise types and too few smoothed steps are rejected."""
+        pricer = BinomialPricer(S0, K, T, R, SIGMA, 'call')
+        with pytest.raises(ValueError):
+            pricer.price(100, method='jarrow_rudd')
+        with pytest.raises(ValueError):
+            pricer.price(100, exercise_type='bermudan')
+        with pytest.raises(ValueError):
+            pricer.price(1, smoothing=True)
+
+
+class TestFiniteDifferencePricer:
+    """Tests for the Crank-Nicolson finite-difference pricer."""
+
+    def test_european_price_and_greeks_match_bsm(self):
+        """European prices, deltas and gammas match Black-Scholes across the grid."""
+        for option_type in ('call', 'put'):
+            grid = FiniteDifferencePricer(S0, K, T, R, SIGMA, option_type).price_grid(801, 400)
+            inner = (grid['spot'] > 70) & (grid['spot'] < 140)
+            exact = BSMPricer(grid['spot'][inner], K, T, R, SIGMA, option_type).price_and_greeks()
+            np.testing.assert_allclose(grid['price'][inner], exact['price'], atol=2e-3)
+            np.testing.assert_allclose(grid['delta'][inner], exact['delta'], atol=2e-4)
+            np.testing.assert_allclose(grid['gamma'][inner], exact['gamma'], atol=2e-5)
+
+    def test_european_error_falls_with_the_grid(self):
+        """Doubling the grid in space and time cuts the error about fourfold."""
+        pricer = FiniteDifferencePricer(S0, K, T, R, SIGMA, 'call')
+        exact = bsm().price()
+        coarse = abs(pricer.price(n_space=201, n_time=100) - exact)
+        fine = abs(pricer.price(n_space=401, n_time=200) - exact)
+        assert fine < coarse / 3
+
+    @pytest.mark.parametrize('early_exercise', ['penalty', 'psor'])
+    def test_american_put_matches_leisen_reimer(self, early_exercise):
+        """Both early-exercise solvers reproduce the Leisen-Reimer American put."""
+        pricer = FiniteDifferencePricer(S0, K, T, R, SIGMA, 'put')
+        price = pricer.price(n_space=801, n_time=400, exercise_type='american', early_exercise=early_exercise)
+        assert price == pytest.approx(american_put_reference(), abs=5e-4)
+
+    def test_american_put_respects_early_exercise(self):
+        """The American put never falls below intrinsic value and has delta -1 deep in the money."""
+        grid = FiniteDifferencePricer(S0, 110.0, T, R, 0.25, 'put').price_grid(801, 400, 'american')
+        intrinsic = np.maximum(110.0 - grid['spot'], 0.0)
+        assert np.all(grid['price'] >= intrinsic - 1e-6)
+        deep = (grid['spot'] > 50) & (grid['spot'] < 75)
+        np.testing.assert_allclose(grid['delta'][deep], -1.0, atol=1e-3)
+        greeks = FiniteDifferencePricer(S0, 110.0, T, R, 0.25, 'put').get_greeks(
+            n_space=801, n_time=400, exercise_type='american')
+        h = 0.5
+        up, down = (BinomialPricer(S0 + s, 110.0, T, R, 0.25, 'put').price(2001, 'american', 'leisen_reimer')
+                    for s in (h, -h))
+        assert greeks['delta'] == pytest.approx((up - down) / (2 * h), abs=2e-3)
+
+    def test_invalid_options(self):
+        """Unknown exercise styles and solvers, and option books, are rejected."""
+        pricer = FiniteDifferencePricer(S0, K, T, R, SIGMA, 'put')
+        with pytest.raises(ValueError):
+            pricer.price_grid(exercise_type='bermudan')
+        with pytest.raises(ValueError):
+            pricer.price_grid(exercise_type='american', early_exercise='policy')
+        with pytest.raises(ValueError):
+            FiniteDifferencePricer(S0, K, T, R, SIGMA, np.array(['call', 'put'])).price_grid()
+
+
+class TestMultiAssetMonteCarlo:
+    """Tests for the correlated multi-asset Monte Carlo pricer."""
+
+    def test_single_asset_matches_bsm(self):
+        """With one asset a basket call is a vanilla call."""
+        pricer = MultiAssetMonteCarloPricer([S0], SIGMA, [[1.0]], T, R)
+        est = pricer.price_payoffs({'call': basket_payoff([1.0], K)}, n_sims=100000, seed=12)['call']
+        assert abs(est.price - bsm().price()) < 4 * est.std_error
+
+    def test_exchange_option_matches_margrabe(self):
+        """A zero-strike spread option matches Margrabe's formula."""
+        S, sigma, rho = np.array([100.0, 95.0]), np.array([0.3, 0.2]), 0.4
+        pricer = MultiAssetMonteCarloPricer(S, sigma, [[1.0, rho], [rho, 1.0]], T, R, dtype=np.float64)
+        est = pricer.price_payoffs({'exchange': spread_payoff()}, n_sims=100000, seed=13, antithetic=True)['exchange']
+        vol = np.sqrt(sigma[0]**2 + sigma[1]**2 - 2 * rho * sigma[0] * sigma[1]) * np.sqrt(T)
+        d1 = (np.log(S[0] / S[1]) + 0.5 * vol**2) / vol
+        margrabe = S[0] * ndtr(d1) - S[1] * ndtr(d1 - vol)
+        assert abs(est.price - margrabe) < 4 * est.std_error
+
+    def test_correlation_factor_is_cached_and_read_only(self):
+        """Pricers with the same correlation share one read-only Cholesky factor."""
+        corr = np.array([[1.0, 0.5], [0.5, 1.0]])
+        first = MultiAssetMonteCarloPricer([S0, S0], SIGMA, corr, T, R)
+        second = MultiAssetMonteCarloPricer([S0, S0], SIGMA, corr.copy(), T, R)
+        assert first.cholesky is second.cholesky
+        assert not first.cholesky.flags.writeable
+        with pytest.raises(ValueError):
+            first.cholesky[0, 0] = 2.0
+        np.testing.assert_allclose(first.correlation, corr)
+
+    def test_indefinite_correlation_is_repaired(self):
+        """An indefinite correlation matrix is repaired and flagged."""
+        corr = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+        pricer = MultiAssetMonteCarloPricer([S0] * 3, SIGMA, corr, T, R)
+        assert pricer.psd_repaired
+        np.testing.assert_allclose(pricer.correlation, nearest_correlation(corr), atol=1e-12)
+        assert np.linalg.eigvalsh(pricer.correlation).min() > 0
+
+    def test_invalid_correlation(self):
+        """Correlation matrices of the wrong shape or without unit diagonal are rejected."""
+        with pytest.raises(ValueError):
+            MultiAssetMonteCarloPricer([S0, S0], SIGMA, np.identity(3), T, R)
+        with pytest.raises(ValueError):
+            MultiAssetMonteCarloPricer([S0, S0], SIGMA, [[2.0, 0.0], [0.0, 1.0]], T, R)
+
+
+class TestMonteCarloGreeks:
+    """Tests for pathwise, likelihood-ratio and common-random-number greeks."""
+
+    @pytest.mark.parametrize('method', ['pathwise', 'likelihood_ratio', 'crn'])
+    def test_european_greeks_match_bsm(self, method):
+        """Every estimator recovers the Black-Scholes price, delta, gamma, vega and rho."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        est = pricer.price_greeks({'call': vanilla_payoff(K)}, n_sims=200000, n_steps=1, seed=14,
+                                  method=method)['call']
+        exact = bsm().price_and_greeks()
+        for greek in ('price', 'delta', 'gamma', 'vega', 'rho'):
+            assert abs(est[greek].price - exact[greek]) < 4 * est[greek].std_error + 1e-3 * abs(exact[greek]), greek
+
+    def test_pathwise_delta_is_more_precise_than_likelihood_ratio(self):
+        """Pathwise delta has a much smaller standard error than the likelihood-ratio delta."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        payoff = {'call': vanilla_payoff(K)}
+        pathwise = pricer.price_greeks(payoff, n_sims=50000, n_steps=1, seed=15)['call']
+        likelihood = pricer.price_greeks(payoff, n_sims=50000, n_steps=1, seed=15, method='likelihood_ratio')['call']
+        assert pathwise['delta'].std_error < likelihood['delta'].std_error / 2
+
+    def test_geometric_asian_greeks_match_closed_form(self):
+        """Pathwise greeks of a geometric Asian match differences of its closed-form price."""
+        pricer = MonteCarloPricer(S0, K, T, R, SIGMA, 'call')
+        est = pricer.price_greeks({'geo': geometric_asian_payoff(K)}, n_sims=100000, n_steps=12, seed=16,
+                                  antithetic=True)['geo']
+        h = 1e-4
+        delta = (geometric_asian_price(S0 + h, K, T, R, SIGMA, 12) - geometric_asian_price(S0 - h, K, T, R, SIGMA, 12)) / (2 * h)
+        vega = (geometric_asian_price(S0, K, T, R, SIGMA + h, 12) - geometric_asian_price(S0, K, T, R, SIGMA - h, 12)) / (2 * h) / 100
+        assert abs(est['delta'].price - delta) < 4 * est['delta'].std_error
+        assert abs(est['vega'].price - vega) < 4 * est['vega'].std_error
+
+    def test_invalid_method(self):
+        """Unknown greek estimators are rejected."""
+        with pytest.raises(ValueError):
+            MonteCarloPricer(S0, K, T, R, SIGMA, 'call').price_greeks({'call': vanilla_payoff(K)}, method='adjoint')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,145 @@
+"""
+Regression tests for the mean-variance frontier engine in portfolio_optimization.
+
+The unconstrained frontier is checked against the bordered KKT system,
+and the critical line algorithm against SLSQP and the KKT conditions of
+the bounded problem.
+"""
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+from portfolio_optimization import MeanVarianceOptimizer
+
+
+def make_market(n_assets=25, seed=0):
+    """Expected returns and a three-factor covariance matrix."""
+    rng = np.random.default_rng(seed)
+    B = 0.15 * rng.standard_normal((n_assets, 3))
+    cov = B @ B.T + np.diag(rng.uniform(0.01, 0.05, n_assets))
+    return rng.uniform(0.02, 0.15, n_assets), cov
+
+
+def slsqp_portfolio(mu, cov, target, lower, upper):
+    """Minimum-variance weights for a target return by SLSQP."""
+    n = mu.size
+    constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1}, {'type': 'eq', 'fun': lambda w: w @ mu - target}]
+    result = minimize(lambda w: w @ cov @ w, np.full(n, 1 / n), jac=lambda w: 2 * cov @ w,
+                      bounds=[(lower, upper)] * n, constraints=constraints, method='SLSQP',
+                      options={'ftol': 1e-15, 'maxiter': 1000})
+    return result.x
+
+
+class TestMeanVarianceOptimizer:
+    """Tests for the closed-form and critical-line mean-variance frontiers."""
+
+    def test_unconstrained_frontier_solves_kkt_system(self):
+        """Closed-form frontier weights solve the bordered KKT system at every target return."""
+        mu, cov = make_market()
+        frontier = MeanVarianceOptimizer(mu, cov).frontier(n_points=9)
+        n = mu.size
+        kkt = np.block([[2 * cov, -np.ones((n, 1)), -mu[:, None]],
+                        [np.ones((1, n)), np.zeros((1, 2))],
+                        [mu[None, :], np.zeros((1, 2))]])
+        for m, w, vol in zip(frontier.returns, frontier.weights, frontier.volatilities):
+            expected = np.linalg.solve(kkt, np.concatenate([np.zeros(n), [1.0, m]]))[:n]
+            np.testing.assert_allclose(w, expected, atol=1e-10)
+            assert vol == pytest.approx(np.sqrt(w @ cov @ w), rel=1e-10)
+        assert frontier.turning_points.shape == (0, n)
+
+    def test_unconstrained_min_variance_and_tangency(self):
+        """The minimum-variance and tangency portfolios have their closed forms and the tangency maximizes Sharpe."""
+        mu, cov = make_market()
+        optimizer = MeanVarianceOptimizer(mu, cov)
+        inv_one = np.linalg.solve(cov, np.ones(mu.size))
+        np.testing.assert_allclose(optimizer.min_variance_portfolio(), inv_one / inv_one.sum(), rtol=1e-10)
+        excess = np.linalg.solve(cov, mu - 0.02)
+        tangency = optimizer.tangency_portfolio(risk_free=0.02)
+        np.testing.assert_allclose(tangency, excess / excess.sum(), rtol=1e-10)
+        frontier = optimizer.frontier(n_points=500)
+        sharpe = (frontier.returns - 0.02) / frontier.volatilities
+        assert (tangency @ mu - 0.02) / np.sqrt(tangency @ cov @ tangency) >= sharpe.max() - 1e-12
+
+    @pytest.mark.parametrize('upper', [None, 0.15])
+    def test_critical_line_matches_slsqp(self, upper):
+        """Long-only and capped frontier portfolios match SLSQP, which never finds a lower variance."""
+        mu, cov = make_market()
+        frontier = MeanVarianceOptimizer(mu, cov, lower=0.0, upper=upper).frontier(n_points=7)
+        for m, w in zip(frontier.returns, frontier.weights):
+            reference = slsqp_portfolio(mu, cov, m, 0.0, upper)
+            np.testing.assert_allclose(w, reference, atol=1e-6)
+            assert reference @ cov @ reference >= (w @ cov @ w) * (1 - 1e-10)
+
+    @pytest.mark.parametrize('upper', [None, 0.15])
+    def test_frontier_satisfies_kkt_conditions(self, upper):
+        """Free assets share one marginal trade-off and assets at a bound would not improve by moving off it."""
+        mu, cov = make_market()
+        optimizer = MeanVarianceOptimizer(mu, cov, lower=0.0, upper=upper)
+        cap = np.inf if upper is None else upper
+        for w in optimizer.frontier(n_points=15).weights[1:-1]:
+            assert w.sum() == pytest.approx(1.0)
+            assert np.all(w >= -1e-12) and np.all(w <= cap + 1e-12)
+            # Stationarity cov w = t mu + lam + nu on the free assets, with nu = 0 there
+            free = (w > 1e-9) & (w < cap - 1e-9)
+            (t, lam), *_ = np.linalg.lstsq(np.column_stack([mu[free], np.ones(free.sum())]), (cov @ w)[free],
+                                           rcond=None)
+            nu = cov @ w - t * mu - lam
+            assert t >= 0
+            np.testing.assert_allclose(nu[free], 0.0, atol=1e-10)
+            assert np.all(nu[w <= 1e-9] >= -1e-10)
+            assert np.all(nu[w >= cap - 1e-9] <= 1e-10)
+
+    def test_turning_points_order_and_frontier_shape(self):
+        """Turning points run from maximum return to minimum variance and frontier volatility rises with return."""
+        mu, cov = make_market()
+        optimizer = MeanVarianceOptimizer(mu, cov, lower=0.0)
+        corners = optimizer.turning_points()
+        np.testing.assert_allclose(corners.sum(axis=1), 1.0)
+        assert np.all(np.diff(corners @ mu) <= 0)
+        assert optimizer.max_return() == pytest.approx(mu.max())
+        np.testing.assert_allclose(optimizer.min_variance_portfolio(), corners[-1])
+        frontier = optimizer.frontier(n_points=100)
+        assert np.all(np.diff(frontier.volatilities) > 0)
+        np.testing.assert_allclose(optimizer.efficient_portfolio(frontier.returns[40]), frontier.weights[40])
+
+    def test_every_asset_entering_reaches_unconstrained_min_variance(self):
+        """When all assets enter one by one, the last turning point is the unconstrained minimum-variance portfolio."""
+        mu, cov = make_market(n_assets=200)
+        corners = MeanVarianceOptimizer(mu, cov, lower=0.0).turning_points()
+        assert len(corners) == mu.size + 1
+        inv_one = np.linalg.solve(cov, np.ones(mu.size))
+        np.testing.assert_allclose(corners[-1], inv_one / inv_one.sum(), atol=1e-12)
+        np.testing.assert_allclose(corners.sum(axis=1), 1.0)
+
+    def test_constrained_tangency_maximizes_sharpe(self):
+        """The bounded tangency portfolio beats every frontier point and matches an SLSQP Sharpe maximization."""
+        mu, cov = make_market()
+        optimizer = MeanVarianceOptimizer(mu, cov, lower=0.0, upper=0.15)
+        w = optimizer.tangency_portfolio(risk_free=0.02)
+        best = (w @ mu - 0.02) / np.sqrt(w @ cov @ w)
+        frontier = optimizer.frontier(n_points=1000)
+        assert best >= ((frontier.returns - 0.02) / frontier.volatilities).max() - 1e-12
+        result = minimize(lambda x: -(x @ mu - 0.02) / np.sqrt(x @ cov @ x), np.full(mu.size, 1 / mu.size),
+                          bounds=[(0.0, 0.15)] * mu.size, constraints={'type': 'eq', 'fun': lambda x: x.sum() - 1},
+                          method='SLSQP', options={'ftol': 1e-15, 'maxiter': 1000})
+        assert best == pytest.approx(-result.fun, rel=1e-8)
+
+    def test_invalid_inputs(self):
+        """Mismatched shapes, infeasible bounds and out-of-range targets are rejected."""
+        mu, cov = make_market()
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov[:-1, :-1])
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov, upper=0.2)
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov, lower=0.0, upper=0.03)
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov).turning_points()
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov).tangency_portfolio(risk_free=1.0)
+        with pytest.raises(ValueError):
+            MeanVarianceOptimizer(mu, cov, lower=0.0).efficient_portfolio(mu.max() + 0.01)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,105 @@
+"""
+Regression tests for the chunked SDE simulator in sde_simulation.
+
+Exact schemes are checked against the known transition moments of GBM,
+Ornstein-Uhlenbeck and CIR, and the Euler and Milstein schemes against
+exact GBM paths driven by the same normals.
+"""
+
+import numpy as np
+import pytest
+from sde_simulation import CIRProcess, ExactSDEProcess, GBMProcess, OUProcess, SDEProcess
+
+
+def terminal_values(process, x0, T, n_steps, n_paths, **kwargs):
+    return np.concatenate(list(process.simulate(x0, T, n_steps, n_paths, terminal_only=True, **kwargs)))
+
+
+class TestSDESimulation:
+    """Tests for exact and discretized simulation of one-dimensional diffusions."""
+
+    def test_gbm_exact_moments(self):
+        """Exact GBM terminal values have the lognormal mean and variance."""
+        mu, sigma, T = 0.08, 0.3, 2.0
+        x = terminal_values(GBMProcess(mu, sigma), 100.0, T, 50, 200000, seed=0)
+        mean = 100.0 * np.exp(mu * T)
+        var = mean**2 * (np.exp(sigma**2 * T) - 1)
+        assert x.mean() == pytest.approx(mean, abs=4 * np.sqrt(var / x.size))
+        assert x.var() == pytest.approx(var, rel=0.03)
+
+    def test_ou_exact_moments(self):
+        """Exact OU values at T have the Gaussian transition mean and variance."""
+        kappa, theta, sigma, T = 1.5, 0.04, 0.02, 1.0
+        x = terminal_values(OUProcess(kappa, theta, sigma), 0.1, T, 20, 200000, seed=1)
+        mean = theta + (0.1 - theta) * np.exp(-kappa * T)
+        var = sigma**2 * (1 - np.exp(-2 * kappa * T)) / (2 * kappa)
+        assert x.mean() == pytest.approx(mean, abs=4 * np.sqrt(var / x.size))
+        assert x.var() == pytest.approx(var, rel=0.02)
+
+    def test_cir_exact_moments_and_positivity(self):
+        """Exact CIR paths stay nonnegative and have the noncentral chi-square moments."""
+        kappa, theta, sigma, x0, T = 0.5, 0.04, 0.3, 0.02, 1.0
+        paths = np.concatenate(list(CIRProcess(kappa, theta, sigma).simulate(x0, T, 12, 100000, seed=2)))
+        assert paths.min() >= 0.0
+        decay = np.exp(-kappa * T)
+        mean = theta + (x0 - theta) * decay
+        var = x0 * sigma**2 / kappa * (decay - decay**2) + theta * sigma**2 / (2 * kappa) * (1 - decay)**2
+        assert paths[:, -1].mean() == pytest.approx(mean, abs=4 * np.sqrt(var / len(paths)))
+        assert paths[:, -1].var() == pytest.approx(var, rel=0.03)
+
+    def test_milstein_converges_faster_than_euler(self):
+        """On the same Brownian paths, Milstein's strong error falls like dt and Euler's like sqrt(dt)."""
+        gbm = GBMProcess(0.05, 0.4)
+        errors = {'euler': [], 'milstein': []}
+        for n_steps in (16, 64):
+            exact = np.concatenate(list(gbm.simulate(1.0, 1.0, n_steps, 20000, scheme='exact', seed=3)))
+            for scheme in errors:
+                approx = np.concatenate(list(gbm.simulate(1.0, 1.0, n_steps, 20000, scheme=scheme, seed=3)))
+                errors[scheme].append(np.abs(approx[:, -1] - exact[:, -1]).mean())
+        assert errors['milstein'][1] < errors['euler'][1] / 5
+        assert errors['euler'][0] / errors['euler'][1] == pytest.approx(2.0, rel=0.25)
+        assert errors['milstein'][0] / errors['milstein'][1] == pytest.approx(4.0, rel=0.25)
+
+    def test_chunks_shapes_and_reproducibility(self):
+        """Paths come in chunks on the time grid, start at x0 and are reproducible for a seed."""
+        ou = OUProcess(1.0, 0.0, 0.5)
+        chunks = list(ou.simulate(1.0, 1.0, 40, 2500, chunk_size=1000, seed=4))
+        assert [c.shape for c in chunks] == [(1000, 41), (1000, 41), (500, 41)]
+        assert all(np.all(c[:, 0] == 1.0) for c in chunks)
+        again = list(ou.simulate(1.0, 1.0, 40, 2500, chunk_size=1000, seed=4))
+        np.testing.assert_array_equal(chunks[1], again[1])
+        single = next(ou.simulate(1.0, 1.0, 40, 10, dtype=np.float32, seed=4))
+        assert single.dtype == np.float32
+
+    def test_custom_process_uses_euler(self):
+        """A user-defined diffusion defaults to Euler and matches GBM when given GBM coefficients."""
+        process = SDEProcess(lambda x, t, p: p[0] * x, lambda x, t, p: p[1] * x,
+                             lambda x, t, p: p[1], params=(0.05, 0.2))
+        gbm = GBMProcess(0.05, 0.2)
+        custom = next(process.simulate(1.0, 1.0, 100, 1000, seed=5))
+        builtin = next(gbm.simulate(1.0, 1.0, 100, 1000, scheme='euler', seed=5))
+        np.testing.assert_allclose(custom, builtin, rtol=1e-12)
+        milstein = next(process.simulate(1.0, 1.0, 100, 1000, scheme='milstein', seed=5))
+        assert milstein.shape == (1000, 101)
+
+    def test_invalid_schemes(self):
+        """Unknown schemes, exact sampling without a known law and Milstein without diffusion_dx are rejected."""
+        process = SDEProcess(lambda x, t, p: 0.0, lambda x, t, p: 1.0)
+        with pytest.raises(ValueError):
+            next(process.simulate(0.0, 1.0, 10, 10, scheme='exact'))
+        with pytest.raises(ValueError):
+            next(process.simulate(0.0, 1.0, 10, 10, scheme='milstein'))
+        with pytest.raises(ValueError):
+            next(GBMProcess(0.05, 0.2).simulate(1.0, 1.0, 10, 10, scheme='runge_kutta'))
+
+    def test_exact_base_class_is_abstract(self):
+        """An ExactSDEProcess must implement _exact_steps."""
+        class Incomplete(ExactSDEProcess):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete(lambda x, t, p: 0.0, lambda x, t, p: 1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
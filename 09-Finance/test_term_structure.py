@@ -0,0 +1,193 @@
+"""
+Regression tests for the yield curve, bond portfolio and short-rate models in term_structure.
+
+Curves are checked for knot reproduction, forward-rate properties and
+par repricing, and bond analytics against direct cash-flow sums and
+finite differences of parallel shifts. Affine bond prices of the
+short-rate models are checked against Monte Carlo discounting along their
+own simulated paths.
+"""
+
+import numpy as np
+import pytest
+from term_structure import BondPortfolio, CIRModel, HullWhiteModel, ShortRateModel, VasicekModel, YieldCurve
+
+KNOTS = np.array([0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0, 30.0])
+ZEROS = np.array([0.030, 0.032, 0.035, 0.037, 0.040, 0.041, 0.043, 0.045, 0.044])
+
+
+def path_discount(times, rates):
+    """exp(-integral of r) along each path by the trapezoidal rule."""
+    dt = np.diff(times)
+    return np.exp(-np.cumsum(0.5 * (rates[:, 1:] + rates[:, :-1]) * dt, axis=1))
+
+
+class TestYieldCurve:
+    """Tests for curve interpolation, bootstrapping and bond analytics."""
+
+    @pytest.mark.parametrize('method', YieldCurve.METHODS)
+    def test_curve_reproduces_knots(self, method):
+        """Every scheme returns the knot zero rates and a unit discount factor at zero."""
+        curve = YieldCurve(KNOTS, ZEROS, method)
+        np.testing.assert_allclose(curve.zero_rate(KNOTS), ZEROS, rtol=1e-12)
+        assert curve.discount(0.0) == pytest.approx(1.0)
+        t = np.linspace(0.01, 40, 500)
+        assert np.all(np.diff(curve.discount(t)) < 0)
+
+    def test_log_linear_forwards_are_piecewise_constant(self):
+        """Log-linear interpolation gives the discrete forward on each interval."""
+        curve = YieldCurve(KNOTS, ZEROS, 'log_linear')
+        discrete = np.diff(np.concatenate([[0.0], ZEROS * KNOTS])) / np.diff(np.concatenate([[0.0], KNOTS]))
+        mid = 0.5 * (np.concatenate([[0.0], KNOTS[:-1]]) + KNOTS)
+        np.testing.assert_allclose(curve.forward_rate(mid - 1e-3, mid + 1e-3), discrete, rtol=1e-8)
+
+    def test_monotone_convex_forwards_are_continuous_and_positive(self):
+        """Monotone convex forwards have no jumps at the knots and stay positive."""
+        curve = YieldCurve(KNOTS, ZEROS, 'monotone_convex')
+        h = 1e-6
+        left = curve.forward_rate(KNOTS[:-1] - 2 * h, KNOTS[:-1] - h)
+        right = curve.forward_rate(KNOTS[:-1] + h, KNOTS[:-1] + 2 * h)
+        np.testing.assert_allclose(left, right, atol=1e-4)
+        t = np.linspace(0.0, 30.0, 3001)
+        assert np.all(curve.forward_rate(t[:-1], t[1:]) > 0)
+
+    def test_scenario_axis_matches_single_curves(self):
+        """A curve with a scenario axis equals the scenarios evaluated one at a time."""
+        rng = np.random.default_rng(0)
+        scenarios = ZEROS + 0.005 * rng.standard_normal((20, KNOTS.size))
+        t = rng.uniform(0.0, 35.0, 300)
+        curve = YieldCurve(KNOTS, scenarios)
+        expected = np.array([YieldCurve(KNOTS, row).discount(t) for row in scenarios])
+        np.testing.assert_allclose(curve.discount(t), expected, rtol=1e-12)
+        np.testing.assert_allclose(curve.discount(t, curve.locate(t)), expected, rtol=1e-12)
+
+    @pytest.mark.parametrize('method', YieldCurve.METHODS)
+    @pytest.mark.parametrize('maturities, par', [
+        (np.array([1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 30.0]), np.array([0.02, 0.025, 0.028, 0.032, 0.034, 0.036, 0.038])),
+        (KNOTS, np.array([0.02, 0.022, 0.025, 0.027, 0.03, 0.032, 0.034, 0.036, 0.035])),
+    ])
+    def test_bootstrap_reprices_par_bonds(self, method, maturities, par):
+        """A bootstrapped curve prices every par bond at par, also with a sub-annual first knot."""
+        curve = YieldCurve.bootstrap_par(maturities, par, freq=2, method=method)
+        bonds = BondPortfolio.from_bullets(maturities, par, freq=2, face=1.0)
+        np.testing.assert_allclose(bonds.price(curve), 1.0, atol=1e-10)
+
+    def test_bond_prices_match_cash_flow_sums(self):
+        """Portfolio prices equal discounted cash flows summed bond by bond."""
+        curve = YieldCurve(KNOTS, ZEROS)
+        maturities = np.array([0.75, 2.0, 4.3, 10.0, 29.5])
+        coupons = np.array([0.01, 0.03, 0.045, 0.05, 0.02])
+        bonds = BondPortfolio.from_bullets(maturities, coupons, freq=2)
+        expected = []
+        for m, c in zip(maturities, coupons):
+            times = m - np.arange(int(np.ceil(2 * m)))[::-1] / 2
+            flows = np.full(times.size, 100 * c / 2)
+            flows[-1] += 100
+            expected.append(flows @ curve.discount(times))
+        np.testing.assert_allclose(bonds.price(curve), expected, rtol=1e-12)
+
+    def test_duration_and_convexity_match_parallel_shifts(self):
+        """Fisher-Weil duration and convexity match finite differences of a parallel shift."""
+        curve = YieldCurve(KNOTS, ZEROS)
+        bonds = BondPortfolio.from_bullets(np.array([2.0, 5.0, 10.0, 30.0]), 0.04)
+        price, duration, convexity = bonds.analytics(curve)
+        up, down = bonds.price(curve.shift(1.0)), bonds.price(curve.shift(-1.0))
+        h = 1e-4
+        np.testing.assert_allclose(-(up - down) / (2 * h) / price, duration, rtol=1e-5)
+        np.testing.assert_allclose((up - 2 * price + down) / h**2 / price, convexity, rtol=1e-4)
+
+    def test_scenario_blocks_do_not_change_results(self):
+        """Revaluing in small scenario blocks gives the same prices as one block."""
+        rng = np.random.default_rng(1)
+        curve = YieldCurve(KNOTS, ZEROS + 0.01 * rng.standard_normal((50, KNOTS.size)))
+        bonds = BondPortfolio.from_bullets(rng.uniform(0.5, 30, 40), rng.uniform(0, 0.06, 40))
+        small = BondPortfolio(bonds.times, bonds.cash_flows, bonds.offsets, block_size=100)
+        np.testing.assert_allclose(small.price(curve), bonds.price(curve), rtol=1e-12)
+        for full, blocked in zip(bonds.analytics(curve), small.analytics(curve)):
+            np.testing.assert_allclose(blocked, full, rtol=1e-12)
+
+    def test_invalid_curves(self):
+        """Unknown methods, unsorted knots and mismatched rates are rejected."""
+        with pytest.raises(ValueError):
+            YieldCurve(KNOTS, ZEROS, 'spline')
+        with pytest.raises(ValueError):
+            YieldCurve(KNOTS[::-1], ZEROS)
+        with pytest.raises(ValueError):
+            YieldCurve(KNOTS, ZEROS[:-1])
+
+
+class TestShortRateModels:
+    """Tests for the Vasicek, CIR and Hull-White short-rate models."""
+
+    @pytest.mark.parametrize('model', [
+        VasicekModel(0.03, 0.8, 0.05, 0.02),
+        CIRModel(0.03, 0.8, 0.05, 0.1),
+    ])
+    def test_bond_prices_match_monte_carlo(self, model):
+        """Closed-form bond prices equal E[exp(-integral of r)] over simulated paths."""
+        times, rates = model.simulate(100000, 5.0, 250, seed=0)
+        assert rates.shape == (100000, 251)
+        discount = path_discount(times, rates)
+        for step in (50, 125, 250):
+            mc = discount[:, step - 1]
+            exact = model.zcb_price(model.r0, times[step])
+            assert mc.mean() == pytest.approx(exact, abs=4 * mc.std() / np.sqrt(mc.size) + 1e-5)
+
+    def test_bond_price_shapes(self):
+        """Bond prices broadcast to the rate shape followed by the maturity shape."""
+        model = VasicekModel(0.03, 0.8, 0.05, 0.02)
+        r = np.full((4, 3), 0.03)
+        tau = np.array([1.0, 2.0, 5.0, 10.0, 30.0])
+        prices = model.zcb_price(r, tau)
+        assert prices.shape == (4, 3, 5)
+        np.testing.assert_allclose(prices[2, 1], model.zcb_price(0.03, tau), rtol=1e-14)
+        assert model.zcb_price(0.03, 0.0) == pytest.approx(1.0)
+        curve = model.yield_curve(np.array([0.01, 0.03, 0.05]), tau)
+        assert curve.zero_rates.shape == (3, 5)
+
+    @pytest.mark.parametrize('cls, truth', [
+        (VasicekModel, (0.025, 0.6, 0.055, 0.015)),
+        (CIRModel, (0.025, 0.6, 0.055, 0.08)),
+    ])
+    def test_calibration_recovers_level_and_reversion(self, cls, truth):
+        """Calibrating to a model-generated curve recovers r0, kappa and theta and refits the curve."""
+        maturities = np.array([0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30])
+        zero_rates = cls(*truth).zero_rate(truth[0], maturities)
+        model, result = cls.calibrate(maturities, zero_rates)
+        np.testing.assert_allclose(model.params[:3], truth[:3], rtol=0.05)
+        assert np.max(np.abs(result.fun)) < 1e-6
+
+    def test_hull_white_fits_initial_curve(self):
+        """Hull-White reprices the initial curve at t = 0 exactly."""
+        curve = YieldCurve(KNOTS, ZEROS)
+        model = HullWhiteModel(curve, 0.1, 0.01)
+        tau = np.linspace(0.1, 30, 60)
+        np.testing.assert_allclose(model.zcb_price(model.r0, tau), curve.discount(tau), rtol=1e-10)
+
+    def test_hull_white_bond_prices_are_martingales(self):
+        """Discounted Hull-White bond prices at a future date average to today's curve."""
+        curve = YieldCurve(KNOTS, ZEROS)
+        model = HullWhiteModel(curve, 0.1, 0.01)
+        times, rates = model.simulate(100000, 3.0, 300, seed=1)
+        discount = path_discount(times, rates)[:, -1]
+        tau = np.array([0.0, 2.0, 7.0])
+        values = discount[:, None] * model.zcb_price(rates[:, -1], tau, t=3.0)
+        se = values.std(axis=0) / np.sqrt(len(values))
+        np.testing.assert_array_less(np.abs(values.mean(axis=0) - curve.discount(3.0 + tau)), 4 * se + 1e-5)
+
+    def test_invalid_models(self):
+        """The base class is abstract and nonpositive parameters are rejected."""
+        with pytest.raises(TypeError):
+            ShortRateModel()
+        with pytest.raises(ValueError):
+            VasicekModel(0.03, 0.0, 0.05, 0.02)
+        with pytest.raises(ValueError):
+            CIRModel(-0.01, 0.5, 0.05, 0.1)
+        with pytest.raises(ValueError):
+            HullWhiteModel(YieldCurve(KNOTS, ZEROS), 0.1, -0.01)
+        with pytest.raises(ValueError):
+            HullWhiteModel(YieldCurve(KNOTS, np.vstack([ZEROS, ZEROS])), 0.1, 0.01)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])